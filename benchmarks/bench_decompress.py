@@ -0,0 +1,68 @@
+import sys, gzip, lzma, time
+from hashlib import sha256
+sys.path.append("./")
+
+from argparse import ArgumentParser
+from utils.constants import *
+from benchmarks.synthetic import generate_contents
+from benchmarks.bench_stages import parse_size
+from core.decompress import BACKENDS, PACKAGES, available, decompress
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████   Decompression benchmark   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+# How each extension is compressed for the fixture: as the mirror does ("gzip -9", "xz" default preset).
+COMPRESSORS = {"gz": lambda data: gzip.compress(data, compresslevel = 9, mtime = 0),
+               "xz": lambda data: lzma.compress(data, format = lzma.FORMAT_XZ)}
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def throughput(backend: str, compressed: bytes, extension: str, chunk_size: int = CHUNK_SIZE, runs: int = 3):
+    """
+    Best wall time of a few runs decompressing the fixture with a backend, streamed in chunks as a download
+    is (see "`decompress`"), and the SHA256 hash of the output (to check backends against each other).
+    """
+    times = []
+    for _ in range(runs):
+        view, hasher = memoryview(compressed), sha256()
+        chunks = (view[i : i + chunk_size] for i in range(0, len(view), chunk_size))
+        start = time.perf_counter()
+        for chunk in decompress(chunks, "fixture." + extension, backend = backend): hasher.update(chunk)
+        times.append(time.perf_counter() - start)
+    return min(times), hasher.hexdigest()
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+if (__name__ == "__main__"):
+
+    args = ArgumentParser(prog = "Debian Package Statistics - decompression benchmark",
+        description = """
+            Measures the throughput of each decompression backend (see "core/decompress.py") on a synthetic
+            contents-index file, compressed locally as the mirror does. Backends that are not installed are
+            listed, but skipped. All of them must give the same content: outputs are checked by hash.
+        """)
+    help = "[str] Lines of the synthetic file (e.g.: 100k, 1M). Default: 1M"
+    args.add_argument("-n", "--lines", type = parse_size, default = 1_000_000, help = help)
+    help = "[int] Runs of each backend. The best time is kept. Default: 3"
+    args.add_argument("-r", "--runs", type = int, default = 3, help = help)
+    help = f"[int] Bytes of compressed data fed at once, as read from the network. Default: {CHUNK_SIZE}"
+    args.add_argument("-c", "--chunk-size", type = int, default = CHUNK_SIZE, help = help)
+    args = args.parse_args()
+
+    content = b"".join(generate_contents(args.lines))
+    print(f"Synthetic contents-index file: {args.lines} lines, {len(content) / 2 ** 20 :.1f} MiB.")
+    print(SEPARATOR)
+    print("Backend".ljust(10), "Format".ljust(7), "Ratio".rjust(6), "Seconds".rjust(9), "In MB/s".rjust(9),
+          "Out MB/s".rjust(9))
+    for extension, compress in COMPRESSORS.items():
+        compressed, expected = compress(content), sha256(content).hexdigest()
+        installed = available(extension)
+        for backend in (name for name, (ext, _) in BACKENDS.items() if (ext == extension)):
+            row = [backend.ljust(10), ("." + extension).ljust(7), f"{len(content) / len(compressed) :6.1f}"]
+            if backend not in installed:
+                print(*row, f"(not installed: \"pip install {PACKAGES.get(backend, backend)}\")")
+                continue
+            seconds, digest = throughput(backend, compressed, extension, args.chunk_size, args.runs)
+            assert (digest == expected), f"\"{backend}\" gives another content."
+            print(*row, f"{seconds :9.3f}", f"{len(compressed) / seconds / 1e6 :9.1f}",
+                  f"{len(content) / seconds / 1e6 :9.1f}", "(default)" * (backend == installed[0]))
+    print(SEPARATOR)
@@ -0,0 +1,74 @@
+import os, sys, time, random
+sys.path.append("./")
+
+from argparse import ArgumentParser
+from utils.constants import *
+from utils.mirror import sample_contents
+from benchmarks.bench_stages import parse_size
+from core.content import DebianContentIndex
+from core.index import ContentsIndex
+from core.parser import parse_buffer, parse_parallel
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████████████   Parser benchmark   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+def line_index(content: bytes):
+    """Line parser: decode, split lines, regex-split each one and build the index from the rows."""
+    return ContentsIndex.from_rows(DebianContentIndex.parse_lines(content.decode("utf-8").splitlines()))
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def best_time(function, content: bytes, runs: int):
+    """Best wall time of a few runs, in seconds, and the result of the last one."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function(content)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+if (__name__ == "__main__"):
+
+    args = ArgumentParser(prog = "Debian Package Statistics - parser benchmark",
+        description = """
+            Compares the line parser with the vectorized one (see "core/parser.py") on synthetic
+            contents-index data, shaped like "temp/test_content_verify.txt". All of them must build
+            the same index: results are checked against the line parser's.
+        """)
+    help = "[str] Approximate amount of lines of the synthetic file (e.g.: 100k, 1M). Default: 1M"
+    args.add_argument("-n", "--lines", type = parse_size, default = 1_000_000, help = help)
+    help = "[int] Runs of each parser. The best time is kept. Default: 3"
+    args.add_argument("-r", "--runs", type = int, default = 3, help = help)
+    help = "[flag] Shuffle lines. Real files are sorted by filename, which the vectorized parser takes advantage of."
+    args.add_argument("--unsorted", action = "store_true", help = help)
+    help = "[int] Worker processes of the parallel case (see \"parse_parallel\"). Default: one per CPU. 0 to skip it."
+    args.add_argument("-w", "--workers", type = int, default = None, help = help)
+    args = args.parse_args()
+
+    # Each repetition of the sample has 23 lines (plus a blank one), with a distinct path prefix.
+    lines = [line for line in sample_contents(repeat = max(1, args.lines // 23)).splitlines() if line]
+    if args.unsorted: random.Random(0).shuffle(lines)
+    else: lines.sort()
+    content = (str.join("\n", lines) + "\n").encode("utf-8")
+    print(f"Synthetic contents-index file: {len(lines)} lines, {len(content) / 2 ** 20 :.1f} MiB.")
+
+    try: import pyarrow
+    except ImportError: pyarrow = None
+    cases = [("line parser", line_index), ("vectorized (NumPy)", lambda content: parse_buffer(content, arrow = False))]
+    if pyarrow:
+        cases.append(("vectorized (pyarrow)", lambda content: parse_buffer(content, arrow = True)))
+    if (args.workers != 0): # Batches of the same file, parsed by several processes.
+        workers = args.workers or os.cpu_count() or 1
+        cases.append((f"parallel ({workers} proc.)", lambda content: parse_parallel([content], workers)))
+
+    print(SEPARATOR)
+    print("Parser".ljust(22), "Seconds".rjust(9), "Lines/s".rjust(12), "Speed-up".rjust(9))
+    for name, function in cases:
+        seconds, result = best_time(function, content, args.runs)
+        if (name == cases[0][0]): # First case is the reference.
+            baseline, expected = seconds, result
+        for array in ("row_paths", "file_offsets", "file_packs"):
+            assert getattr(result, array).tolist() == getattr(expected, array).tolist(), f"\"{name}\" differs."
+        print(name.ljust(22), f"{seconds :9.3f}", f"{len(lines) / seconds :12,.0f}", f"{baseline / seconds :8.2f}x")
+    print(SEPARATOR)
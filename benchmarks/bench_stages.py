@@ -0,0 +1,178 @@
+import os, sys, io, re, json, time, platform, subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from tempfile import TemporaryDirectory
+sys.path.append("./")
+
+from argparse import ArgumentParser
+from utils.constants import *
+from core.instrument import MemorySampler
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████   Stage benchmark   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+# Stages of the pipeline, in the order they run. Each one is timed on its own.
+STAGES = ("download", "file_packs", "pack_files", "index", "ranking", "export")
+# Suffixes of sizes given on the command line (e.g.: "10k", "1M", "50M").
+SIZE_UNITS = {"": 1, "k": 10 ** 3, "m": 10 ** 6}
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def parse_size(text: str):
+    """Amount of lines from a size given on the command line, like "50000", "10k" or "50M"."""
+    match = re.fullmatch("([0-9_]+)([kKmM]?)", text.strip())
+    if not match:
+        raise ValueError(f"Invalid size: \"{text}\". Use a number, optionally followed by \"k\" or \"M\".")
+    return int(match[1]) * SIZE_UNITS[match[2].lower()]
+
+def run_stages(lines: int, seed: int, runs: int, stages: list):
+    """
+    Run the stages on a synthetic contents-index file (see "benchmarks/synthetic.py"), served by a local
+    mirror: no network access is needed. Prints of the stages themselves are silenced.\n
+    Inputs:
+    - `lines` (`int`): Size of the synthetic file.\n
+    - `seed` (`int`): Seed of the synthetic file.\n
+    - `runs` (`int`): Runs of each stage. The fastest one is kept, with its memory peak.\n
+    - `stages` (`list[str]`): Names of the stages to run (see "`STAGES`").\n
+    Outputs:
+    - `results` (`list[dict]`): Wall time, peak RSS and throughput of each stage.
+    """
+    from benchmarks.synthetic import contents_file
+    from core.base import DebianDownloader
+    from core.content import DebianContentIndex
+    from utils.mirror import LocalMirror
+    import pandas # Imported on first use by the stages: not part of their time.
+
+    with open(contents_file(lines, seed), "rb") as file:
+        files = {DebianContentIndex.FILENAME_ARCH.format(arch = "amd64"): file.read()}
+    filename = next(iter(files))
+    results = []
+    with LocalMirror(files) as mirror, TemporaryDirectory() as folder, redirect_stdout(io.StringIO()):
+        Downloader, Index = mirror.bind(DebianDownloader), mirror.bind(DebianContentIndex)
+        # Release file (and the hashes the mirror computes for it) is fetched once, outside of any stage.
+        release = Downloader(cache = None).release
+        options = {"cache": None, "release": release}
+        state = {}
+        cases = {
+            "download":   lambda: state.update(content = Downloader(**options).download(filename)),
+            "file_packs": lambda: state.update(file_packs = Index.get_table_file_packs(state["content"])),
+            "pack_files": lambda: Index.get_table_pack_files(state["file_packs"]),
+            "index":      lambda: state.update(obj = Index(arch = "amd64", **options)),
+            "ranking":    lambda: Index(arch = "amd64", counts_only = True, **options).get_ranking(10),
+            "export":     lambda: state["obj"].save_package_json(os.path.join(folder, "packages.json"))}
+        # Stages use the output of previous ones: those are run too, but not reported.
+        needed = {"file_packs": ["download"], "pack_files": ["download", "file_packs"], "export": ["index"]}
+        for stage in [stage for stage in STAGES if stage in stages]:
+            for previous in needed.get(stage, []):
+                if previous not in state: cases[previous]()
+            best = None
+            for _ in range(runs):
+                with MemorySampler() as memory:
+                    start = time.perf_counter()
+                    cases[stage]()
+                    seconds = time.perf_counter() - start
+                if (best is None) or (seconds < best[0]): best = (seconds, memory)
+            seconds, memory = best
+            results.append({"lines": lines, "stage": stage, "seconds": round(seconds, 4),
+                            "peak_rss_mb": round(memory.peak, 1),
+                            "delta_rss_mb": round(memory.peak - memory.start, 1),
+                            "lines_per_second": round(lines / seconds) if seconds else None})
+            # Large intermediate results are released once no remaining stage needs them.
+            if (stage == "pack_files"): state.pop("file_packs", None), state.pop("content", None)
+    return results
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def compare(results: list, baseline: list, tolerance: float = BENCH_TOLERANCE):
+    """
+    Compare results against those of a baseline run, for each size and stage found in both.\n
+    Inputs:
+    - `results` (`list[dict]`): Results of this run (see "`run_stages`").\n
+    - `baseline` (`list[dict]`): Results of the baseline run.\n
+    - `tolerance` (`float`): Allowed growth of wall time and of peak memory (e.g.: 0.2 for +20%).\n
+    Outputs:
+    - `rows` (`list[dict]`): Ratio of time and memory to the baseline for each size and stage, and
+        whether it is a regression (either ratio above "`1 + tolerance`").
+    """
+    previous = {(result["lines"], result["stage"]): result for result in baseline}
+    rows = []
+    for result in results:
+        if (base := previous.get((result["lines"], result["stage"]))) is None: continue
+        time_ratio = result["seconds"] / max(base["seconds"], 1e-9)
+        memory_ratio = result["peak_rss_mb"] / max(base["peak_rss_mb"], 1e-9)
+        rows.append({"lines": result["lines"], "stage": result["stage"], "time_ratio": round(time_ratio, 3),
+                     "memory_ratio": round(memory_ratio, 3),
+                     "regression": max(time_ratio, memory_ratio) > 1 + tolerance})
+    return rows
+
+def print_results(results: list, rows: list = None):
+    """Print the results as a table, with the comparison to a baseline if any."""
+    ratios = {(row["lines"], row["stage"]): row for row in rows or []}
+    print(SEPARATOR)
+    print("Lines".rjust(11), "Stage".ljust(11), "Seconds".rjust(9), "Lines/s".rjust(13), "Peak MiB".rjust(9),
+          "Time".rjust(7) if rows else "", "Memory".rjust(7) if rows else "")
+    for result in results:
+        row = ratios.get((result["lines"], result["stage"]))
+        compared = [] if (row is None) else [f"{row['time_ratio'] :6.2f}x", f"{row['memory_ratio'] :6.2f}x",
+                                             "REGRESSION" if row["regression"] else ""]
+        print(f"{result['lines'] :11,}", result["stage"].ljust(11), f"{result['seconds'] :9.3f}",
+              f"{result['lines_per_second'] or 0 :13,}", f"{result['peak_rss_mb'] :9.1f}", *compared)
+    print(SEPARATOR)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+if (__name__ == "__main__"):
+
+    args = ArgumentParser(prog = "Debian Package Statistics - stage benchmark",
+        description = """
+            Times each stage of the pipeline (download, parsing, flipping, indexing, ranking and export) on
+            synthetic contents-index files of several sizes, served by a local mirror (no network needed).
+            Each size runs in its own process, so that memory peaks of one do not hide those of the next.
+            Results are saved as JSON, and can be compared against a previous run to catch regressions.
+        """)
+    help = "[str] Sizes of the synthetic files, in lines (e.g.: 10k 1M 50M). Default: 10k 100k 1M"
+    args.add_argument("-s", "--sizes", nargs = "+", type = parse_size, default = list(BENCH_SIZES), help = help)
+    help = "[str] Stages to run. Default: all of them"
+    args.add_argument("--stages", nargs = "+", choices = STAGES, default = list(STAGES), help = help)
+    help = "[int] Runs of each stage. The best time is kept. Default: 1"
+    args.add_argument("-r", "--runs", type = int, default = 1, help = help)
+    help = "[int] Seed of the synthetic files. Default: 0"
+    args.add_argument("--seed", type = int, default = 0, help = help)
+    help = f"[str] Where to save the results (JSON). Default: \"{BENCH_RESULTS_PATH}\""
+    args.add_argument("-o", "--output", default = BENCH_RESULTS_PATH, help = help)
+    help = "[str] Results of a previous run (JSON) to compare against. Exits with 1 on regressions."
+    args.add_argument("-b", "--baseline", default = None, help = help)
+    help = f"[float] Allowed growth of time and memory against the baseline. Default: {BENCH_TOLERANCE}"
+    args.add_argument("-t", "--tolerance", type = float, default = BENCH_TOLERANCE, help = help)
+    args.add_argument("--worker", action = "store_true", help = "[flag] Internal: run a single size in this process.")
+    args = args.parse_args()
+
+    if args.worker: # Child process: results go to the last line of the standard output.
+        for lines in args.sizes:
+            print(json.dumps(run_stages(lines, args.seed, args.runs, args.stages)))
+        sys.exit(0)
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding = "utf-8") as file: baseline = json.load(file)["results"]
+
+    results = []
+    for lines in args.sizes:
+        print(f"Running stages on {lines:,} lines...", flush = True)
+        command = [sys.executable, os.path.abspath(__file__), "--worker", "--sizes", str(lines),
+                   "--runs", str(args.runs), "--seed", str(args.seed), "--stages", *args.stages]
+        child = subprocess.run(command, capture_output = True, text = True)
+        if child.returncode:
+            sys.exit(f"Benchmark failed for {lines:,} lines:\n{child.stderr}")
+        results += json.loads(child.stdout.strip().splitlines()[-1])
+
+    import numpy
+    meta = {"date": datetime.now(timezone.utc).isoformat(timespec = "seconds"), "python": platform.python_version(),
+            "platform": platform.platform(), "numpy": numpy.__version__, "seed": args.seed, "runs": args.runs}
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok = True)
+    with open(args.output, "w", encoding = "utf-8") as file:
+        json.dump({"meta": meta, "results": results}, file, indent = 2)
+
+    rows = None if (baseline is None) else compare(results, baseline, args.tolerance)
+    print_results(results, rows)
+    print(f"Results saved to \"{args.output}\".")
+    if rows and any(row["regression"] for row in rows):
+        sys.exit(f"Regression above {args.tolerance :.0%} against \"{args.baseline}\".")
@@ -0,0 +1,108 @@
+import os, sys, gzip, random
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#██████████████████████████████████████████████████████████████████████████████████████   Synthetic contents-index   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+SECTIONS = ("admin", "devel", "doc", "games", "libdevel", "libs", "math", "net", "python", "science", "utils", "x11")
+SYLLABLES = ("ab", "ba", "ce", "da", "ex", "fo", "gi", "ko", "li", "lo", "ma", "ne", "pi", "qt", "ru", "so", "ti", "xo")
+# Folders of a package under "usr/share/{name}/", and file extensions. Some of them hold spaces, like real ones.
+FOLDERS = ("data files", "icons", "locale", "scripts", "templates")
+EXTENSIONS = (".png", ".py", ".mo", ".txt", ".gz", " (copy).txt", ".html", ".svg")
+# Share of the files of a package in each folder of the system, and lines of shared filenames (several packages).
+SHARES = {"usr/bin/{name}.": 0.04, "usr/lib/x86_64-linux-gnu/{name}.": 0.22,
+          "usr/share/doc/{name}/": 0.09, "usr/share/{name}/": 0.65}
+SHARED_LINES = 0.015
+# Exponent of the (Zipf) law of package sizes, and average amount of files per package.
+SIZE_EXPONENT = 1.1
+SIZE_AVERAGE = 40
+
+def generate_contents(lines: int, seed: int = 0, chunk_lines: int = 1 << 16):
+    """
+    Build a synthetic contents-index file, deterministic for a given seed, shaped like the real ones:
+     - Package sizes follow a Zipf law (a few huge packages, plenty of tiny ones).
+     - Packages spread their files among shared folders ("usr/bin", "usr/lib/...", "usr/share/doc").
+     - Some filenames are shipped by several packages, and some hold spaces.
+     - Lines are sorted by filename, and filename and packages are separated by a run of spaces.
+    Lines are produced package folder after package folder, so memory does not depend on the size.\n
+    Inputs:
+    - `lines` (`int`): Exact amount of lines of the file.\n
+    - `seed` (`int`): Seed of the random generator.\n
+    - `chunk_lines` (`int`): Lines per yielded chunk.\n
+    Outputs:
+    - `chunks` (`Iterator[bytes]`): Consecutive pieces of the (uncompressed) file.
+    """
+    rng = random.Random(seed)
+    names = _package_names(max(1, lines // SIZE_AVERAGE), rng)
+    packs = {name: f"{rng.choice(SECTIONS)}/{name}" for name in names}
+    # Largest packages are not the first ones alphabetically: sizes are shuffled among names.
+    weights = [1 / (rank + 1) ** SIZE_EXPONENT for rank in range(len(names))]
+    rng.shuffle(weights)
+    sizes = dict(zip(names, _allocate(lines, weights)))
+    # Each folder of each package is a block of consecutive lines. As names only have letters and digits,
+    # which sort after "/" and ".", sorting blocks by their prefix sorts the whole file.
+    blocks = sorted((prefix.format(name = name), name, count) for name in names
+                    for prefix, count in zip(SHARES, _allocate(sizes[name], list(SHARES.values()))) if count)
+    buffer = []
+    for prefix, name, count in blocks:
+        for path in _block_paths(prefix, count, rng):
+            field = packs[name]
+            if (rng.random() < SHARED_LINES): # Filename shipped by a couple of packages.
+                field += "," + packs[rng.choice(names)]
+            buffer.append(f"{path:<55} {field}\n")
+        if (len(buffer) >= chunk_lines):
+            yield str.join("", buffer).encode("utf-8")
+            buffer = []
+    if buffer: yield str.join("", buffer).encode("utf-8")
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def contents_file(lines: int, seed: int = 0, folder: str = BENCH_DATA_PATH):
+    """
+    Path of a gzipped synthetic contents-index file (see "`generate_contents`"), generated on first use
+    and kept in "`folder`" for the next runs.\n
+    Inputs:
+    - `lines` (`int`): Exact amount of lines of the file.\n
+    - `seed` (`int`): Seed of the random generator.\n
+    - `folder` (`str`): Folder where generated files are kept.\n
+    Outputs:
+    - `path` (`str`): Path of the file.
+    """
+    path = os.path.join(folder, f"Contents-{lines}-{seed}.gz")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok = True)
+        with gzip.open(path + ".part", "wb", compresslevel = 6) as file:
+            for chunk in generate_contents(lines, seed): file.write(chunk)
+        os.replace(path + ".part", path)
+    return path
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def _package_names(amount: int, rng: random.Random):
+    """[PRIVATE] Distinct package names made of syllables (plus digits, once syllables run out), sorted."""
+    names = set()
+    while (len(names) < amount):
+        name = str.join("", rng.choices(SYLLABLES, k = rng.randint(2, 4)))
+        if (name in names): name += str(rng.randrange(10 ** 6))
+        names.add(name)
+    return sorted(names)
+
+def _allocate(total: int, weights: list):
+    """[PRIVATE] Split a total proportionally to the given weights, into integers adding up to it exactly."""
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    # Largest remainders get the units lost by rounding down.
+    order = sorted(range(len(weights)), key = lambda i: counts[i] - weights[i] * scale)
+    for i in order[: total - sum(counts)]: counts[i] += 1
+    return counts
+
+def _block_paths(prefix: str, count: int, rng: random.Random):
+    """[PRIVATE] Sorted filenames of a block: numbered files, in folders when under "usr/share/{name}/"."""
+    if prefix.endswith("."): # "usr/bin/{name}.00000001" and the like.
+        return [f"{prefix}{n:08d}" for n in range(count)]
+    if prefix.startswith("usr/share/doc/"):
+        return [f"{prefix}{name}" for name in ("README.md", "changelog.Debian.gz", "copyright")[: count]] + \
+               [f"{prefix}examples/{n:08d}{rng.choice(EXTENSIONS)}" for n in range(max(0, count - 3))]
+    # Folders are filled in order, with the numbering going on: files of each one come after the previous.
+    return [f"{prefix}{FOLDERS[n * len(FOLDERS) // count]}/{n:08d}{rng.choice(EXTENSIONS)}" for n in range(count)]
@@ -1,9 +1,18 @@
-import sys, re, requests
-from gzip import GzipFile
-from io import BytesIO
+import os, sys, re
+from hashlib import sha256
+from codecs import getincrementaldecoder
+from queue import Queue, Full
+from threading import Thread, Event, Lock
+from tempfile import mkstemp
+from contextlib import nullcontext
 
 sys.path.append("./")
 from utils.constants import *
+from core.cache import DebianCache
+from core.transfer import RangedTransfer
+from core.release import DebianRelease
+from core.instrument import StageReport
+from core.decompress import backends, decompress
 
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
 #██████████████████████████████████████████████████████████████████████████████████████████████████████   Base class   ███
@@ -12,44 +21,170 @@ from utils.constants import *
 class DebianDownloader:
     """
     Base class for content indexer of Debian packages. Instantiate and use:
-     - "`directory`" property to get the available files with download count.
+     - "`directory`" property to get the available files with their size.
      - "`download`" method to specify and download files.\n
+    Available files come from the "`Release`" file of the suite (see "`DebianRelease`"), which also gives the
+    SHA256 hash of each one: downloads are verified while they stream (a "`ChecksumMismatch`" error is triggered
+    at their end otherwise), and cached copies with the right hash are reused without any request. Files are
+    fetched in their smallest compressed variant (".gz" or ".xz"). Mirrors without "`Release`" file fall back
+    to their HTML directory page.\n
+    Inputs:
+     - "`cache`" (`str`): Directory for the persistent cache of downloaded files (see "`DebianCache`").
+        Cached files are revalidated with a conditional request, and reused if unchanged. "`None`"
+        disables the cache.
+     - "`offline`" (`bool`): Never access the network: serve everything from the cache. A "`NotCached`"
+        error will be triggered when a file was never downloaded before.
+     - "`cache_size`" (`int`): Size limit in bytes for the cache. Least recently used files go first.
+     - "`retries`" (`int`): Times a failed request (connection error, or "429"/"5xx" status) is retried.
+     - "`backoff`" (`float`): Seconds to wait before the first retry. Doubled for each next one.
+     - "`range_workers`" (`int`): Concurrent "`Range`" requests for large files (from "`range_min_size`"
+        bytes on). Interrupted transfers resume from the bytes already on disk. "`1`" disables them.
+     - "`mirror`" (`str`): Base URL of the Debian mirror (ending with "/"). Defaults to "`MIRROR`".
+     - "`suite`" (`str`): Suite (or codename) to read from: "stable", "testing", "bookworm"...
+     - "`component`" (`str`): Component to read from: "main", "contrib", "non-free"...
+     - "`release`" (`DebianRelease`): The "`release`" of another instance for the same suite (e.g.: for another
+        component), so that it is not fetched and parsed again.
+     - "`report`" (`StageReport`): Where to record the duration, bytes and peak memory of each stage (Release
+        file, download, decompression...). Also filled by subclasses (parsing, ranking...). Nothing is recorded
+        when not given.
+     - "`codec`" (`str` or `dict`): Decompression backend (see "`core/decompress.py`"): "`isal`", "`zlib-ng`" or
+        "`zlib`" for ".gz" files, "`lzma`" for ".xz" ones. Each one only applies to the files of its compression
+        (or pass "`{extension: backend}`" for both). By default, the fastest one installed for each file.\n
+    All requests go through a single "`requests.Session`" (see "`session`"), which keeps connections alive.
     For more info visit:
      - Help and definitions: "https://wiki.debian.org/RepositoryFormat#A.22Contents"
      - Mirror page with directory: "http://ftp.uk.debian.org/debian/dists/stable/main/"
     """
     class FileNotFound(Exception): pass
+    class NotCached(Exception): pass
+    class ChecksumMismatch(Exception): pass
 
-    URL_BASE = "http://ftp.uk.debian.org/debian/dists/stable/main/{filename}"
+    MIRROR = DEBIAN_MIRROR
+    URL_DIST = "{mirror}dists/{suite}/{component}/"
+    URL_RELEASE = "{mirror}dists/{suite}/{filename}"
+    URL_BASE = URL_DIST.format(mirror = MIRROR, suite = DEBIAN_SUITE, component = DEBIAN_COMPONENT) + "{filename}"
     REGEX_HREF = "(?<=href=\")[^/]+(?=\">)" # Should only include files, not subpaths (/).
     REGEX_DCNT = "(?<= )[0-9]+(?=\r)"       # Should only include numbers next to carry char.
+    # Characters which "str.splitlines" considers as line boundaries.
+    LINE_BREAKS = ("\n", "\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
     
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
-    def __init__(self):
+    def __init__(self, cache: str = CACHE_PATH, offline: bool = False, cache_size: int = CACHE_MAX_BYTES,
+                       retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF,
+                       range_workers: int = RANGE_WORKERS, range_min_size: int = RANGE_MIN_BYTES,
+                       mirror: str = None, suite: str = None, component: str = None, release: DebianRelease = None,
+                       report: StageReport = None, codec: str = None):
 
-        self._directory = self._get_directory()
+        if offline and (cache is None):
+            raise ValueError("Offline mode needs a cache directory.")
+        codec = backends(codec) # Checked right away, and used per compression of each file.
+        self._cache = None if (cache is None) else DebianCache(cache, cache_size)
+        self._offline = offline
+        self._retries, self._backoff = retries, backoff
+        self._range_workers, self._range_min_size = range_workers, range_min_size
+        self._session, self._session_lock = None, Lock()
+        self._mirror = mirror or self.MIRROR
+        self._suite, self._component = suite or DEBIAN_SUITE, component or DEBIAN_COMPONENT
+        self.URL_BASE = self.URL_DIST.format(mirror = self._mirror, suite = self._suite,
+                                             component = self._component) + "{filename}"
+        self._report, self._codec = report, codec
+        with self._stage("release"):
+            self._release = release or self._get_release()
+            self._directory = self._get_directory()
 
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
-    @classmethod
-    def _get_directory(cls):
-        """[PRIVATE] Get file directory with download count."""
-        url = cls.URL_BASE.format(filename = "")        # Use URL without endpoint to get directory page.
-        resp = requests.get(url = url, timeout = 30)    # HTTP request for directory page content.
-        resp = resp.content.decode("utf-8")             # Decode and convert binary content to string.
-        files = re.findall(cls.REGEX_HREF, resp)        # Extract filenames from "href" tags in the HTML.
-        dcount = re.findall(cls.REGEX_DCNT, resp)       # Extract download count; rightmost number in each line.
+    @property
+    def session(self):
+        """The HTTP session of this downloader: pooled keep-alive connections, with retries and backoff."""
+        with self._session_lock: # Downloads may run in parallel threads.
+            if self._session is None:
+                import requests
+                from urllib3.util.retry import Retry
+                retry = Retry(total = self._retries, backoff_factor = self._backoff,
+                              status_forcelist = (429, 500, 502, 503, 504),
+                              allowed_methods = ("GET", "HEAD"), raise_on_status = False)
+                # Enough connections for several files, each one in several ranges.
+                pool = max(DOWNLOAD_WORKERS * self._range_workers, 10)
+                adapter = requests.adapters.HTTPAdapter(pool_connections = 4, pool_maxsize = pool,
+                                                        max_retries = retry)
+                self._session = requests.Session()
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _get_release(self):
+        """[PRIVATE] Get and parse the "Release" file of the suite (cached like any other file). "`None`" if missing."""
+        for filename in RELEASE_FILES:
+            url = self.URL_RELEASE.format(mirror = self._mirror, suite = self._suite, filename = filename)
+            try: content = b"".join(self._request_chunks(url, CHUNK_SIZE))
+            except self.NotCached: continue
+            except Exception as error: # HTTP errors carry their response ("requests" is only imported to download).
+                response = getattr(error, "response", None)
+                if (response is not None) and (response.status_code == 404): continue
+                raise
+            return DebianRelease.from_text(content.decode("utf-8"))
+        return None
+
+    def _get_directory(self):
+        """[PRIVATE] Get file directory with sizes: from the "Release" file, or else from the directory page."""
+        if self._release is not None:
+            return self._release.directory(self._component)
+        url = self.URL_BASE.format(filename = "")       # Use URL without endpoint to get directory page.
+        resp = self._request_chunks(url, CHUNK_SIZE)    # HTTP request (or cache) for directory page content.
+        resp = b"".join(resp).decode("utf-8")           # Decode and convert binary content to string.
+        files = re.findall(self.REGEX_HREF, resp)       # Extract filenames from "href" tags in the HTML.
+        dcount = re.findall(self.REGEX_DCNT, resp)      # Extract download count; rightmost number in each line.
         return dict(zip(files, map(int, dcount)))       # Zip both lists as dictionary. Numbers shall be ints.
     
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
     @property
     def directory(self):
-        """Returns a dict with available filenames as keys and download counts as values."""
+        """Returns a dict with available filenames as keys and their sizes in bytes as values."""
         return self._directory.copy()
+    @property
+    def release(self):
+        """Getter for the parsed "Release" file of the suite ("`None`" if the mirror has none)."""
+        return self._release
+    @property
+    def suite(self):
+        """Getter for the suite the files come from."""
+        return self._suite
+    @property
+    def component(self):
+        """Getter for the component the files come from."""
+        return self._component
+    @property
+    def report(self):
+        """Getter for the "`StageReport`" of this instance ("`None`" if not recording)."""
+        return self._report
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _stage(self, name: str):
+        """[PRIVATE] Record a block of code as a stage of the report, if any (see "`StageReport.stage`")."""
+        return nullcontext({}) if (self._report is None) else self._report.stage(name)
+
+    def _meter(self, name: str, chunks, lines: bool = False):
+        """[PRIVATE] Record a stream as a stage of the report, if any (see "`StageReport.meter`")."""
+        return chunks if (self._report is None) else self._report.meter(name, chunks, lines = lines)
     
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
     def _check_exist_file(self, filename: str):
-        """[PRIVATE] Verify if specified file exists."""
-        return (filename in self._directory.keys())
+        """[PRIVATE] Verify if specified file exists (in any compression)."""
+        return (self._locate(filename)[0] in self._directory.keys())
+
+    def _locate(self, filename: str):
+        """[PRIVATE] Name, size and SHA256 hash of the variant of a file to download (see "`DebianRelease.locate`")."""
+        variant = None if (self._release is None) else self._release.locate(self._component, filename)
+        return variant or (filename, None, None)
+
+    def version(self, filename: str):
+        """
+        Identity of the current version of a file on the mirror: name, size and SHA256 hash of the variant to
+        download. Without "`Release`" file, the hash is "`None`" and the size comes from the directory page.
+        """
+        name, size, digest = self._locate(filename)
+        return name, (self._directory.get(name) if (size is None) else size), digest
     
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
     def download(self, filename: str, path_save: str = None):
@@ -61,30 +196,235 @@ class DebianDownloader:
         Outputs:
         - `content` (`str`): The content of the downloaded file.\n
         """
+        # Decode the decompressed chunks as they arrive. Multi-byte characters
+        # may be cut between two chunks, so an incremental decoder is needed.
+        decoder = getincrementaldecoder("utf-8")()
+        file = None if (path_save is None) else open(path_save, "w", errors = "ignore")
+        content = []
+        try:
+            with self._stage("decode"):
+                for chunk in self.download_chunks(filename):
+                    content.append(text := decoder.decode(chunk))
+                    if file: file.write(text) # Save content to path's file.
+                content.append(text := decoder.decode(b"", final = True))
+                if file: file.write(text)
+        finally:
+            if file: file.close()
+        # Store content if path is given.
+        if path_save is not None:
+            print(f"Saved \"{filename}\" to \"{path_save}\".")
+
+        return str.join("", content)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def download_chunks(self, filename: str, chunk_size: int = CHUNK_SIZE):
+        """
+        Stream specified file from Debian repository, decompressing it on the fly.
+        Memory usage depends on "`chunk_size`", not on the size of the file.\n
+        Inputs:
+        - `filename` (`str`): The name of the file to download.\n
+        - `chunk_size` (`int`) (optional): Size in bytes of each chunk read from the network.\n
+        Outputs:
+        - `chunks` (`Iterator[bytes]`): Consecutive pieces of the decompressed content.\n
+        """
         # Check if file exists. Else raise error.
         if not self._check_exist_file(filename):
             raise self.FileNotFound("\"%s\"" % filename)
-        # If all good, HTTP request and download file.
-        url = self.URL_BASE.format(filename = filename)
-        resp = requests.get(url = url, timeout = 30)
-        content = resp.content
-
-        # If compressed, decompress before decoding.
-        if filename.endswith(".gz"):
-            content = BytesIO(content)
-            with GzipFile(fileobj = content) as file:
-                content = file.read()
-        # Convert content into string.
-        content = content.decode("utf-8")
+        # If all good, HTTP request and stream file (its cheapest variant), verifying it on the way.
+        name, _, digest = self._locate(filename)
+        url = self.URL_BASE.format(filename = name)
+        chunks = self._prefetch(self._request_chunks(url, chunk_size, digest))
+        # If compressed, decompress before yielding. Download time is the time spent waiting for raw chunks.
+        return self._meter("decompress", self._decompress(self._meter("download", chunks), name), lines = True)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def fetch(self, filename: str, path_save: str, chunk_size: int = CHUNK_SIZE):
+        """
+        Download specified file from Debian repository as is (i.e.: still compressed) into a local file.\n
+        Inputs:
+        - `filename` (`str`): The name of the file to download.\n
+        - `path_save` (`str`): Path to save file to.\n
+        - `chunk_size` (`int`) (optional): Size in bytes of each chunk read from the network.\n
+        Outputs:
+        - `path_save` (`str`): The same path once the file is complete, with the extension of the
+            compression actually downloaded (e.g.: ".xz" instead of ".gz").\n
+        """
+        if not self._check_exist_file(filename):
+            raise self.FileNotFound("\"%s\"" % filename)
+        name, _, digest = self._locate(filename)
+        url = self.URL_BASE.format(filename = name)
+        ext, ext_name = os.path.splitext(filename)[1], os.path.splitext(name)[1]
+        if (ext != ext_name) and path_save.endswith(ext):
+            path_save = path_save[: len(path_save) - len(ext)] + ext_name
+        with open(path_save, "wb") as file:
+            for chunk in self._meter("download", self._request_chunks(url, chunk_size, digest)):
+                file.write(chunk)
+        return path_save
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def read_chunks(cls, path: str, chunk_size: int = CHUNK_SIZE, codec: str = None):
+        """
+        Read a file stored by "`fetch`" chunk by chunk, just like "`download_chunks`" does.\n
+        Inputs:
+        - `path` (`str`): Path of the local file. Decompressed on the fly if ending with ".gz" or ".xz".\n
+        - `chunk_size` (`int`) (optional): Size in bytes of each chunk read from disk.\n
+        - `codec` (`str` or `dict`) (optional): Decompression backend(s). By default, the fastest one installed.\n
+        Outputs:
+        - `chunks` (`Iterator[bytes]`): Consecutive pieces of the decompressed content.\n
+        """
+        with open(path, "rb") as file:
+            yield from decompress(iter(lambda: file.read(chunk_size), b""), path, backend = codec)
+
+    @classmethod
+    def read_lines(cls, path: str, chunk_size: int = CHUNK_SIZE, codec: str = None):
+        """
+        Read a file stored by "`fetch`" line by line, just like "`download_lines`" does.\n
+        Inputs:
+        - `path` (`str`): Path of the local file. Decompressed on the fly if ending with ".gz" or ".xz".\n
+        - `chunk_size` (`int`) (optional): Size in bytes of each chunk read from disk.\n
+        - `codec` (`str` or `dict`) (optional): Decompression backend(s). By default, the fastest one installed.\n
+        Outputs:
+        - `lines` (`Iterator[str]`): Consecutive decoded lines, without line breaks.\n
+        """
+        return cls._split_lines(cls.read_chunks(path, chunk_size, codec))
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def download_lines(self, filename: str, chunk_size: int = CHUNK_SIZE):
+        """
+        Stream specified file from Debian repository, line by line. Lines are split
+        just like "`str.splitlines`" does over the whole content of "`download`".\n
+        Inputs:
+        - `filename` (`str`): The name of the file to download.\n
+        - `chunk_size` (`int`) (optional): Size in bytes of each chunk read from the network.\n
+        Outputs:
+        - `lines` (`Iterator[str]`): Consecutive decoded lines, without line breaks.\n
+        """
+        return self._split_lines(self.download_chunks(filename, chunk_size))
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def _split_lines(cls, chunks):
+        """[PRIVATE] Decode a stream of chunks and regroup it into lines."""
+        decoder = getincrementaldecoder("utf-8")()
+        carry, cr = "", False # Unfinished line from the previous chunk.
+        for chunk in chunks:
+            text = carry + decoder.decode(chunk)
+            # A "\r\n" pair split between chunks is still a single line break.
+            if cr and not carry: text = text.removeprefix("\n")
+            lines, cr = text.splitlines(), text.endswith("\r")
+            # Last line is incomplete unless the chunk ended with a line break.
+            carry = lines.pop() if (lines and not text.endswith(cls.LINE_BREAKS)) else ""
+            yield from lines
+        text = carry + decoder.decode(b"", final = True)
+        yield from text.splitlines()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _request_chunks(self, url: str, chunk_size: int, digest: str = None):
+        """
+        [PRIVATE] HTTP request in streaming mode, yielding raw (compressed) chunks. When cached,
+        the request is conditional and the cached payload is reused if the mirror answers "304".
+        With the expected SHA256 hash, a cached payload which has it is reused without any request,
+        and a downloaded one is verified (and only cached if it matches).
+        """
+        cache = self._cache
+        entry = None if (cache is None) else cache.lookup(url)
+        if self._offline or ((digest is not None) and entry and (entry["sha256"] == digest)):
+            if entry is None: raise self.NotCached(url) # Offline: never touch the network.
+            yield from cache.read(url, chunk_size)
+            return
+        # A cached payload with another hash than the expected one is outdated: no conditional request.
+        headers = {} if (cache is None) or (digest is not None) else cache.headers(url)
+        with self.session.get(url = url, headers = headers, timeout = HTTP_TIMEOUT, stream = True) as resp:
+            if (resp.status_code == 304): # Not modified: use the cached one.
+                yield from cache.read(url, chunk_size)
+                return
+            resp.raise_for_status()
+            chunks = self._transfer(url, resp, chunk_size)
+            if digest is not None: chunks = self._verify(chunks, url, digest)
+            if cache is None:
+                yield from chunks
+                return
+            # Keep a copy of the payload while it is being consumed.
+            with cache.writer(url, resp.headers) as writer:
+                for chunk in chunks:
+                    writer.write(chunk)
+                    yield chunk
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _transfer(self, url: str, resp, chunk_size: int):
+        """
+        [PRIVATE] Raw chunks of an open response. Large files go through concurrent "`Range`"
+        requests instead (see "`RangedTransfer`"), when the mirror allows them.
+        """
+        size = int(resp.headers.get("Content-Length", 0))
+        validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+        ranged = (self._range_workers > 1) and (size >= self._range_min_size) and validator and \
+                 (resp.headers.get("Accept-Ranges") == "bytes") and ("Content-Encoding" not in resp.headers)
+        if not ranged:
+            yield from resp.iter_content(chunk_size = chunk_size)
+            return
+        # With a cache, parts are kept in it so that a later attempt can resume them.
+        if self._cache is None:
+            handle, path = mkstemp(suffix = ".part")
+            os.close(handle)
+        else: path = self._cache.partial(url)
+        transfer = RangedTransfer(self.session, url, path, size, validator, self._range_workers,
+                                  self._retries, self._backoff)
+        complete = False
+        try:
+            yield from transfer.chunks(first = resp, chunk_size = chunk_size)
+            complete = True
+        finally: # Unfinished parts are only worth keeping in the cache.
+            if complete or (self._cache is None):
+                for path_remove in (path, path + transfer.SUFFIX_PROGRESS):
+                    if os.path.exists(path_remove): os.remove(path_remove)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _verify(self, chunks, url: str, digest: str):
+        """[PRIVATE] Pass chunks through while hashing them. Fail at the end if the hash is not the expected one."""
+        hasher = sha256()
+        for chunk in chunks:
+            hasher.update(chunk)
+            yield chunk
+        if (hasher.hexdigest() != digest):
+            raise self.ChecksumMismatch(f"\"{url}\" does not match the SHA256 hash of the Release file.")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _decompress(self, chunks, name: str):
+        """[PRIVATE] Decompress a stream of chunks according to the extension of the file's name, if any."""
+        return decompress(chunks, name, backend = self._codec)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @staticmethod
+    def _prefetch(chunks, depth: int = PREFETCH_CHUNKS):
+        """
+        [PRIVATE] Consume an iterator in a background thread, so that the network transfer
+        keeps going while the caller is busy parsing. At most "`depth`" chunks are held.
+        """
+        queue, stop, end = Queue(maxsize = depth), Event(), object()
+        def put(item): # Wait for room in the queue, unless consumer went away.
+            while not stop.is_set():
+                try: return queue.put(item, timeout = 0.1)
+                except Full: pass
+        def worker():
+            try:
+                for chunk in chunks:
+                    if stop.is_set(): break
+                    put(chunk)
+                put(end)
+            except BaseException as error:
+                put(error) # Hand errors over to the consumer.
+            finally:
+                chunks.close() # Release the HTTP connection.
+        Thread(target = worker, daemon = True).start()
+        try:
+            while (item := queue.get()) is not end:
+                if isinstance(item, BaseException): raise item
+                yield item
+        finally:
+            stop.set()
 
-        # Store content if path is given.
-        if path_save is not None:
-            with open(path_save, "w", errors = "ignore") as file:
-                file.write(content) # Save content to path's file.
-                print(f"Saved \"{filename}\" to \"{path_save}\".")
-                
-        return content
-    
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
 #██████████████████████████████████████████████████████████████████████████████████████████████████████   Quick test   ███
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
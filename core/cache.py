@@ -0,0 +1,184 @@
+import os, sys, json, time
+from hashlib import sha256
+from tempfile import mkstemp
+from threading import Lock
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████████   Cache class   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class DebianCache:
+    """
+    Persistent on-disk cache for files downloaded from the Debian mirror. Payloads are stored as they come from
+    the network (still compressed), named after their SHA256 hash, so that identical files are only stored once.
+    An "`index.json`" file maps each URL to its payload, plus the "`ETag`" / "`Last-Modified`" headers that
+    allow to revalidate it later on with a conditional HTTP request.
+    Inputs:
+     - "`path`" (`str`): Directory where the cache is held. Created if not existent.
+     - "`max_bytes`" (`int`): Size limit for all the payloads together. When exceeded, the least recently
+        used entries are evicted.\n
+    Methods:
+     - "`lookup`" (method, `dict`) to get the cached entry of a URL, if any.
+     - "`headers`" (method, `dict`) to get the conditional request headers for a URL.
+     - "`read`" (method, `Iterator[bytes]`) to stream a cached payload.
+     - "`writer`" (method, `CacheWriter`) to store a payload as it is being downloaded.
+     - "`partial`" (method, `str`) to get where an unfinished download is kept, to resume it.
+    """
+
+    FILENAME_INDEX = "index.json"
+    FOLDER_OBJECTS = "objects"
+    FOLDER_PARTIAL = "partial"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+
+        self._path = path
+        self._max_bytes = max_bytes
+        os.makedirs(os.path.join(path, self.FOLDER_OBJECTS), exist_ok = True)
+        os.makedirs(os.path.join(path, self.FOLDER_PARTIAL), exist_ok = True)
+        self._entries = self._load_index()
+        self._lock = Lock() # Downloads may run in parallel threads.
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _load_index(self):
+        """[PRIVATE] Read the "URL -> entry" index, or start an empty one."""
+        try:
+            with open(os.path.join(self._path, self.FILENAME_INDEX), "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {} # Missing or corrupt index: start over.
+
+    def _save_index(self):
+        """[PRIVATE] Write the index atomically, so that it is never seen half-written."""
+        handle, path_temp = mkstemp(dir = self._path, suffix = ".tmp")
+        with os.fdopen(handle, "w") as file:
+            json.dump(self._entries, file)
+        os.replace(path_temp, os.path.join(self._path, self.FILENAME_INDEX))
+
+    def _path_object(self, digest: str):
+        """[PRIVATE] Location of the payload with the given SHA256 hash."""
+        return os.path.join(self._path, self.FOLDER_OBJECTS, digest)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @property
+    def path(self):
+        """Getter for cache directory."""
+        return self._path
+    @property
+    def size(self):
+        """Total size in bytes of the stored payloads."""
+        digests = {entry["sha256"]: entry["size"] for entry in self._entries.values()}
+        return sum(digests.values())
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def lookup(self, url: str):
+        """
+        Get the cached entry of the given URL.\n
+        Inputs:
+        - `url` (`str`): The URL of the downloaded file.\n
+        Outputs:
+        - `entry` (`dict` or `None`): Keys "`sha256`", "`size`", "`etag`", "`last_modified`" and
+            "`used`" (last access time). "`None`" when not cached, or when its payload went missing.\n
+        """
+        entry = self._entries.get(url)
+        if (entry is None) or not os.path.isfile(self._path_object(entry["sha256"])):
+            return None
+        return dict(entry)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def headers(self, url: str):
+        """Conditional request headers, so that the mirror answers "304" if nothing changed."""
+        entry, headers = self.lookup(url), {}
+        if entry is None: return headers
+        if entry["etag"]: headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]: headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def read(self, url: str, chunk_size: int = CHUNK_SIZE):
+        """
+        Stream the cached payload of the given URL, and mark it as recently used.\n
+        Inputs:
+        - `url` (`str`): The URL of the downloaded file. Must be cached (see "`lookup`").\n
+        - `chunk_size` (`int`) (optional): Size in bytes of each chunk read from disk.\n
+        Outputs:
+        - `chunks` (`Iterator[bytes]`): Consecutive pieces of the payload.\n
+        """
+        with self._lock:
+            self._entries.update(self._load_index()) # Other instances may have written meanwhile.
+            entry = self._entries[url]
+            entry["used"] = time.time()
+            self._save_index()
+        with open(self._path_object(entry["sha256"]), "rb") as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def partial(self, url: str):
+        """Location for the parts of an unfinished download of the given URL, so that it can be resumed."""
+        return os.path.join(self._path, self.FOLDER_PARTIAL, sha256(url.encode("utf-8")).hexdigest())
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def writer(self, url: str, headers: dict):
+        """
+        Get a writer to store the payload of the given URL while it is being downloaded.
+        It only gets into the cache when the writer's context is exited without errors.\n
+        Inputs:
+        - `url` (`str`): The URL of the downloaded file.\n
+        - `headers` (`dict`): The HTTP response headers, to keep its validators.\n
+        Outputs:
+        - `writer` (`CacheWriter`): Context manager with a "`write`" method.\n
+        """
+        return CacheWriter(self, url, headers)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _commit(self, url: str, path_temp: str, digest: str, size: int, headers: dict):
+        """[PRIVATE] Move a finished payload into place, register it and enforce the size limit."""
+        with self._lock:
+            os.replace(path_temp, self._path_object(digest))
+            self._entries.update(self._load_index()) # Other instances may have written meanwhile.
+            self._entries[url] = {"sha256": digest, "size": size, "used": time.time(),
+                "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+            self._evict(keep = url)
+            self._save_index()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _evict(self, keep: str = None):
+        """[PRIVATE] Drop least recently used entries (but "`keep`") until under the size limit."""
+        by_usage = sorted(self._entries, key = lambda url: self._entries[url]["used"])
+        for url in by_usage:
+            if (self.size <= self._max_bytes): break
+            if (url == keep): continue
+            digest = self._entries.pop(url)["sha256"]
+            # Payloads are shared among URLs with the same content: remove when orphan.
+            if not any(entry["sha256"] == digest for entry in self._entries.values()):
+                os.remove(self._path_object(digest))
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+
+class CacheWriter:
+    """Write a payload into a temporary file, hashing it on the way. See "`DebianCache.writer`"."""
+
+    def __init__(self, cache: DebianCache, url: str, headers: dict):
+        self._cache, self._url, self._headers = cache, url, headers
+        self._hash, self._size = sha256(), 0
+        handle, self._path_temp = mkstemp(dir = cache.path, suffix = ".part")
+        self._file = os.fdopen(handle, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self._size += len(chunk)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, *args):
+        self._file.close()
+        if error_type is None: # Only complete downloads get into the cache.
+            digest = self._hash.hexdigest()
+            self._cache._commit(self._url, self._path_temp, digest, self._size, self._headers)
+        else: os.remove(self._path_temp)
@@ -0,0 +1,181 @@
+import sys, json
+import numpy as np
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, StringTable
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████   Columnar export   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+FORMATS = COLUMNAR_FORMATS # File extension: format.
+COLUMNS = ("path", "package", "section", "arch")
+META_KEY = b"contents-index" # Schema metadata holding the labels of the sources and the metadata of the index.
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def to_arrow(index: ContentsIndex, archs: list = None, meta: dict = None):
+    """
+    The index as a flat table, with one row per filename and package (i.e.: "`table_file_packs`" exploded),
+    along with the section of the package (the part before the last "/" of its name, null if none) and
+    the architecture. Every column is dictionary-encoded straight from the string tables of the index:
+    IDs are the indices, and filenames are never decoded.\n
+    Inputs:
+    - `index` (`ContentsIndex`): The index to convert.\n
+    - `archs` (`list[str]`): Label of each source of a merged index (default: "`meta["sources"]`"), or
+        the single one of the index (default: "`meta["arch"]`").\n
+    - `meta` (`dict`): More JSON-serializable metadata, stored in the schema along with the one of the index.\n
+    Outputs:
+    - `table` (`pyarrow.Table`): Columns "`COLUMNS`", rows grouped by architecture and in order of the lines.
+    """
+    pyarrow = _import_arrow()
+    labels = list(archs if (archs is not None) else index.meta.get("sources") or [index.meta.get("arch") or ""])
+    sources = index.row_sources if (index.row_sources is not None) else np.zeros(len(index), dtype = np.int32)
+    if (int(sources.max(initial = 0)) >= len(labels)):
+        raise ValueError("An architecture label is needed for each source of the index.")
+    entry_rows = np.repeat(np.arange(len(index), dtype = np.int64), np.diff(index.file_offsets))
+    entry_packs = np.asarray(index.file_packs, dtype = np.int32)
+    entry_archs = np.asarray(sources, dtype = np.int32)[entry_rows]
+    if (np.diff(entry_archs) < 0).any(): # Rows of the same source together, for the row groups.
+        order = np.argsort(entry_archs, kind = "stable")
+        entry_rows, entry_packs, entry_archs = entry_rows[order], entry_packs[order], entry_archs[order]
+    # Packages are few: their sections are decoded and interned.
+    sections = [name.rpartition("/")[0] for name in index.packs.to_array()]
+    section_table, section_ids = StringTable.build([section for section in sections if section])
+    pack_sections = np.full(len(sections), -1, dtype = np.int32)
+    pack_sections[np.array([bool(section) for section in sections], dtype = bool)] = section_ids
+    entry_sections = pack_sections[entry_packs]
+    dictionary = lambda ids, table, mask = None: pyarrow.DictionaryArray.from_arrays(
+        pyarrow.array(ids, type = pyarrow.int32(), mask = mask), _to_strings(table, pyarrow))
+    entry_paths = np.asarray(index.row_paths, dtype = np.int32)[entry_rows]
+    # Lines are told apart by their filename: only the ones repeating the previous one are listed.
+    repeated = (np.diff(entry_rows) != 0) & (np.diff(entry_paths) == 0) & (np.diff(entry_archs) == 0)
+    columns = [dictionary(entry_paths, index.paths),
+               dictionary(entry_packs, index.packs),
+               dictionary(np.maximum(entry_sections, 0), section_table, entry_sections < 0),
+               dictionary(entry_archs, pyarrow.array(labels, type = pyarrow.large_string()))]
+    meta = json.dumps({"archs": labels, "repeated": (np.flatnonzero(repeated) + 1).tolist(),
+                       "meta": {**index.meta, **(meta or {})}}, default = str)
+    return pyarrow.Table.from_arrays(columns, names = list(COLUMNS), metadata = {META_KEY: meta})
+
+def _to_strings(table, pyarrow):
+    """[PRIVATE] A string table as a zero-copy "`pyarrow`" array (or an array given as such)."""
+    if not isinstance(table, StringTable): return table
+    data, offsets = table.arrays
+    return pyarrow.LargeStringArray.from_buffers(len(table), pyarrow.py_buffer(np.ascontiguousarray(offsets,
+        dtype = np.int64)), pyarrow.py_buffer(np.ascontiguousarray(data, dtype = np.uint8)))
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def export_columnar(index: ContentsIndex, path: str, archs: list = None, fmt: str = None,
+                    compression: str = None, meta: dict = None):
+    """
+    Write the index into a columnar file (see "`to_arrow`"), which analytics tools read as a dataframe
+    and "`load_columnar`" turns back into an index. Each architecture is written into its own row groups
+    (or record batches), so that readers can skip the other ones.\n
+    Inputs:
+    - `index` (`ContentsIndex`): The index to export.\n
+    - `path` (`str`): Destination file.\n
+    - `archs` (`list[str]`): Architecture of each source of the index (see "`to_arrow`").\n
+    - `fmt` (`str`): "`parquet`" or "`feather`" (Arrow IPC file). Inferred from the extension if not given.\n
+    - `compression` (`str`): Compression of the columns ("`zstd`", "`lz4`"...). Default: "`zstd`" for
+        Parquet, "`lz4`" for Arrow (faster to load).\n
+    - `meta` (`dict`): More metadata to store (see "`to_arrow`").\n
+    Outputs:
+    - `count` (`int`): Amount of rows written.
+    """
+    fmt = _format(path, fmt)
+    pyarrow = _import_arrow()
+    table = to_arrow(index, archs, meta)
+    archs = table.column("arch").combine_chunks().indices.to_numpy(zero_copy_only = False)
+    bounds = np.flatnonzero(np.diff(archs)) + 1
+    bounds = [0, *bounds.tolist(), len(table)] if len(table) else []
+    if (fmt == "parquet"):
+        # Filenames are (almost) unique: Parquet dictionaries would only grow the file, unlike in Arrow.
+        with pyarrow.parquet.ParquetWriter(path, table.schema, compression = compression or "zstd",
+                                           use_dictionary = list(COLUMNS[1 :])) as writer:
+            for a, b in zip(bounds[: -1], bounds[1 :]):
+                writer.write_table(table.slice(a, b - a), row_group_size = COLUMNAR_ROW_GROUP_ROWS)
+    else:
+        options = pyarrow.ipc.IpcWriteOptions(compression = compression or "lz4")
+        with pyarrow.ipc.new_file(path, table.schema, options = options) as writer:
+            for a, b in zip(bounds[: -1], bounds[1 :]):
+                writer.write_table(table.slice(a, b - a), max_chunksize = COLUMNAR_ROW_GROUP_ROWS)
+    return len(table)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def load_columnar(path: str, fmt: str = None):
+    """
+    Build an index back from a columnar file written by "`export_columnar`", without the mirror: the
+    dictionaries of the columns are interned (see "`StringTable.from_buffer`", already sorted when written
+    from an index) and their indices become the IDs. Consecutive rows of the same filename (and
+    architecture) make a line, as they were exported, unless listed as another line of that filename
+    (duplicate lines are kept).\n
+    Inputs:
+    - `path` (`str`): The columnar file.\n
+    - `fmt` (`str`): "`parquet`" or "`feather`". Inferred from the extension if not given.\n
+    Outputs:
+    - `index` (`ContentsIndex`): The index, with its metadata. Merged ones get their "`row_sources`" back.
+    """
+    fmt = _format(path, fmt)
+    pyarrow = _import_arrow()
+    if (fmt == "parquet"): table = pyarrow.parquet.read_table(path, read_dictionary = list(COLUMNS))
+    else: table = pyarrow.feather.read_table(path)
+    saved = json.loads((table.schema.metadata or {}).get(META_KEY, b"{}"))
+    paths, path_ids = _interned(table.column("path"), pyarrow)
+    packs, pack_ids = _interned(table.column("package"), pyarrow)
+    arch_table, arch_ids = _interned(table.column("arch"), pyarrow)
+    labels = saved.get("archs") or arch_table.to_array().tolist()
+    arch_ids = np.array([labels.index(label) for label in arch_table.to_array()], dtype = np.int32)[arch_ids]
+    # A line starts wherever the filename (or the architecture) changes.
+    first = np.ones(len(path_ids), dtype = bool)
+    first[1 :] = (path_ids[1 :] != path_ids[: -1]) | (arch_ids[1 :] != arch_ids[: -1])
+    first[np.array(saved.get("repeated", []), dtype = np.int64)] = True
+    starts = np.flatnonzero(first)
+    file_offsets = np.append(starts, len(path_ids)).astype(np.int64)
+    meta = saved.get("meta", {})
+    row_sources = arch_ids[starts] if ("sources" in meta) else None
+    index = ContentsIndex(paths, packs, path_ids[starts], file_offsets, pack_ids, row_sources = row_sources)
+    index.meta = meta
+    return index
+
+def _interned(column, pyarrow):
+    """
+    [PRIVATE] String table of the values of a dictionary-encoded (or plain) column, and the ID of each
+    row in it. Chunks read from Parquet come with their own dictionaries, by order of first appearance:
+    they are interned one by one and merged (see "`StringTable.concat`", cheap for sorted rows) instead
+    of being unified by hashing. Values of the dictionaries that no row uses are dropped.
+    """
+    if not pyarrow.types.is_dictionary(column.type): column = column.dictionary_encode()
+    chunks = column.chunks
+    if chunks and all(chunk.dictionary.equals(chunks[0].dictionary) for chunk in chunks[1 :]):
+        chunks = [pyarrow.chunked_array(chunks).combine_chunks()] # A single dictionary (e.g.: Arrow IPC).
+    tables, ids = [], []
+    for chunk in chunks:
+        strings = chunk.dictionary.cast(pyarrow.large_string())
+        _, bounds, values = strings.buffers()
+        bounds = np.frombuffer(bounds, dtype = np.int64)[strings.offset : strings.offset + len(strings) + 1]
+        values = np.frombuffer(values, dtype = np.uint8) if (values is not None) else np.zeros(0, np.uint8)
+        table, remap = StringTable.from_buffer(values[bounds[0] : bounds[-1]], bounds - bounds[0])
+        tables.append(table)
+        ids.append(remap[chunk.indices.to_numpy(zero_copy_only = False)])
+    table, remaps = StringTable.concat(tables)
+    ids = np.concatenate([remap[i] for remap, i in zip(remaps, ids)] or [np.zeros(0, np.int32)])
+    used = np.zeros(len(table), dtype = bool)
+    used[ids] = True
+    if not used.all():
+        table, ids = table.take(np.flatnonzero(used)), (np.cumsum(used) - 1).astype(np.int32)[ids]
+    return table, ids.astype(np.int32)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def _format(path: str, fmt: str = None):
+    """[PRIVATE] Columnar format, given or inferred from the extension of the file."""
+    fmt = fmt or FORMATS.get(path.rpartition(".")[2])
+    if fmt not in set(FORMATS.values()):
+        raise ValueError(f"\"{fmt}\" is not a columnar format. Please use one of these: parquet, feather")
+    return fmt
+
+def _import_arrow():
+    """[PRIVATE] The "`pyarrow`" package, with its Parquet and Arrow IPC modules."""
+    try: import pyarrow, pyarrow.ipc, pyarrow.feather, pyarrow.parquet
+    except ImportError: raise ImportError("Columnar files need the \"pyarrow\" package.")
+    return pyarrow
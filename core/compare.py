@@ -0,0 +1,119 @@
+import sys
+import numpy as np
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, select_top
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████   Cross-architecture comparison   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class ArchComparison:
+    """
+    Comparison of several contents-index files (usually architectures: "amd64" against "arm64"...), over
+    a single merged index (see "`ContentsIndex.merge`"). Filenames and packages are interned once for all
+    of them, so every comparison is made with vectorized operations on their IDs, and no string is
+    decoded but the ones to show:
+     - "`deltas`" (method) for the packages whose file count differs between two sources.
+     - "`only_in`" (method, `ndarray`) for the filenames present in one source but not in another.
+     - "`aggregate`" (method) for the "top N" packages with the most files among all sources.\n
+    Sources can be given by position or by label (e.g.: "`"amd64"`" or "`"stable/main/amd64"`").\n
+    Inputs:
+    - `index` (`ContentsIndex`): Merged index, with "`row_sources`" and "`meta["sources"]`".
+    """
+    class SourceNotFound(Exception): pass
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, index: ContentsIndex):
+
+        if index.row_sources is None:
+            raise ValueError("Index is not merged: use \"ContentsIndex.merge\" (or \"from_indexes\").")
+        self.index = index
+        self.labels = list(index.meta.get("sources", []))
+        self._counts, self._presence = {}, {} # Built on demand, per source.
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def from_indexes(cls, indexes: list, labels: list):
+        """Compare already built indexes (e.g.: "`DebianContentIndex(...).index`" of each architecture)."""
+        return cls(ContentsIndex.merge(indexes, labels))
+
+    @classmethod
+    def fetch(cls, archs: list, suite: str = None, component: str = None, udeb: bool = False, **kwargs):
+        """
+        Download and index the contents-index files of several architectures of the same suite and
+        component (concurrently, see "`index_sources`"), and compare them.\n
+        Inputs:
+        - `archs` (`list[str]`): Architectures to compare.\n
+        - `suite` (`str`), `component` (`str`): Where they come from. Defaults to the usual ones.\n
+        - `udeb` (`bool`): Whether to compare the installer packages ("`Contents-udeb-{arch}.gz`") instead.\n
+        - Any other keyword argument ("`mirror`", "`cache`", "`offline`", "`downloader`"...) is passed to
+            "`index_sources`".\n
+        Outputs:
+        - `comparison` (`ArchComparison`): Labelled with the architecture names.
+        """
+        from core.multi import index_sources
+        dist = f"{suite or DEBIAN_SUITE}/{component or DEBIAN_COMPONENT}/" + "udeb-" * udeb
+        comparison = cls(index_sources([dist + arch for arch in archs], **kwargs))
+        comparison.labels = list(archs)
+        return comparison
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def source(self, source):
+        """Position of a source, given by position or by label."""
+        if isinstance(source, (int, np.integer)) and (0 <= source < len(self.labels)):
+            return int(source)
+        if source in self.labels:
+            return self.labels.index(source)
+        error = f"\"{source}\" is not compared. Please use one of these:\n  ==> "
+        raise self.SourceNotFound(error + str.join(", ", map(str, self.labels)))
+
+    def counts(self, source):
+        """File count of each package in a source, by package ID (0 for packages of other sources only)."""
+        s = self.source(source)
+        if s not in self._counts: self._counts[s] = self.index.counts(s)
+        return self._counts[s]
+
+    def presence(self, source):
+        """Mask of the filenames present in a source, by filename ID."""
+        s = self.source(source)
+        if s not in self._presence:
+            mask = np.zeros(len(self.index.paths), dtype = bool)
+            mask[self.index.row_paths[self.index.row_sources == s]] = True
+            self._presence[s] = mask
+        return self._presence[s]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def deltas(self, a, b, top: int = None):
+        """
+        Packages whose file count differs between two sources, largest differences first (ties broken
+        alphabetically, see "`select_top`"). Packages missing in one of them count 0 files there.\n
+        Inputs:
+        - `a`, `b` (`int | str`): Sources to compare.\n
+        - `top` (`int`): Maximum amount of packages to return. Default: all of them.\n
+        Outputs:
+        - `names` (`list[str]`): The packages.\n
+        - `counts_a`, `counts_b` (`ndarray[int64]`): Their file count in each source.
+        """
+        counts_a, counts_b = self.counts(a), self.counts(b)
+        gaps = np.abs(counts_a - counts_b)
+        changed = np.count_nonzero(gaps)
+        ids = select_top(gaps, changed if (top is None) else min(top, changed))
+        return [self.index.packs[p] for p in ids], counts_a[ids], counts_b[ids]
+
+    def only_in(self, a, b):
+        """IDs of the filenames present in source "`a`" but not in source "`b`" (sorted, hence alphabetical)."""
+        return np.flatnonzero(self.presence(a) & ~self.presence(b))
+
+    def aggregate(self, top: int = 10):
+        """
+        Names and total file counts of the "`top`" packages with the most files among all sources
+        (see "`ContentsIndex.ranking`").
+        """
+        return self.index.ranking(top)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def paths(self, ids: np.ndarray, limit: int = None):
+        """Decode filenames by ID, only the first "`limit`" ones if given."""
+        return self.index.paths.take(ids[: limit]).to_array().tolist()
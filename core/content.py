@@ -1,9 +1,17 @@
-import os, sys, re, json
-from pandas import Series, Index
+import os, sys, re
 
 sys.path.append("./")
 from utils.constants import *
 from core.base import DebianDownloader
+from core.index import ContentsIndex, PackageCounts, skip_header, split_line
+from core.parser import parse_chunks, parse_buffer, parse_parallel, count_chunks, count_parallel
+from core.incremental import build_index, update_index
+from core.search import PathSearch
+from core.export import export_pack_files, write_pack_files
+from core.columnar import export_columnar, load_columnar
+from core.database import ContentsDatabase
+from core.external import ExternalSort
+from core.metrics import IndexMetrics
 
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
 #██████████████████████████████████████████████████████████████████████████████████████████████████████   Main class   ███
@@ -17,14 +25,44 @@ class DebianContentIndex(DebianDownloader):
     Inputs:
      - "`arch`" (`str`): The architecture on which the contents-index file is to be downloaded. If not
         specified, it will consider the architecture of the machine where this code is executed in. An
-        "`ArchitectureNotFound`" error will be triggered when given architecture is not available.\n
+        "`ArchitectureNotFound`" error will be triggered when given architecture is not available.
+     - "`stream`" (`bool`): Whether to parse the file line by line as it is downloaded (default), so that
+        memory usage does not depend on the size of the file. Otherwise it is downloaded as a whole first.
+     - "`counts_only`" (`bool`): Whether to only count files per package upon instantiation, which is all
+        that "`get_ranking`" needs. The full index is then only built (downloading the file again, which
+        is served from the cache) if the tables or "`save_package_json`" are requested.
+     - "`previous`" (`str`): Path of a persisted index of a previous run, for incremental updates. When it
+        exists, only the lines that changed since then are parsed, and "`changes`" reports the packages
+        whose file count changed. Either way, the resulting index is persisted there for the next run.
+        Takes precedence over "`counts_only`", as patching the index is cheaper than counting again.
+     - "`memory_budget`" (`int`): Bytes of memory to build the "package -> filenames" relation within
+        (see "`ExternalSort`"), for machines where the whole index does not fit. Sorted runs are spilled
+        to temporary files (in "`temp_folder`", or the system's one), and merged for "`get_ranking`" and
+        "`save_package_json`", with the same results as in memory. The index and tables are then only
+        built (in memory, downloading the file again) if requested. Takes precedence over "`counts_only`",
+        but not over "`previous`".
+     - "`parse_workers`" (`int`): Worker processes parsing the file (or counting, with "`counts_only`") while
+        it is decompressed, for multi-core machines (see "`parse_parallel`"). Same results. By default (or
+        1), it is parsed in the calling thread.
+     - "`udeb`" (`bool`): Whether to read the contents of the installer packages ("`Contents-udeb-{arch}.gz`")
+        instead of the regular ones. Arch-independent files come in their own "`all`" architecture.
+     - Any other keyword argument ("`cache`", "`offline`"...) is passed to "`DebianDownloader`".\n
     Methods:
-     - "`directory`" (property, `str`) to get the available files with download count.
+     - "`directory`" (property, `dict`) to get the available files with their size in bytes (from the "Release"
+        file, or else the mirror's directory page).
      - "`list_archs`" (property, `list`) to get the architectures that are available on directory.
+     - "`index`" (property, `ContentsIndex`) to get the compact index from which the tables below are built.
+     - "`changes`" (property, `DataFrame`) to get the packages changed since the "`previous`" index.
      - "`table_file_packs`" (property, `Series`) to get a table of existent files and which packages they belong to.
      - "`table_pack_files`" (property, `Series`) to get a table of existent packages and which files do they include.
-     - "`save_package_json`" (method, `None`) to store the latter "`table_pack_files`" element into a json file.
-     - "`get_ranking`" (method, `Series`) to get a ranking of the packages with the most files included.\n
+     - "`save_package_json`" (method, `None`) to store the latter "`table_pack_files`" element into a json file
+        (or NDJSON, optionally compressed), streamed from the index.
+     - "`search`" (method, `Series`) to find which packages ship a file, by exact name, prefix, basename, etc.
+     - "`save_index`" / "`open_index`" (method / class method) to store the index and reopen it via "`mmap`".
+     - "`save_columnar`" / "`open_columnar`" (method / class method) to store "`table_file_packs`" as Parquet (or
+        Arrow) for analytics tools, and reopen the index from it.
+     - "`get_ranking`" (method, `Series`) to get a ranking of the packages with the most files included.
+     - "`metrics`" (property, `IndexMetrics`) to get file counts by section, top-level directory, size class...\n
     For more info visit:
      - Help and definitions: "https://wiki.debian.org/RepositoryFormat#A.22Contents"
      - Mirror page with directory: "http://ftp.uk.debian.org/debian/dists/stable/main/"
@@ -33,42 +71,91 @@ class DebianContentIndex(DebianDownloader):
     class ArchitectureNotFound(Exception): pass
 
     FILENAME_ARCH = "Contents-{arch}.gz" # Filename format.
+    FILENAME_UDEB = "Contents-udeb-{arch}.gz"
     URL_ARCH = DebianDownloader.URL_BASE + FILENAME_ARCH
 
-    # Find like: "Contents- | alphanumeric whatever | .gz"
-    REGEX_ARCH_LOCATE = "(?<=Contents-)\\w+(?=\\.gz)"
-    # To keep the "alphanumeric whatever" from the middle.
-    REGEX_ARCH_EXTRACT = "(Contents-|\\.gz)"
+    # Find like: "Contents- | alphanumeric whatever | .gz" (or ".xz").
+    REGEX_ARCH_LOCATE = "(?<=Contents-)\\w+(?=\\.(?:gz|xz)$)"
+    REGEX_UDEB_LOCATE = "(?<=Contents-udeb-)\\w+(?=\\.(?:gz|xz)$)"
 
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
-    def __init__(self, arch: str = None):
+    def __init__(self, arch: str = None, stream: bool = True, counts_only: bool = False,
+                       previous: str = None, udeb: bool = False, memory_budget: int = None,
+                       temp_folder: str = None, parse_workers: int = None, **kwargs):
 
-        super().__init__() # Construct parent class instance.
+        super().__init__(**kwargs) # Construct parent class instance.
         if arch is None: # When no arch given, use the one found above.
             comment = "Warning - No architecture given. Using local:"
             print(comment, "\"%s\"" % (arch := ARCH_LOCAL_MACHINE))
 
-        # Regex patterns: hover mouse over "self.REGEX_ARCH_..." right below.
-        finder_locate_arch = lambda s: re.findall(self.REGEX_ARCH_LOCATE, s)
-        filter_extract_arch = lambda s: re.sub(self.REGEX_ARCH_EXTRACT, "", s)
-        # Find filenames with an architecture string. Extract such strings.
-        self._archs = filter(finder_locate_arch, self._directory.keys())
-        self._archs = list(map(filter_extract_arch, self._archs))
+        self._archs = self.get_archs(self._directory, udeb = udeb)
         # If the given architecture is not in the list, raise error.
         if not self._check_exist_arch(arch):
             error = f"\"{arch}\" is invalid. Please use one of these:\n  ==> "
             raise self.ArchitectureNotFound(error + str.join(", ", self._archs))
         
         self._arch = arch # Store arch and associated filename for URL.
-        self._filename = self.FILENAME_ARCH.format(arch = self._arch)
+        self._filename = (self.FILENAME_UDEB if udeb else self.FILENAME_ARCH).format(arch = self._arch)
         
-        # Download decoded file content, like the parent class.
-        content = super().download(self._filename)
-        # Parse content and get "filename vs list of its packages" table.
-        self._table_file_packs = self.get_table_file_packs(content)
-        # Group content and get "package vs list of its filenames" table.
-        self._table_pack_files = self.get_table_pack_files(self._table_file_packs)
+        self._stream, self._previous, self._workers = stream, previous, parse_workers
+        self._index = self._counts = self._changes = self._search = self._external = self._metrics = None
+        # Pandas' tables are only materialised on demand.
+        self._table_file_packs = self._table_pack_files = None
+        if (memory_budget is not None) and (previous is None): # Sorted runs on disk, instead of the index.
+            with self._stage("spill") as entry:
+                self._external = ExternalSort(self._download_chunks(), memory_budget, folder = temp_folder)
+                entry["lines"] = self._external.lines
+        elif counts_only and (previous is None): # Just a "package -> file count" map.
+            with self._stage("count"):
+                if (parse_workers or 1) > 1: self._counts = count_parallel(self._download_chunks(), parse_workers)
+                else: self._counts = count_chunks(self._download_chunks())
+        else: self._build_index()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _download_chunks(self):
+        """[PRIVATE] Download decompressed file content, like the parent class, as raw chunks."""
+        if self._stream: return super().download_chunks(self._filename)
+        else: return [b"".join(super().download_chunks(self._filename))]
+
+    def _download_lines(self):
+        """[PRIVATE] Download decoded file content, like the parent class, as lines."""
+        # When streaming, lines are parsed while the rest of the file is still being downloaded.
+        if self._stream: return super().download_lines(self._filename)
+        else: return super().download(self._filename).splitlines()
+
+    def _build_index(self):
+        """[PRIVATE] Parse content into the compact index, if not done yet."""
+        # Only the "filename vs list of its packages" relation is built right away.
+        # The inverse one ("package vs list of its filenames") is built when needed.
+        if self._index is not None:
+            return self._index
+        if self._previous is None: # Parsed straight from the raw bytes (see "core/parser.py").
+            with self._stage("parse") as entry:
+                if (self._workers or 1) > 1: self._index = parse_parallel(self._download_chunks(), self._workers)
+                else: self._index = parse_chunks(self._download_chunks())
+                entry["lines"] = len(self._index)
+            return self._index
+        # Incremental mode: patch the previous index if there is one. Else build one that can be patched.
+        with self._stage("update") as entry:
+            try: previous = ContentsIndex.load(self._previous, verify = True)
+            except (FileNotFoundError, ContentsIndex.FormatError): previous = None
+            if (previous is None) or (previous.row_hashes is None):
+                self._index = build_index(self._download_lines())
+            else:
+                self._index, self._changes = update_index(previous, self._download_lines())
+            entry["lines"] = len(self._index)
+        self.save_index(self._previous)
+        return self._index
     
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def get_archs(cls, directory: dict, udeb: bool = False):
+        """List the architectures with a contents-index file in the given directory (of "udeb" ones if "`udeb`")."""
+        # Regex patterns: hover mouse over "cls.REGEX_..._LOCATE" right below.
+        pattern = cls.REGEX_UDEB_LOCATE if udeb else cls.REGEX_ARCH_LOCATE
+        # Find filenames with an architecture string, and keep such strings (once, whatever the compression).
+        return list(dict.fromkeys(arch for name in directory.keys() for arch in re.findall(pattern, name)))
+
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
     def _check_exist_arch(self, arch: str):
         """[PRIVATE] Verify if specified file exists."""
@@ -76,36 +163,44 @@ class DebianContentIndex(DebianDownloader):
         
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
     @classmethod
-    def get_table_file_packs(cls, content: str):
+    def parse_lines(cls, lines):
+        """
+        Parse contents-index lines one by one, so that it can be fed straight from a download stream.
+        Same rows as the vectorized parser (see "`split_line`"), and the optional header is skipped.\n
+        Inputs:
+        - `lines` (`Iterable[str]`): The lines of the downloaded file, without line breaks.\n
+        Outputs:
+        - `rows` (`Iterator[tuple[str, list[str]]]`): Filename and its list of packages, for each line.\n
+        """
+        for line in skip_header(lines):
+            # Split each line into its 2 parts: filename (left) and its packages (right), as the
+            # vectorized parser does. Filenames may have spaces: only the last run of them separates.
+            path, field = split_line(line)
+            # Skip any empty / meaningless line. Comma-split the packages.
+            if field is not None: yield path, field.split(",")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def get_table_file_packs(cls, content):
         """
         [PRIVATE] Build an actual table from the content of the file.\n
         Can be easily manipulated further on with the use of Pandas' operations.\n
         Inputs:
-        - `content` (`str`): The content of the downloaded file.\n
+        - `content` (`str` or `Iterable[str]`): The content of the downloaded file, either
+            whole or as a stream of lines (e.g.: from "`download_lines`").\n
         Outputs:
         - `packages` (`Series[str, str]`): Parsed contents' table. Each row holds
             a filename (left/index), with its associated packages to the right.\n
         """
-        # Get a list of the file content's lines, and turn into series.
-        packages = Series(content.splitlines())
-        # Remove any empty / meaningless line.
-        packages = packages.loc[packages != ""]
-        # Split each line into its 2 parts: filename (left) and its packages (right).
-        # Careful: some filenames may have spaces so the split count is not always 2.
-        packages = packages.str.split(" +")
-        # Package name is the rightmost element (no spaces).
-        # Join back the others at the left and get the filename.
-        files = packages.str[: -1].str.join(" ")
-        # Convert to index.
-        files = Index(files, name = "filename")
-        # Comma-split rightmost packages and get package list.
-        packages = packages.str[-1].str.split(",")
-        # Use packages' "series" as a 2-column table.
-        return Series(data = packages.values, index = files, name = "packages")
+        # Whole content goes through the vectorized parser. Streamed lines, through the line parser.
+        if isinstance(content, str):
+            return parse_buffer(content.encode("utf-8")).file_packs_series()
+        # Parse into the compact index and turn it into a 2-column table.
+        return ContentsIndex.from_rows(cls.parse_lines(content)).file_packs_series()
 
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
     @classmethod
-    def get_table_pack_files(cls, file_packs: Series) -> Series:
+    def get_table_pack_files(cls, file_packs: "Series") -> "Series":
         """
         [PRIVATE] "Flip" the contents' index structure to get packages and its associated files.\n
         Inputs:
@@ -113,27 +208,141 @@ class DebianContentIndex(DebianDownloader):
         Outputs:
         - `pack_files` (`Series[str, list[str]]`): The tabulated "package -> filenames" series.
         """
-        # Expand each row with multiple packages into individual file-package rows.
-        # "file: [pack_a, pack_b, pack_c]" -> "file: pack_a, file: pack_b, file: pack_c"
-        pack_files = file_packs.explode().reset_index()
-        # Get a table of one row per package, and all of its associated files.
-        return pack_files.groupby("packages")["filename"].apply(list)
+        # Intern the table into the compact index, and flip it with a single sort of package IDs.
+        # Same result as: "file_packs.explode().reset_index().groupby("packages")["filename"].apply(list)"
+        return ContentsIndex.from_series(file_packs).pack_files_series()
     
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
-    def save_package_json(self, json_save: str = None):
+    def save_package_json(self, json_save: str = None, fmt: str = "json", compression: str = None):
         """
-        Turn the "package -> filenames" table into a json (`str: list`) file.\n
+        Turn the "package -> filenames" table into a json (`str: list`) file. Packages are written one
+        at a time, straight from the index, so that no other copy of the table is held in memory.\n
         Inputs:
         - `json_save` (`str`): The relative path where the json file will be saved in.\n
+        - `fmt` (`str`): "`json`" for a single compact object, or "`ndjson`" for one package per line.\n
+        - `compression` (`str`): "`gzip`" or "`zstd`". Inferred from "`json_save`" extension if not given.\n
         """
         if json_save is None: # Use arch as filename.
-            json_save = f"./temp/packages_{self._arch}.json"
-        # Convert the table into a dictionary.
-        packages = self._table_pack_files.to_dict()
-        # Create the destination file.
-        with open(json_save, "w", errors = "ignore") as file:
-            json.dump(packages, file, indent = 4) # Save to json.
-            print(f"Saved \"{self._filename}\" to \"{json_save}\".")
+            json_save = f"./temp/packages_{self._arch}.{fmt}"
+        if self._external is not None: # Merged from the sorted runs, package after package.
+            with self._stage("export") as entry:
+                write_pack_files(self._external.groups(), json_save, fmt = fmt, compression = compression)
+                entry["lines"] = self._external.lines
+            print(f"Saved packages of \"{self._filename}\" to \"{json_save}\".")
+            return
+        index = self.index
+        with self._stage("export") as entry:
+            export_pack_files(index, json_save, fmt = fmt, compression = compression)
+            entry["lines"] = len(index)
+        print(f"Saved packages of \"{self._filename}\" to \"{json_save}\".")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def search(self, query: str, mode: str = "exact", limit: int = None):
+        """
+        Find which packages ship the filenames matching a query (like "`apt-file search`").\n
+        Inputs:
+        - `query` (`str`): The filename, prefix, basename, substring or regular expression to look for.\n
+        - `mode` (`str`): One of "`exact`", "`prefix`", "`basename`", "`substring`" or "`regex`".\n
+        - `limit` (`int`): Maximum amount of filenames to return. All when not given.\n
+        Outputs:
+        - `table` (`Series`): Packages of each matching filename, sorted by filename.
+        """
+        # Search structures are built on first use of each mode, and kept for the next queries.
+        if self._search is None:
+            self._search = PathSearch(self.index)
+        return self._search.search(query, mode = mode, limit = limit)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def save_index(self, path: str = None):
+        """
+        Store the compact index into a binary file, which "`open_index`" reopens almost instantly.\n
+        Inputs:
+        - `path` (`str`): The relative path where the index will be saved in.\n
+        """
+        if path is None: # Use arch as filename.
+            path = INDEX_PATH.format(arch = self._arch)
+        index = self.index
+        with self._stage("save_index"):
+            index.save(path, meta = {"arch": self._arch, "filename": self._filename,
+                                     "suite": self._suite, "component": self._component})
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def open_index(cls, path: str, verify: bool = False):
+        """
+        Reopen an index stored by "`save_index`", without network access nor parsing: the file is
+        memory-mapped, and lookups only read the pages they need (see "`ContentsIndex.load`").\n
+        Inputs:
+        - `path` (`str`): The path of the stored index.\n
+        - `verify` (`bool`): Whether to check the checksum of the whole file first.\n
+        Outputs:
+        - `obj` (`DebianContentIndex`): Instance with the index only. Its tables and rankings work as
+            usual, but nothing else will be downloaded.
+        """
+        return cls._from_index(ContentsIndex.load(path, verify = verify))
+
+    @classmethod
+    def _from_index(cls, index: ContentsIndex):
+        """[PRIVATE] Instance holding the given index only (with its "`meta`"), without any download."""
+        obj = cls.__new__(cls) # Skip the constructor: it would fetch the directory.
+        obj._cache, obj._offline, obj._directory, obj._release, obj._report = None, True, {}, None, None
+        obj._codec = None
+        obj._arch, obj._filename = index.meta.get("arch"), index.meta.get("filename")
+        obj._suite, obj._component = index.meta.get("suite"), index.meta.get("component")
+        obj._archs = [obj._arch]
+        obj._stream, obj._previous, obj._workers = True, None, None
+        obj._index, obj._counts, obj._changes, obj._search, obj._external = index, None, None, None, None
+        obj._metrics = None
+        obj._table_file_packs = obj._table_pack_files = None
+        return obj
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def save_columnar(self, path: str = None, fmt: str = "parquet", compression: str = None):
+        """
+        Store "`table_file_packs`" as a flat columnar table, one row per filename and package, with the
+        section of the package and the architecture (see "`export_columnar`"). Readable as a dataframe by
+        analytics tools, and reopened by "`open_columnar`" (without the mirror).\n
+        Inputs:
+        - `path` (`str`): The relative path where the file will be saved in.\n
+        - `fmt` (`str`): "`parquet`" (smallest) or "`feather`" (Arrow IPC file, fastest to load).\n
+        - `compression` (`str`): Compression of the columns. Default: the one of the format.\n
+        """
+        if path is None: # Use arch as filename.
+            path = COLUMNAR_PATH.format(arch = self._arch, fmt = fmt)
+        index = self.index
+        with self._stage("export") as entry:
+            export_columnar(index, path, archs = [self._arch], fmt = fmt, compression = compression,
+                            meta = {"arch": self._arch, "filename": self._filename,
+                                    "suite": self._suite, "component": self._component})
+            entry["lines"] = len(index)
+        print(f"Saved index of \"{self._filename}\" to \"{path}\".")
+
+    @classmethod
+    def open_columnar(cls, path: str, fmt: str = None):
+        """
+        Reopen an index stored by "`save_columnar`", without network access nor parsing (see
+        "`load_columnar`"). Same as "`open_index`" otherwise: its tables and rankings work as usual.
+        """
+        return cls._from_index(load_columnar(path, fmt = fmt))
+
+    def save_sqlite(self, path: str = SQLITE_PATH, name: str = None):
+        """
+        Store the index into a SQLite database shared by several architectures (see "`ContentsDatabase`"),
+        replacing the previous one of the architecture at once: readers querying it meanwhile keep seeing
+        that one until the new one is complete.\n
+        Inputs:
+        - `path` (`str`): The database file (created if not existent).\n
+        - `name` (`str`): Name of the architecture in the database. Default: the architecture (with the
+            "`udeb-`" prefix for the installer packages).
+        """
+        index = self.index
+        name = name or ("udeb-" * self._filename.startswith("Contents-udeb-") + self._arch)
+        with self._stage("sqlite") as entry:
+            with ContentsDatabase(path) as db:
+                db.replace(name, index, meta = {"filename": self._filename, "suite": self._suite,
+                                                "component": self._component})
+            entry["lines"] = len(index)
+        print(f"Saved index of \"{self._filename}\" to \"{path}\" (as \"{name}\").")
 
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
     @property
@@ -141,16 +350,43 @@ class DebianContentIndex(DebianDownloader):
         """Getter for specified architecture."""
         return self._arch
     @property
+    def filename(self):
+        """Getter for the name of the contents-index file (e.g.: "Contents-amd64.gz")."""
+        return self._filename
+    @property
     def list_archs(self):
         """Getter for available architectures"""
         return self._archs
     @property
+    def index(self):
+        """Getter for the compact "`ContentsIndex`" behind the tables. Built on first use if needed."""
+        return self._build_index()
+    @property
+    def changes(self):
+        """Getter for the packages whose file count changed since the "`previous`" index (if updated)."""
+        return self._changes
+    @property
+    def metrics(self):
+        """Getter for the statistics of the index ("`IndexMetrics`"), all computed at once on first use."""
+        if self._metrics is None:
+            index = self.index
+            with self._stage("metrics") as entry:
+                self._metrics = IndexMetrics.from_index(index)
+                entry["lines"] = len(index)
+        return self._metrics
+    @property
     def table_file_packs(self):
-        """Getter for "filename -> packages" table."""
+        """Getter for "filename -> packages" table. Materialised from the index on first use."""
+        if self._table_file_packs is None:
+            index = self.index
+            with self._stage("file_packs"): self._table_file_packs = index.file_packs_series()
         return self._table_file_packs.copy()
     @property
     def table_pack_files(self):
-        """Getter for "package -> filenames" table."""
+        """Getter for "package -> filenames" table. Materialised from the index on first use."""
+        if self._table_pack_files is None:
+            index = self.index
+            with self._stage("pack_files"): self._table_pack_files = index.pack_files_series()
         return self._table_pack_files.copy()
         
     #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
@@ -162,12 +398,13 @@ class DebianContentIndex(DebianDownloader):
         Outputs:
         - `counter` (`Series`): The number of files for each package.
         """
-        # Count the amount of files for each package.
-        counter = self._table_pack_files.str.len()
-        # Rename the column for better visualization.
-        counter = counter.rename("file_count")
-        # Return the top N packages, highest being above.
-        return counter.sort_values(ascending = False).head(top)
+        # Count the amount of files for each package: either from the mere counts, from the sorted runs
+        # or from the index (no inversion needed). Then select the top N without sorting all packages.
+        source = self._counts if (self._counts is not None) else (self._external or self._index)
+        with self._stage("ranking"): packages, counts = source.ranking(top)
+        # Return the top N packages, highest being above. Rename for better visualization.
+        from pandas import Series
+        return Series(counts, index = packages, name = "file_count", dtype = "int64").rename_axis("packages")
     
 #█████████████████████████████████████████ Small test
     
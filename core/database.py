@@ -0,0 +1,220 @@
+import os, sys, json, sqlite3
+import numpy as np
+from itertools import repeat
+from contextlib import contextmanager
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, StringTable
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████   SQLite database   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class ContentsDatabase:
+    """
+    Indexes of several architectures in a single SQLite file, queried with SQL by any amount of readers
+    (processes or threads, each one with its own instance) instead of each one parsing and holding the
+    index. Names are normalized, and shared among architectures:
+     - "`packages`" and "`paths`": distinct names, with their IDs.
+     - "`files`": one row per architecture, filename and package (IDs).
+     - "`counts`": files of each package in each architecture, for rankings.
+     - "`paths_fts`": full-text index (trigrams) of the filenames, for substring searches.\n
+    Every architecture is stored at once by "`replace`", in a single transaction: with the WAL journal,
+    readers keep seeing the previous version until it commits, and never a half-built one.\n
+    Inputs:
+    - `path` (`str`): The database file. Created (along with its tables) if not existent.\n
+    - `readonly` (`bool`): Open it for reading only (it must exist then).\n
+    Methods:
+     - "`replace`" (method) to store (or replace) the index of an architecture.
+     - "`archs`" (property, `dict`) for the stored architectures, with their metadata.
+     - "`ranking`", "`files_of`", "`packs_of`", "`search`" (methods) for queries.
+    """
+    class ArchitectureNotFound(Exception): pass
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS archs (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, meta TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS packages (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS files (arch INTEGER NOT NULL, path INTEGER NOT NULL, package INTEGER NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS counts (arch INTEGER NOT NULL, package INTEGER NOT NULL, files INTEGER NOT NULL, "
+        "PRIMARY KEY (arch, package)) WITHOUT ROWID",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS paths_fts USING fts5(path, content = 'paths', content_rowid = 'id', "
+        "tokenize = 'trigram case_sensitive 1')",
+    )
+    INDEXES = {
+        "files_by_package": "CREATE INDEX IF NOT EXISTS files_by_package ON files (arch, package)",
+        "files_by_path": "CREATE INDEX IF NOT EXISTS files_by_path ON files (path, arch)",
+    }
+    TRIGRAM = 3 # Shortest query answered by the full-text index (shorter ones scan the filenames).
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, path: str = SQLITE_PATH, readonly: bool = False):
+
+        self.path = path
+        if readonly:
+            if not os.path.isfile(path): raise FileNotFoundError(f"No database at \"{path}\".")
+            uri = "file:" + os.path.abspath(path).replace("?", "%3f").replace("#", "%23") + "?mode=ro"
+            self._db = sqlite3.connect(uri, uri = True, timeout = SQLITE_TIMEOUT, isolation_level = None)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+            self._db = sqlite3.connect(path, timeout = SQLITE_TIMEOUT, isolation_level = None)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            with self._transaction():
+                for statement in self.SCHEMA + tuple(self.INDEXES.values()): self._db.execute(statement)
+        self._db.execute("PRAGMA synchronous = NORMAL")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the connection."""
+        self._db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """[PRIVATE] Write transaction: the lock is taken at once, and the changes committed or rolled back."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try: yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def replace(self, arch: str, index: ContentsIndex, meta: dict = None):
+        """
+        Store the index of an architecture, replacing its previous one, in a single transaction. New names
+        are added to the shared tables (and the full-text index), then the rows of the architecture are
+        loaded in large batches. When they are most of the table, its indexes are dropped and built again
+        afterwards (faster than updating them row by row). Names no longer referred to are dropped.\n
+        Inputs:
+        - `arch` (`str`): Name of the architecture (e.g.: "`amd64`").\n
+        - `index` (`ContentsIndex`): Its index.\n
+        - `meta` (`dict`): JSON-serializable metadata (e.g.: filename, suite), see "`archs`".
+        """
+        with self._transaction() as db:
+            db.execute("INSERT OR IGNORE INTO archs (name, meta) VALUES (?, '{}')", (arch,))
+            arch_id, = db.execute("SELECT id FROM archs WHERE name = ?", (arch,)).fetchone()
+            others, = db.execute("SELECT coalesce(sum(files), 0) FROM counts WHERE arch != ?", (arch_id,)).fetchone()
+            deferred = len(index.file_packs) >= others
+            if deferred:
+                for name in self.INDEXES: db.execute(f"DROP INDEX IF EXISTS {name}")
+            db.execute("DELETE FROM files WHERE arch = ?", (arch_id,))
+            db.execute("DELETE FROM counts WHERE arch = ?", (arch_id,))
+            # Global IDs of the names (local IDs are the ones of the index).
+            path_ids = self._intern(db, "paths", "path", index.paths, search = True)
+            pack_ids = self._intern(db, "packages", "name", index.packs)
+            entry_rows = np.repeat(np.arange(len(index.row_paths)), np.diff(index.file_offsets))
+            entry_paths, entry_packs = path_ids[index.row_paths[entry_rows]], pack_ids[index.file_packs]
+            for start in range(0, len(entry_packs), SQLITE_BATCH_ROWS):
+                end = start + SQLITE_BATCH_ROWS
+                db.executemany("INSERT INTO files VALUES (?, ?, ?)", zip(repeat(arch_id),
+                               entry_paths[start : end].tolist(), entry_packs[start : end].tolist()))
+            counts = index.counts()
+            keep = np.flatnonzero(counts)
+            db.executemany("INSERT INTO counts VALUES (?, ?, ?)",
+                           zip(repeat(arch_id), pack_ids[keep].tolist(), counts[keep].tolist()))
+            if deferred:
+                for statement in self.INDEXES.values(): db.execute(statement)
+            # Names that no architecture refers to anymore (counts hold every package with files).
+            unused = "NOT EXISTS (SELECT 1 FROM files WHERE files.path = paths.id)"
+            db.execute(f"INSERT INTO paths_fts (paths_fts, rowid, path) "
+                       f"SELECT 'delete', id, path FROM paths WHERE {unused}")
+            db.execute(f"DELETE FROM paths WHERE {unused}")
+            db.execute("DELETE FROM packages WHERE id NOT IN (SELECT package FROM counts)")
+            meta = {"lines": len(index), "paths": len(index.paths), "packages": int(len(keep)),
+                    "entries": len(index.file_packs), **(meta or {})}
+            db.execute("UPDATE archs SET meta = ? WHERE id = ?", (json.dumps(meta), arch_id))
+
+    @staticmethod
+    def _intern(db: sqlite3.Connection, table: str, column: str, strings: StringTable, search: bool = False):
+        """
+        [PRIVATE] Add the strings missing from a table of names (and to the full-text index if "`search`"),
+        and return the ID of each one in the table, by local ID. Loaded through a temporary table.
+        """
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS load_names (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+        db.execute("DELETE FROM temp.load_names")
+        data, offsets = strings.arrays
+        data, offsets = memoryview(np.asarray(data)), np.asarray(offsets)
+        for start in range(0, len(strings), SQLITE_BATCH_ROWS):
+            bounds = offsets[start : start + SQLITE_BATCH_ROWS + 1].tolist()
+            db.executemany("INSERT INTO temp.load_names VALUES (?, ?)",
+                           zip(range(start, start + len(bounds) - 1),
+                               (str(data[a : b], "utf-8") for a, b in zip(bounds[: -1], bounds[1 :]))))
+        last, = db.execute(f"SELECT coalesce(max(id), 0) FROM {table}").fetchone()
+        db.execute(f"INSERT OR IGNORE INTO {table} ({column}) SELECT name FROM temp.load_names ORDER BY id")
+        if search: # New names only: IDs after the previous last one.
+            db.execute(f"INSERT INTO paths_fts (rowid, path) SELECT id, {column} FROM {table} WHERE id > ?", (last,))
+        rows = db.execute(f"SELECT t.id FROM temp.load_names AS l JOIN {table} AS t ON t.{column} = l.name "
+                          f"ORDER BY l.id")
+        ids = np.fromiter((row[0] for row in rows), np.int64, len(strings))
+        db.execute("DELETE FROM temp.load_names")
+        return ids
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @property
+    def archs(self):
+        """Stored architectures, with their metadata (amount of lines, filenames... and the given one)."""
+        return {name: json.loads(meta) for name, meta in self._db.execute("SELECT name, meta FROM archs ORDER BY name")}
+
+    def _arch_id(self, arch: str):
+        """[PRIVATE] ID of a stored architecture."""
+        row = self._db.execute("SELECT id FROM archs WHERE name = ?", (arch,)).fetchone()
+        if row is None:
+            error = f"\"{arch}\" is not stored. Please use one of these:\n  ==> "
+            raise self.ArchitectureNotFound(error + str.join(", ", self.archs))
+        return row[0]
+
+    def ranking(self, arch: str, top: int = 10):
+        """
+        Names and file counts of the "`top`" packages with the most files in an architecture, with the same
+        tie-break as "`select_top`" (alphabetical, by bytes), as "`ContentsIndex.ranking`".
+        """
+        rows = self._db.execute("SELECT p.name, c.files FROM counts AS c JOIN packages AS p ON p.id = c.package "
+                                "WHERE c.arch = ? ORDER BY c.files DESC, p.name LIMIT ?",
+                                (self._arch_id(arch), max(top, 0))).fetchall()
+        return [name for name, _ in rows], np.array([count for _, count in rows], dtype = np.int64)
+
+    def files_of(self, package: str, arch: str):
+        """Filenames of a package in an architecture (alphabetical order)."""
+        rows = self._db.execute("SELECT t.path FROM packages AS p JOIN files AS f ON f.package = p.id "
+                                "JOIN paths AS t ON t.id = f.path WHERE p.name = ? AND f.arch = ? ORDER BY t.path",
+                                (package, self._arch_id(arch)))
+        return [path for path, in rows]
+
+    def packs_of(self, path: str, arch: str):
+        """Packages of a filename in an architecture (alphabetical order)."""
+        rows = self._db.execute("SELECT p.name FROM paths AS t JOIN files AS f ON f.path = t.id "
+                                "JOIN packages AS p ON p.id = f.package WHERE t.path = ? AND f.arch = ? ORDER BY p.name",
+                                (path, self._arch_id(arch)))
+        return [name for name, in rows]
+
+    def search(self, query: str, arch: str = None, limit: int = None):
+        """
+        Filenames containing "`query`" (case-sensitive), with their packages: through the full-text index
+        for queries of 3 characters or more, scanning the filenames otherwise.\n
+        Inputs:
+        - `query` (`str`): The substring.\n
+        - `arch` (`str`): Only the filenames of this architecture. Default: the ones of any architecture.\n
+        - `limit` (`int`): Maximum amount of filenames (the first ones, alphabetically). Default: all of them.\n
+        Outputs:
+        - `found` (`dict[str, list[str]]`): The packages of each filename, by filename (alphabetical order).
+        """
+        if len(query) >= self.TRIGRAM:
+            phrase = '"' + query.replace('"', '""') + '"' # Quoted: matched as a whole, not as FTS syntax.
+            hits, args = "SELECT rowid AS id FROM paths_fts WHERE paths_fts MATCH ?", [phrase]
+        else:
+            hits, args = "SELECT id FROM paths WHERE instr(path, ?) > 0", [query]
+        where = ""
+        if arch is not None:
+            where = "WHERE f.arch = ? "
+            args.append(self._arch_id(arch))
+        rows = self._db.execute(f"WITH hits (id) AS ({hits}) SELECT t.path, group_concat(DISTINCT p.name) "
+                                f"FROM hits AS h JOIN paths AS t ON t.id = h.id JOIN files AS f ON f.path = t.id "
+                                f"JOIN packages AS p ON p.id = f.package {where}GROUP BY t.id ORDER BY t.path LIMIT ?",
+                                args + [-1 if limit is None else limit])
+        return {path: sorted(packs.split(",")) for path, packs in rows}
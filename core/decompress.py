@@ -0,0 +1,111 @@
+import sys, zlib
+from importlib import import_module
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#██████████████████████████████████████████████████████████████████████████████████████████   Decompression backends   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+# Each backend: compression extension, and module providing its streaming decompressor.
+BACKENDS = {"isal": ("gz", "isal.isal_zlib"), "zlib-ng": ("gz", "zlib_ng.zlib_ng"), "zlib": ("gz", "zlib"),
+            "lzma": ("xz", "lzma")}
+PACKAGES = {"isal": "isal", "zlib-ng": "zlib-ng"} # Optional ones, by the package that installs them.
+
+_modules = {} # Imported backends (or "None" if not installed), by name.
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def available(extension: str = None):
+    """
+    Names of the installed backends, fastest first (see "`CODEC_BACKENDS`"), for a compression
+    extension ("`gz`", "`xz`") or all of them. Optional ones are only imported on the first call.
+    """
+    extensions = [extension] if extension else list(CODEC_BACKENDS)
+    return [name for ext in extensions for name in CODEC_BACKENDS.get(ext, ()) if _module(name) is not None]
+
+def select(extension: str, backend: str = None):
+    """
+    Backend to decompress files with the given extension: the given one, or else the fastest one
+    installed. Falls back to the standard library ("`zlib`", "`lzma`") when no faster one is.\n
+    Inputs:
+    - `extension` (`str`): Compression extension of the file ("`gz`" or "`xz`").\n
+    - `backend` (`str`): Name of the backend to use (see "`BACKENDS`"). By default, the fastest one.\n
+    Outputs:
+    - `name` (`str`): Name of the backend.
+    """
+    if backend is None:
+        installed = available(extension)
+        if not installed: raise ValueError(f"\"{extension}\" is not a supported compression.")
+        return installed[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"\"{backend}\" is not a decompression backend. Please use one of these: {', '.join(BACKENDS)}")
+    if (BACKENDS[backend][0] != extension):
+        raise ValueError(f"\"{backend}\" does not decompress \".{extension}\" files.")
+    if _module(backend) is None:
+        raise ImportError(f"\"{backend}\" backend needs the \"{PACKAGES.get(backend, backend)}\" package.")
+    return backend
+
+def backends(codec = None):
+    """
+    Backend chosen for each compression extension: a backend name only applies to the files of its own
+    extension (the other ones keep the fastest backend installed), and a "`{extension: backend}`" dict
+    chooses one per extension.\n
+    Inputs:
+    - `codec` (`str` or `dict[str, str]`): The chosen backend(s). By default, none.\n
+    Outputs:
+    - `backends` (`dict[str, str]`): Name of the chosen backend, by extension ("`gz`", "`xz`").
+    """
+    if codec is None: return {}
+    codecs = {BACKENDS[codec][0]: codec} if (isinstance(codec, str) and (codec in BACKENDS)) else codec
+    names = f"Please use one of these: {', '.join(BACKENDS)}"
+    if not isinstance(codecs, dict): raise ValueError(f"\"{codec}\" is not a decompression backend. {names}")
+    for extension, backend in codecs.items():
+        if backend not in BACKENDS: raise ValueError(f"\"{backend}\" is not a decompression backend. {names}")
+        if (BACKENDS[backend][0] != extension):
+            raise ValueError(f"\"{backend}\" does not decompress \".{extension}\" files.")
+    return dict(codecs)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def decompress(chunks, name: str, backend: str = None):
+    """
+    Decompress a stream of chunks according to the extension of the file's name (".gz", ".xz"), if any,
+    including multi-member (or multi-stream) files. Memory usage depends on the chunks, not on the file.
+    A file ending before the end of its last member (e.g.: a truncated download) raises an "`EOFError`".\n
+    Inputs:
+    - `chunks` (`Iterable[bytes]`): Consecutive pieces of the compressed file.\n
+    - `name` (`str`): Name (or path) of the file. Chunks are returned as they are without a known extension.\n
+    - `backend` (`str` or `dict`): Backend(s) to use (see "`backends`"). By default, the fastest one installed.\n
+    Outputs:
+    - `chunks` (`Iterator[bytes]`): Consecutive pieces of the decompressed content.
+    """
+    extension = name.rpartition(".")[2] if ("." in name) else ""
+    if extension not in CODEC_BACKENDS: return chunks
+    return _stream(chunks, _factory(select(extension, backends(backend).get(extension))))
+
+def _stream(chunks, make):
+    """[PRIVATE] Feed the chunks to decompressors made by "`make`", a new one after the end of each member."""
+    decompressor = make()
+    for chunk in chunks:
+        while chunk:
+            # Whatever comes after the end of a member (or stream), belongs to the next one.
+            if decompressor.eof: decompressor = make()
+            yield decompressor.decompress(chunk)
+            chunk = decompressor.unused_data if decompressor.eof else b""
+    if not decompressor.eof:
+        raise EOFError("Compressed file ended before the end of its last member (truncated?).")
+    flush = getattr(decompressor, "flush", None)
+    if flush is not None: yield flush()
+
+def _factory(name: str):
+    """[PRIVATE] Function making a new streaming decompressor of a backend."""
+    module = _module(name)
+    if (BACKENDS[name][0] == "xz"): return lambda: module.LZMADecompressor(module.FORMAT_XZ)
+    return lambda: module.decompressobj(16 + zlib.MAX_WBITS) # Expect gzip header.
+
+def _module(name: str):
+    """[PRIVATE] Module of a backend, imported on first use, or "`None`" if not installed."""
+    if name not in _modules:
+        try: _modules[name] = import_module(BACKENDS[name][1])
+        except ImportError: _modules[name] = None
+    return _modules[name]
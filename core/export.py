@@ -0,0 +1,98 @@
+import sys, json, gzip
+import numpy as np
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, ranges
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████████   JSON export   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+FORMATS = EXPORT_FORMATS
+COMPRESSIONS = EXPORT_COMPRESSIONS # File extension: compression.
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def iter_pack_files(index: ContentsIndex, batch_files: int = EXPORT_BATCH_FILES):
+    """
+    Yield each package with its filenames, in alphabetical order, straight from the index.
+    Filenames are decoded by batches of packages, so that memory does not grow with the index.\n
+    Inputs:
+    - `index` (`ContentsIndex`): The index to read from.\n
+    - `batch_files` (`int`): Approximate amount of filenames decoded at once.\n
+    Outputs:
+    - `pairs` (`Iterator[tuple[str, list[str]]]`): Package name and its filenames.
+    """
+    data, offsets = index.paths.arrays
+    pack_offsets, n_packs, first = index.pack_offsets, len(index.packs), 0
+    while first < n_packs:
+        # Packages whose files fit in the batch (at least one package, however large).
+        last = int(np.searchsorted(pack_offsets, pack_offsets[first] + batch_files, side = "right")) - 1
+        last = min(max(last, first + 1), n_packs)
+        start, end = int(pack_offsets[first]), int(pack_offsets[last])
+        paths = index.row_paths[index.pack_rows[start : end]]
+        # Gather the bytes of those filenames only, and split them back.
+        starts, lengths = offsets[paths], offsets[paths + 1] - offsets[paths]
+        blob = data[ranges(starts, lengths)].tobytes()
+        bounds = np.concatenate(([0], np.cumsum(lengths))).tolist()
+        files = [blob[a : b].decode("utf-8") for a, b in zip(bounds[: -1], bounds[1 :])]
+        cuts = (pack_offsets[first : last + 1] - start).tolist()
+        for p, (a, b) in enumerate(zip(cuts[: -1], cuts[1 :]), start = first):
+            yield index.packs[p], files[a : b]
+        first = last
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def export_pack_files(index: ContentsIndex, path: str, fmt: str = "json", compression: str = None):
+    """
+    Write the "package -> filenames" relation into a file, one package at a time.\n
+    Inputs:
+    - `index` (`ContentsIndex`): The index to export.\n
+    - `path` (`str`): Destination file.\n
+    - `fmt` (`str`): Either "`json`" (a single compact object: "`{package: [filenames]}`") or
+        "`ndjson`" (one "`{"package": ..., "files": [...]}`" object per line).\n
+    - `compression` (`str`): "`gzip`", "`zstd`" (needs the "`zstandard`" package) or "`None`".
+        When not given, it is inferred from the extension of "`path`" (".gz", ".zst").\n
+    Outputs:
+    - `count` (`int`): Amount of packages written.
+    """
+    return write_pack_files(iter_pack_files(index), path, fmt = fmt, compression = compression)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def write_pack_files(pairs, path: str, fmt: str = "json", compression: str = None):
+    """
+    Write packages with their filenames into a file, as they come (see "`export_pack_files`"). Any source
+    of pairs works: the index, or the sorted runs of an out-of-core build (see "core/external.py").\n
+    Inputs:
+    - `pairs` (`Iterable[tuple[str, list[str]]]`): Package name and its filenames, in alphabetical order.\n
+    - `path` (`str`), `fmt` (`str`), `compression` (`str`): As in "`export_pack_files`".\n
+    Outputs:
+    - `count` (`int`): Amount of packages written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"\"{fmt}\" is not an export format. Please use one of these: {', '.join(FORMATS)}")
+    if compression is None:
+        compression = COMPRESSIONS.get(path.rpartition(".")[2])
+    dumps = json.JSONEncoder(ensure_ascii = False, separators = (",", ":")).encode
+    count = 0
+    with _open_text(path, compression) as file:
+        if (fmt == "json"): file.write("{")
+        for pack, files in pairs:
+            if (fmt == "json"):
+                file.write(("," if count else "") + dumps(pack) + ":" + dumps(files))
+            else: file.write(dumps({"package": pack, "files": files}) + "\n")
+            count += 1
+        if (fmt == "json"): file.write("}\n")
+    return count
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def _open_text(path: str, compression: str = None):
+    """[PRIVATE] Open a file for writing UTF-8 text, compressed or not."""
+    if compression is None:
+        return open(path, "w", encoding = "utf-8")
+    if (compression == "gzip"):
+        return gzip.open(path, "wt", encoding = "utf-8")
+    if (compression == "zstd"):
+        try: import zstandard
+        except ImportError: raise ImportError("\"zstd\" compression needs the \"zstandard\" package.")
+        return zstandard.open(path, "wt", encoding = "utf-8")
+    raise ValueError(f"\"{compression}\" is not a compression. Please use one of these: gzip, zstd")
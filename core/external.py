@@ -0,0 +1,140 @@
+import os, sys, heapq
+import numpy as np
+from itertools import groupby, islice
+from tempfile import TemporaryDirectory
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ranges, slices
+from core.parser import scan_batches
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████   Out-of-core index   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class ExternalSort:
+    """
+    "package -> filenames" relation of a contents-index file, built within a memory budget: rows are
+    scanned batch after batch (as in "`parse_chunks`"), and their "(package, line, filename)" entries are
+    kept in memory only until they reach the budget. Then they are sorted and spilled to a temporary file
+    (a "run"). Runs are merged ("k-way", at most "`fanin`" files at once) whenever the relation is read:
+     - "`groups`" (method, `Iterator`) for each package with its filenames, in alphabetical order.
+     - "`ranking`" (method) for the "top N" packages with the most files, in a single streaming pass.\n
+    Filenames of a package keep the order of their lines, so that both give the same results as the
+    in-memory index ("`iter_pack_files`" / "`ContentsIndex.ranking`"). Temporary files are removed by
+    "`close`" (or on exit of the context manager, or when the object is collected).\n
+    Inputs:
+    - `chunks` (`Iterable[bytes]`): Consecutive pieces of the decompressed file (e.g.: "`download_chunks`").\n
+    - `budget` (`int`): Bytes of entries held in memory before spilling a run.\n
+    - `folder` (`str`): Where to create the temporary files. Default: the system's temporary folder.\n
+    - `fanin` (`int`): Maximum amount of runs merged (hence open) at once.\n
+    - `batch_size` (`int`): Bytes of decompressed content scanned at once.
+    """
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, chunks, budget: int = EXTERNAL_MEMORY_BUDGET, folder: str = None,
+                       fanin: int = EXTERNAL_MERGE_FANIN, batch_size: int = PARSE_BATCH_BYTES):
+
+        if (fanin < 2): raise ValueError("At least 2 runs must be merged at once.")
+        self._temp = TemporaryDirectory(prefix = "contents-runs-", dir = folder)
+        self._fanin = fanin
+        self.runs, self._made = [], 0 # Paths of the sorted runs, and amount of them ever made.
+        self.lines = self.entries = 0
+        self._spill_all(chunks, budget, batch_size)
+        while len(self.runs) > fanin: # Merge the first ones, so that reading only opens "fanin" files.
+            path = self._new_run()
+            with open(path, "wb") as file:
+                file.writelines(b"%s\t%d\t%s\n" % entry for entry in self._merge(self.runs[: fanin]))
+            for old in self.runs[: fanin]: os.remove(old)
+            self.runs = self.runs[fanin :] + [path]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Remove the temporary files."""
+        self._temp.cleanup()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _spill_all(self, chunks, budget: int, batch_size: int):
+        """[PRIVATE] Scan the file, and spill its entries as sorted runs every time they reach the budget."""
+        fields, packs = {}, {}  # Distinct packages fields, and distinct packages, by order of appearance.
+        field_packs, field_counts = np.zeros(0, np.int32), np.zeros(0, np.int64) # Packages of each field.
+        pending, size = [], 0
+        for buffer, starts, lengths, ids in scan_batches(chunks, fields, batch_size):
+            if len(fields) > len(field_counts): # New fields: split them into packages.
+                names = [field.decode("utf-8").split(",") for field in islice(fields, len(field_counts), None)]
+                new = [packs.setdefault(pack, len(packs)) for field in names for pack in field]
+                field_packs = np.concatenate((field_packs, np.array(new, dtype = np.int32)))
+                field_counts = np.concatenate((field_counts, np.fromiter(map(len, names), np.int64, len(names))))
+            # One entry per package of each row.
+            field_offsets = np.zeros(len(field_counts) + 1, dtype = np.int64)
+            np.cumsum(field_counts, out = field_offsets[1 :])
+            counts = field_counts[ids]
+            batch = (slices(buffer, starts, lengths), lengths, self.lines,
+                     np.repeat(np.arange(len(ids), dtype = np.int32), counts),
+                     field_packs[ranges(field_offsets[ids], counts)])
+            self.lines += len(ids)
+            self.entries += len(batch[3])
+            pending.append(batch)
+            if (size := size + sum(part.nbytes for part in batch if isinstance(part, np.ndarray))) >= budget:
+                self._spill(pending, packs)
+                pending, size = [], 0
+        if pending: self._spill(pending, packs)
+
+    def _spill(self, pending: list, packs: dict):
+        """[PRIVATE] Sort entries by package (alphabetically), then line, and write them as a run."""
+        names = [pack.encode("utf-8") for pack in packs]
+        rank = np.empty(len(names), dtype = np.int32)
+        rank[sorted(range(len(names)), key = names.__getitem__)] = np.arange(len(names), dtype = np.int32)
+        data, lengths = np.concatenate([b[0] for b in pending]), np.concatenate([b[1] for b in pending])
+        offsets = np.zeros(len(lengths) + 1, dtype = np.int64)
+        np.cumsum(lengths, out = offsets[1 :])
+        # Rows of each batch follow the ones of the previous batches.
+        bases = np.cumsum([0] + [len(b[1]) for b in pending[: -1]])
+        rows = np.concatenate([b[3] + base for b, base in zip(pending, bases)])
+        entry_packs = np.concatenate([b[4] for b in pending])
+        order = np.lexsort((rows, rank[entry_packs]))
+        view, first = memoryview(data), pending[0][2]
+        with open(path := self._new_run(), "wb") as file:
+            # Written by blocks, so that Python objects are only made for a few entries at a time.
+            for start in range(0, len(order), EXTERNAL_WRITE_BATCH):
+                block = order[start : start + EXTERNAL_WRITE_BATCH]
+                block_rows, block_packs = rows[block], entry_packs[block]
+                starts, ends = offsets[block_rows].tolist(), offsets[block_rows + 1].tolist()
+                file.writelines(b"%s\t%d\t%s\n" % (names[p], first + r, view[a : b]) for p, r, a, b
+                                in zip(block_packs.tolist(), block_rows.tolist(), starts, ends))
+        self.runs.append(path)
+
+    def _new_run(self):
+        """[PRIVATE] Path of a new temporary file."""
+        self._made += 1
+        return os.path.join(self._temp.name, f"run-{self._made :06d}")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _merge(self, runs: list):
+        """[PRIVATE] Entries "(package, line, filename)" of the given runs, merged in order."""
+        def read(path: str):
+            with open(path, "rb", buffering = EXTERNAL_READ_BUFFER) as file:
+                for line in file:
+                    pack, row, path = line.split(b"\t", 2)
+                    yield pack, int(row), path[: -1]
+        return heapq.merge(*map(read, runs))
+
+    def groups(self):
+        """Each package with its filenames (in the order of their lines), in alphabetical order."""
+        for pack, entries in groupby(self._merge(self.runs), key = lambda entry: entry[0]):
+            yield pack.decode("utf-8"), [path.decode("utf-8") for _, _, path in entries]
+
+    def ranking(self, top: int):
+        """
+        Names and file counts of the "`top`" packages with the most files, with the same tie-break as
+        "`select_top`" (alphabetical). Only "`top`" packages are kept in memory while reading the runs.
+        """
+        counts = ((-sum(1 for _ in entries), pack) for pack, entries in groupby(self._merge(self.runs),
+                                                                                 key = lambda entry: entry[0]))
+        best = heapq.nsmallest(max(top, 0), counts)
+        return [pack.decode("utf-8") for _, pack in best], np.array([-count for count, _ in best], dtype = np.int64)
@@ -0,0 +1,137 @@
+import sys
+import numpy as np
+from array import array
+from hashlib import blake2b
+from itertools import islice
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, ranges, skip_header, split_line
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████   Incremental index   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+def hash_line(line: str):
+    """64-bit hash of a line, stable among processes (unlike Python's "`hash`")."""
+    return int.from_bytes(blake2b(line.encode("utf-8"), digest_size = 8).digest(), "little")
+
+def split_rows(lines):
+    """
+    Rows of a contents-index file along with their hash, split as the vectorized parser does (see
+    "`split_line`"). The hash is the one of the split row, so that lines which only differ by their
+    blanks are matched, and lines which make no row (header, blank ones) have no hash.\n
+    Inputs:
+    - `lines` (`Iterable[str]`): The lines of the contents-index file.\n
+    Outputs:
+    - `rows` (`Iterator[tuple[int, str, list[str]]]`): Hash, filename and its list of packages, for each row.
+    """
+    for line in skip_header(lines):
+        path, field = split_line(line)
+        if field is not None: yield hash_line(path + "\t" + field), path, field.split(",")
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def build_index(lines):
+    """
+    Cold build of a "`ContentsIndex`" which keeps the hash of each row, so that it can be
+    updated incrementally later on (see "`update_index`").\n
+    Inputs:
+    - `lines` (`Iterable[str]`): The lines of the contents-index file.\n
+    Outputs:
+    - `index` (`ContentsIndex`): The built index, with "`row_hashes`".
+    """
+    hashes = array("Q")
+    def track(rows): # Keep the hashes of the rows on their way to the index.
+        for row_hash, path, packs in rows:
+            hashes.append(row_hash)
+            yield path, packs
+    index = ContentsIndex.from_rows(track(split_rows(lines)))
+    index.row_hashes = np.frombuffer(hashes, dtype = np.uint64) if hashes else np.zeros(0, np.uint64)
+    return index
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def update_index(previous: ContentsIndex, lines, batch_size: int = UPDATE_BATCH_LINES):
+    """
+    Update a previous index with a new version of its contents-index file. Rows are matched by
+    hash (see "`split_rows`"): only the new (or modified) ones are interned, while the rows of the unchanged
+    ones are reused with vectorized gathers. The result is identical to a cold "`build_index`".\n
+    Inputs:
+    - `previous` (`ContentsIndex`): The previous index. Must have "`row_hashes`".\n
+    - `lines` (`Iterable[str]`): The lines of the new contents-index file.\n
+    - `batch_size` (`int`): Lines hashed and matched at once. Bounds the memory of unmatched lines.\n
+    Outputs:
+    - `index` (`ContentsIndex`): The updated index.\n
+    - `changes` (`DataFrame`): One row per package whose file count changed, with columns "`before`",
+        "`after`" and "`delta`". Amount of added and removed lines in "`changes.attrs`".
+    """
+    if previous.row_hashes is None:
+        raise ValueError("Previous index has no line hashes. Build it with \"build_index\".")
+    order = np.argsort(previous.row_hashes, kind = "stable")
+    known = previous.row_hashes[order]
+
+    # Match rows by hash, batch by batch. Keep the text of the unmatched ones only.
+    sources, hashes, added = [], [], []
+    rows = split_rows(lines)
+    while batch := list(islice(rows, batch_size)):
+        batch_hashes = np.fromiter((row[0] for row in batch), np.uint64, len(batch))
+        positions = np.searchsorted(known, batch_hashes).clip(max = max(len(known) - 1, 0))
+        found = (known[positions] == batch_hashes) if len(known) else np.zeros(len(batch), bool)
+        sources.append(np.where(found, order[positions] if len(known) else -1, -1))
+        hashes.append(batch_hashes)
+        added += [batch[i][1 :] for i in np.flatnonzero(~found)]
+    source = np.concatenate(sources) if sources else np.zeros(0, np.int64)
+    row_hashes = np.concatenate(hashes) if hashes else np.zeros(0, np.uint64)
+
+    # Intern the added rows only.
+    added_packs = [pack for path, packs in added for pack in packs]
+    paths, path_remap = previous.paths.insert([path for path, packs in added])
+    packs, pack_remap = previous.packs.insert(added_packs)
+
+    # Rows: the reused ones are gathered from the previous index, the added ones filled in.
+    is_old = (source >= 0)
+    old_rows = source[is_old]
+    old_counts = np.diff(previous.file_offsets)
+    row_paths = np.empty(len(source), dtype = np.int32)
+    row_paths[is_old] = path_remap[previous.row_paths[old_rows]]
+    row_paths[~is_old] = [paths.find(path) for path, packs in added]
+    counts = np.empty(len(source), dtype = np.int64)
+    counts[is_old] = old_counts[old_rows]
+    counts[~is_old] = [len(packs) for path, packs in added]
+    file_offsets = np.zeros(len(source) + 1, dtype = np.int64)
+    np.cumsum(counts, out = file_offsets[1 :])
+    file_packs = np.empty(file_offsets[-1], dtype = np.int32)
+    old_entries = ranges(previous.file_offsets[old_rows], counts[is_old])
+    file_packs[ranges(file_offsets[: -1][is_old], counts[is_old])] = pack_remap[previous.file_packs[old_entries]]
+    file_packs[ranges(file_offsets[: -1][~is_old], counts[~is_old])] = [packs.find(p) for p in added_packs]
+
+    # Strings that are not referenced anymore are dropped, as a cold build would not have them.
+    paths, row_paths = _compact(paths, row_paths)
+    packs, file_packs, pack_remap = _compact(packs, file_packs, pack_remap)
+    index = ContentsIndex(paths, packs, row_paths, file_offsets, file_packs, row_hashes)
+
+    # Report the packages whose file count changed.
+    from pandas import DataFrame
+    before = np.zeros(len(packs), dtype = np.int64)
+    kept = pack_remap >= 0 # Packages that still exist.
+    np.add.at(before, pack_remap[kept], previous.counts()[kept])
+    after = index.counts()
+    gone = previous.counts()[~kept] # Packages that disappeared: count goes to 0.
+    names = np.concatenate([packs.to_array(), previous.packs.to_array()[~kept]])
+    before, after = np.concatenate([before, gone]), np.concatenate([after, np.zeros_like(gone)])
+    changed = np.flatnonzero(before != after)
+    changes = DataFrame({"before": before[changed], "after": after[changed]}, index = names[changed])
+    changes["delta"] = changes["after"] - changes["before"]
+    changes = changes.rename_axis("packages").sort_index()
+    changes.attrs = {"lines_added": len(added), "lines_removed": len(previous) - int(is_old.sum())}
+    return index, changes
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def _compact(table, ids: np.ndarray, remap: np.ndarray = None):
+    """[PRIVATE] Drop unreferenced strings from a table, and renumber the IDs (and a remap) accordingly."""
+    used = np.bincount(ids, minlength = len(table)) > 0
+    renumber = np.cumsum(used) - 1
+    if used.all(): # Nothing to drop.
+        return (table, ids) if (remap is None) else (table, ids, remap)
+    table, ids = table.take(np.flatnonzero(used)), renumber[ids].astype(np.int32)
+    if remap is None: return table, ids
+    return table, ids, np.where(used[remap], renumber[remap], -1)
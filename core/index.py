@@ -0,0 +1,768 @@
+import os, sys, re, json, mmap, struct, zlib
+import numpy as np
+from array import array
+from tempfile import mkstemp
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████████████████   String table   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class StringTable:
+    """
+    Sorted and deduplicated strings, interned as integer IDs. All of them are held in a single UTF-8
+    buffer plus an array of offsets, instead of one Python object each. As UTF-8 preserves code point
+    order, IDs follow the same order as the strings themselves, so lookups are binary searches.
+    Inputs:
+     - "`data`" (`ndarray[uint8]`): Concatenated UTF-8 encoded strings.
+     - "`offsets`" (`ndarray[int64]`): Start of each string in "`data`", plus the end of the last one.\n
+    Methods:
+     - "`build`" (class method) to intern a list of strings and get their IDs.
+     - "`from_buffer`" (class method) to do the same with strings still encoded in a single buffer.
+     - "`find`" (method, `int`) to get the ID of a string, or -1 if not present.
+     - "`to_array`" (method, `ndarray[object]`) to decode all strings at once.
+    """
+    # Masks keeping only the first "n" bytes (0 to 8) of a big-endian 64-bit word.
+    WORD_MASKS = np.array([(~((1 << (64 - 8 * n)) - 1)) & (2 ** 64 - 1) for n in range(9)], dtype = np.uint64)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+
+        self._data = data
+        self._offsets = offsets
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def build(cls, strings: list):
+        """
+        Intern the given strings.\n
+        Inputs:
+        - `strings` (`list[str]`): Strings to intern, with repetitions or not, in any order.\n
+        Outputs:
+        - `table` (`StringTable`): Table with the distinct strings, sorted.\n
+        - `ids` (`ndarray[int32]`): ID of each one of the given strings in the table.\n
+        """
+        distinct, ids = cls._intern(np.array(strings, dtype = object))
+        return cls.from_strings(distinct), ids
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def from_buffer(cls, data: np.ndarray, offsets: np.ndarray, arrow: bool = None):
+        """
+        Intern strings that are still UTF-8 encoded, given as one buffer plus offsets (e.g.: cut straight
+        out of a downloaded file). Same result as "`build`", but strings are never decoded, and mostly not
+        even turned into Python objects: already sorted input (as filenames of a contents-index file) is
+        detected with vectorized comparisons, and short strings are deduplicated as fixed-width arrays.
+        Long ones are sorted with "`pyarrow`" compute kernels when installed. Strings must not hold NULs.\n
+        Inputs:
+        - `data` (`ndarray[uint8]`): Concatenated encoded strings, with repetitions or not, in any order.\n
+        - `offsets` (`ndarray[int64]`): Start of each string in "`data`", plus the end of the last one.\n
+        - `arrow` (`bool`): Whether to use "`pyarrow`". By default, only if it can be imported.\n
+        Outputs:
+        - `table` (`StringTable`): Table with the distinct strings, sorted.\n
+        - `ids` (`ndarray[int32]`): ID of each one of the given strings in the table.\n
+        """
+        data = np.ascontiguousarray(data, dtype = np.uint8)
+        offsets = np.ascontiguousarray(offsets, dtype = np.int64)
+        strings, lengths = cls(data, offsets), np.diff(offsets)
+        first = cls._sorted_firsts(data, offsets)
+        if first is not None: # Already sorted: only repetitions (if any) to drop.
+            ids = (np.cumsum(first) - 1).astype(np.int32)
+            return (strings if first.all() else strings.take(np.flatnonzero(first))), ids
+        width = max(1, int(lengths.max(initial = 0)))
+        if (len(lengths) * width <= 4 * len(data) + (1 << 20)): # Short strings: fixed-width sort.
+            matrix = np.zeros((len(lengths), width), dtype = np.uint8)
+            matrix[np.arange(width) < lengths[:, None]] = data[offsets[0] : offsets[-1]]
+            # Repetitions often come in a row (e.g.: packages of the files of a folder): sort only the
+            # first string of each run.
+            runs = np.ones(len(lengths), dtype = bool)
+            runs[1 :] = (matrix[1 :] != matrix[: -1]).any(axis = 1)
+            heads = np.flatnonzero(runs)
+            _, positions, ids = np.unique(matrix[heads].view(f"S{width}").ravel(), return_index = True,
+                                          return_inverse = True)
+            return strings.take(heads[positions]), ids[np.cumsum(runs) - 1].astype(np.int32)
+        if arrow is not False:
+            try: import pyarrow, pyarrow.compute
+            except ImportError:
+                if arrow: raise ImportError("\"arrow\" interning needs the \"pyarrow\" package.")
+            else: return cls._from_arrow(data, offsets, pyarrow)
+        # Raw byte strings compare like their decoded versions: UTF-8 preserves code point order.
+        blob, bounds = data.tobytes(), offsets.tolist()
+        keys = np.array([blob[a : b] for a, b in zip(bounds[: -1], bounds[1 :])], dtype = object)
+        distinct, ids = cls._intern(keys)
+        offsets = np.zeros(len(distinct) + 1, dtype = np.int64)
+        np.cumsum(np.fromiter(map(len, distinct), np.int64, len(distinct)), out = offsets[1 :])
+        return cls(np.frombuffer(b"".join(distinct), dtype = np.uint8), offsets), ids
+
+    @classmethod
+    def _from_arrow(cls, data: np.ndarray, offsets: np.ndarray, pyarrow):
+        """[PRIVATE] "`from_buffer`" over a zero-copy "`pyarrow`" array of the strings."""
+        strings = pyarrow.LargeBinaryArray.from_buffers(pyarrow.large_binary(), len(offsets) - 1,
+            [None, pyarrow.py_buffer(offsets), pyarrow.py_buffer(data)])
+        # Distinct strings by order of appearance, then sorted (bytewise, i.e.: by code point).
+        encoded = pyarrow.compute.dictionary_encode(strings)
+        order = pyarrow.compute.sort_indices(encoded.dictionary).to_numpy()
+        rank = np.empty(len(order), dtype = np.int32)
+        rank[order] = np.arange(len(order), dtype = np.int32)
+        ids = rank[encoded.indices.to_numpy(zero_copy_only = False)]
+        distinct = encoded.dictionary.take(pyarrow.array(order))
+        _, bounds, values = distinct.buffers()
+        bounds = np.frombuffer(bounds, dtype = np.int64)[distinct.offset : distinct.offset + len(distinct) + 1]
+        values = np.frombuffer(values, dtype = np.uint8) if (values is not None) else np.zeros(0, np.uint8)
+        return cls(values[bounds[0] : bounds[-1]].copy(), bounds - bounds[0]), ids
+
+    @classmethod
+    def _sorted_firsts(cls, data: np.ndarray, offsets: np.ndarray):
+        """
+        [PRIVATE] Check whether encoded strings are already sorted, comparing each one with the next,
+        8 bytes at a time (as big-endian integers) and only for the pairs not decided yet.\n
+        Outputs:
+        - `first` (`ndarray[bool]`): Whether each string differs from its predecessor. "`None`" if unsorted.
+        """
+        starts, lengths = offsets[: -1], np.diff(offsets)
+        first = np.ones(len(lengths), dtype = bool)
+        if (len(lengths) < 2): return first
+        windows = np.lib.stride_tricks.sliding_window_view(np.concatenate((data, np.zeros(8, np.uint8))), 8)
+        def words(ids: np.ndarray, j: int): # "j"-th word of the given strings, zero-padded past their end.
+            words = np.ascontiguousarray(windows[np.minimum(starts[ids] + 8 * j, len(data))])
+            return words.view(">u8").ravel().astype(np.uint64) & cls.WORD_MASKS[np.clip(lengths[ids] - 8 * j, 0, 8)]
+        pairs, j = np.arange(len(lengths) - 1), 0 # Pair "i" is string "i" vs "i + 1".
+        while len(pairs):
+            left, right = words(pairs, j), words(pairs + 1, j)
+            if (left > right).any(): return None
+            j, tie = j + 1, left == right
+            # Tied so far: equal strings if both are over. Else compare their next words.
+            over = tie & (lengths[pairs] <= 8 * j) & (lengths[pairs + 1] <= 8 * j)
+            first[pairs[over] + 1] = False
+            pairs = pairs[tie & ~over]
+        return first
+
+    @staticmethod
+    def _intern(strings: np.ndarray):
+        """[PRIVATE] Distinct values of an object array, sorted, and the position of each value among them."""
+        # Stable sort is a "timsort" for objects: linear when input is already sorted,
+        # which is usually the case for the filenames of a contents-index file.
+        order = np.argsort(strings, kind = "stable")
+        ordered = strings[order]
+        # Distinct strings are the ones different to their predecessor.
+        first = np.ones(len(ordered), dtype = bool)
+        first[1 :] = (ordered[1 :] != ordered[: -1])
+        ids = np.empty(len(strings), dtype = np.int32)
+        ids[order] = np.cumsum(first) - 1
+        return ordered[first], ids
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def from_strings(cls, strings):
+        """Pack already sorted and distinct strings into a table."""
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype = np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), np.int64, len(encoded)), out = offsets[1 :])
+        data = np.frombuffer(b"".join(encoded), dtype = np.uint8)
+        return cls(data, offsets)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def union(cls, tables: list):
+        """
+        Merge several tables into one, so that strings shared among them are held only once.\n
+        Inputs:
+        - `tables` (`list[StringTable]`): Tables to merge.\n
+        Outputs:
+        - `table` (`StringTable`): Table with the distinct strings of all of them, sorted.\n
+        - `remaps` (`list[ndarray[int32]]`): For each given table, new ID of each of its old IDs.\n
+        """
+        strings = np.concatenate([table.to_array() for table in tables] or [np.zeros(0, dtype = object)])
+        table, ids = cls.build(strings)
+        bounds = np.cumsum([len(table) for table in tables]).tolist()
+        return table, np.split(ids, bounds[: -1])
+
+    @classmethod
+    def concat(cls, tables: list, arrow: bool = None):
+        """
+        Same as "`union`", for the tables of consecutive pieces of the same input (e.g.: batches of a
+        contents-index file), and without decoding any string. When every table starts at (or after) the
+        end of the previous one, as for sorted input, only the strings at their boundaries are compared.
+        Otherwise, all of them are interned again (see "`from_buffer`").\n
+        Inputs:
+        - `tables` (`list[StringTable]`): Tables to merge, in order.\n
+        - `arrow` (`bool`): Whether to use "`pyarrow`" for unsorted input (see "`from_buffer`").\n
+        Outputs:
+        - `table` (`StringTable`): Table with the distinct strings of all of them, sorted.\n
+        - `remaps` (`list[ndarray[int32]]`): For each given table, new ID of each of its old IDs.\n
+        """
+        if not tables: return cls(np.zeros(0, np.uint8), np.zeros(1, np.int64)), []
+        datas, lengths = [], []
+        for table in tables:
+            datas.append(table._data[table._offsets[0] : table._offsets[-1]])
+            lengths.append(np.diff(table._offsets))
+        offsets = np.zeros(sum(map(len, lengths)) + 1, dtype = np.int64)
+        np.cumsum(np.concatenate(lengths or [np.zeros(0, np.int64)]), out = offsets[1 :])
+        data = np.concatenate(datas or [np.zeros(0, np.uint8)])
+        bounds = np.cumsum([len(table) for table in tables]).tolist()
+        # Compare the last string of each non-empty table with the first one of the next.
+        strings, first = cls(data, offsets), np.ones(len(offsets) - 1, dtype = bool)
+        heads = [bound - len(table) for table, bound in zip(tables, bounds) if len(table)]
+        for head in heads[1 :]:
+            last, string = strings._raw(head - 1), strings._raw(head)
+            if (string < last): # Not in order: intern everything again.
+                table, ids = cls.from_buffer(data, offsets, arrow = arrow)
+                return table, np.split(ids, bounds[: -1])
+            first[head] = (string != last)
+        ids = (np.cumsum(first) - 1).astype(np.int32)
+        table = strings if first.all() else strings.take(np.flatnonzero(first))
+        return table, np.split(ids, bounds[: -1])
+
+    def _raw(self, i: int):
+        """[PRIVATE] Encoded bytes of a string."""
+        return self._data[self._offsets[i] : self._offsets[i + 1]].tobytes()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def take(self, ids: np.ndarray):
+        """Table with only the given strings (IDs must be sorted, to keep it sorted). Fully vectorized."""
+        starts, ends = self._offsets[ids], self._offsets[ids + 1]
+        offsets = np.zeros(len(ids) + 1, dtype = np.int64)
+        np.cumsum(ends - starts, out = offsets[1 :])
+        return StringTable(self._data[ranges(starts, ends - starts)], offsets)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def insert(self, strings: list):
+        """
+        Add a few strings to the table. Meant for small additions: each new string is placed with
+        a binary search, and the table's buffer is rebuilt from slices of the old one.\n
+        Inputs:
+        - `strings` (`list[str]`): Strings to add. Already present ones are ignored.\n
+        Outputs:
+        - `table` (`StringTable`): The new table.\n
+        - `remap` (`ndarray[int64]`): New ID of each old ID.\n
+        """
+        new = sorted(set(string for string in strings if self.find(string) < 0))
+        positions = np.array([bisect_left(self, string) for string in new], dtype = np.int64)
+        # Every old string is shifted by the amount of new strings placed before it.
+        remap = np.arange(len(self), dtype = np.int64)
+        remap += np.searchsorted(positions, remap, side = "right")
+        # Interleave slices of the old buffer with the new strings.
+        encoded = [string.encode("utf-8") for string in new]
+        cuts = self._offsets[positions].tolist()
+        bounds = [0] + cuts + [len(self._data)]
+        pieces = [self._data[bounds[0] : bounds[1]]]
+        for i, string in enumerate(encoded):
+            pieces += [np.frombuffer(string, dtype = np.uint8), self._data[bounds[i + 1] : bounds[i + 2]]]
+        lengths = np.diff(self._offsets)
+        lengths = np.insert(lengths, positions, [len(string) for string in encoded])
+        offsets = np.zeros(len(lengths) + 1, dtype = np.int64)
+        np.cumsum(lengths, out = offsets[1 :])
+        return StringTable(np.concatenate(pieces), offsets), remap
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int):
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._data[start : end].tobytes().decode("utf-8")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def find(self, string: str):
+        """ID of the given string, or -1 when not in the table."""
+        i = bisect_left(self, string)
+        return i if (i < len(self)) and (self[i] == string) else -1
+
+    def prefix_range(self, prefix: str):
+        """Range of IDs ("`start`", "`end`") of the strings starting with the given prefix."""
+        # Strings sharing a prefix are contiguous. Compare raw bytes, cut to the prefix length.
+        prefix = prefix.encode("utf-8")
+        def head(i: int):
+            start = self._offsets[i]
+            return self._data[start : min(start + len(prefix), self._offsets[i + 1])].tobytes()
+        return bisect_left(range(len(self)), prefix, key = head), bisect_right(range(len(self)), prefix, key = head)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def to_array(self):
+        """Decode all strings into an array of Python objects (e.g.: for Pandas)."""
+        data, bounds = self._data.tobytes(), self._offsets.tolist()
+        strings = [data[a : b].decode("utf-8") for a, b in zip(bounds[: -1], bounds[1 :])]
+        return np.array(strings, dtype = object)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @property
+    def nbytes(self):
+        """Memory held by the table, in bytes."""
+        return self._data.nbytes + self._offsets.nbytes
+    @property
+    def arrays(self):
+        """The buffer and offsets behind the table, e.g.: to persist it."""
+        return self._data, self._offsets
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Compact index   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class ContentsIndex:
+    """
+    Compact representation of a contents-index file. Filenames and packages are interned into
+    "`StringTable`"s, and both relations are held in CSR layout (offsets + flat array of IDs):
+     - "filename -> packages": row "`r`" (line of the file) has filename ID "`row_paths[r]`", and
+        package IDs "`file_packs[file_offsets[r] : file_offsets[r + 1]]`".
+     - "package -> filenames": package "`p`" has rows "`pack_rows[pack_offsets[p] : pack_offsets[p + 1]]`".
+        It is built lazily, on first use, with a single stable "`argsort`".
+     - Indexes merged from several contents-index files (see "`merge`") keep the input of each row in
+        "`row_sources`", and a label for each input in "`meta["sources"]`".\n
+    Methods:
+     - "`from_rows`" / "`from_series`" (class methods) to build the index.
+     - "`merge`" (class method) to combine several indexes into one, with shared string tables.
+     - "`save`" / "`load`" (methods) to persist the index in a binary file, reopened with "`mmap`".
+     - "`counts`" (method, `ndarray`) to get the file count of each package (without inverting).
+     - "`files_of`" / "`packs_of`" (methods, `list[str]`) for single lookups.
+     - "`file_packs_series`" / "`pack_files_series`" (methods, `Series`) to materialise Pandas tables.
+    """
+    class FormatError(Exception): pass
+
+    FILE_MAGIC = b"DEBCONTX"
+    FILE_VERSION = 1
+    FILE_ALIGN = 64
+    FILE_HEADER = struct.Struct("<8sIIIIQ")  # Magic, version, sections, CRC32, flags, metadata length.
+    FILE_SECTION = struct.Struct("<24s8sQQ") # Name, dtype, offset, length.
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, paths: StringTable, packs: StringTable, row_paths: np.ndarray,
+                       file_offsets: np.ndarray, file_packs: np.ndarray, row_hashes: np.ndarray = None,
+                       row_sources: np.ndarray = None):
+
+        self.paths, self.packs = paths, packs
+        self.row_paths = row_paths
+        self.file_offsets, self.file_packs = file_offsets, file_packs
+        self.row_hashes = row_hashes # Hash of each source line, for incremental updates.
+        self.row_sources = row_sources # Input file of each row, for merged indexes.
+        self.meta = {} # Free metadata, persisted along with the index.
+        self._pack_offsets = self._pack_rows = None # Built on demand.
+        self._path_offsets = self._path_rows = None
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build the index from parsed rows (see "`DebianContentIndex.parse_lines`").\n
+        Inputs:
+        - `rows` (`Iterable[tuple[str, list[str]]]`): Filename and list of packages, per line.\n
+        Outputs:
+        - `index` (`ContentsIndex`): The built index.
+        """
+        paths, packs_seen = [], {}
+        row_counts, file_packs = array("q"), array("i")
+        add_path, add_count, add_pack = paths.append, row_counts.append, file_packs.append
+        for path, packs in rows:
+            add_path(path)
+            add_count(len(packs))
+            # Packages are few: intern them right away, by order of appearance.
+            for pack in packs:
+                add_pack(packs_seen.setdefault(pack, len(packs_seen)))
+        # Paths are interned all at once, and sorted.
+        paths, row_paths = StringTable.build(paths)
+        # Re-number packages so that their IDs follow alphabetical order.
+        names = np.array(list(packs_seen.keys()), dtype = object)
+        order = np.argsort(names, kind = "stable")
+        remap = np.empty(len(names), dtype = np.int32)
+        remap[order] = np.arange(len(names), dtype = np.int32)
+        file_packs = remap[np.frombuffer(file_packs, dtype = np.int32)] if len(names) else \
+                     np.zeros(0, dtype = np.int32)
+        file_offsets = np.zeros(len(row_counts) + 1, dtype = np.int64)
+        np.cumsum(np.frombuffer(row_counts, dtype = np.int64), out = file_offsets[1 :])
+        return cls(paths, StringTable.from_strings(names[order]), row_paths, file_offsets, file_packs)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def from_series(cls, file_packs):
+        """Build the index from a "filename -> packages" Pandas table."""
+        return cls.from_rows(zip(file_packs.index, file_packs.values))
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def merge(cls, indexes: list, labels: list = None):
+        """
+        Combine the indexes of several contents-index files (other suites, components...) into a single
+        one. Rows are concatenated, input after input, and each one keeps its input in "`row_sources`".
+        Filenames and packages are interned once for all inputs, as most of them repeat among suites.\n
+        Inputs:
+        - `indexes` (`list[ContentsIndex]`): Indexes to merge, in order.\n
+        - `labels` (`list[str]`): Name of each input (e.g.: "stable/main/amd64"), kept in "`meta`".\n
+        Outputs:
+        - `index` (`ContentsIndex`): The merged index.
+        """
+        paths, path_remaps = StringTable.union([index.paths for index in indexes])
+        packs, pack_remaps = StringTable.union([index.packs for index in indexes])
+        concat = lambda arrays, dtype: np.concatenate(arrays).astype(dtype) if arrays else np.zeros(0, dtype)
+        row_paths = concat([remap[index.row_paths] for remap, index in zip(path_remaps, indexes)], np.int32)
+        file_packs = concat([remap[index.file_packs] for remap, index in zip(pack_remaps, indexes)], np.int32)
+        file_offsets = np.zeros(sum(map(len, indexes)) + 1, dtype = np.int64)
+        np.cumsum(concat([np.diff(index.file_offsets) for index in indexes], np.int64), out = file_offsets[1 :])
+        row_sources = np.repeat(np.arange(len(indexes), dtype = np.int32), [len(index) for index in indexes])
+        # Line hashes only make sense if every input has them.
+        hashes = [index.row_hashes for index in indexes]
+        row_hashes = concat(hashes, np.uint64) if all(h is not None for h in hashes) and hashes else None
+        merged = cls(paths, packs, row_paths, file_offsets, file_packs, row_hashes, row_sources)
+        merged.meta = {"sources": list(labels) if labels else [str(i) for i in range(len(indexes))]}
+        return merged
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __len__(self):
+        return len(self.row_paths)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def save(self, path: str, meta: dict = None):
+        """
+        Persist the index into a binary file, which "`load`" maps back into memory without parsing it.
+        Both inverted sides are built and stored too, so that the reopened index needs no sort at all.
+        The file is written aside and then renamed, so that readers never see it half-written.\n
+        Layout (little-endian), every section aligned to "`FILE_ALIGN`" bytes:
+        - Header: magic, format version, amount of sections, CRC32 of everything after the header,
+            and length of the metadata.
+        - Section table: name, dtype, offset and length of each array.
+        - Metadata: JSON object, e.g.: the architecture.
+        - Sections: the raw arrays.\n
+        Inputs:
+        - `path` (`str`): Destination file.\n
+        - `meta` (`dict`): JSON-serializable metadata to store along, on top of "`self.meta`".
+        """
+        self._invert(), self._invert_paths()
+        (paths_data, paths_offsets), (packs_data, packs_offsets) = self.paths.arrays, self.packs.arrays
+        arrays = dict(paths_data = paths_data, paths_offsets = paths_offsets,
+                      packs_data = packs_data, packs_offsets = packs_offsets, row_paths = self.row_paths,
+                      file_offsets = self.file_offsets, file_packs = self.file_packs,
+                      pack_offsets = self._pack_offsets, pack_rows = self._pack_rows,
+                      path_offsets = self._path_offsets, path_rows = self._path_rows)
+        if self.row_hashes is not None: arrays["row_hashes"] = self.row_hashes
+        if self.row_sources is not None: arrays["row_sources"] = self.row_sources
+        arrays = {name: np.ascontiguousarray(a, dtype = np.dtype(a.dtype).newbyteorder("<"))
+                  for name, a in arrays.items()}
+        meta = json.dumps({**self.meta, **(meta or {})}).encode("utf-8")
+
+        # Place every section after the header, section table and metadata.
+        align = lambda n: -(-n // self.FILE_ALIGN) * self.FILE_ALIGN
+        position = self.FILE_HEADER.size + self.FILE_SECTION.size * len(arrays) + len(meta)
+        table, offsets = [], []
+        for name, a in arrays.items():
+            offsets.append(position := align(position))
+            table.append(self.FILE_SECTION.pack(name.encode(), a.dtype.str.encode(), position, len(a)))
+            position += a.nbytes
+
+        folder = os.path.dirname(os.path.abspath(path))
+        handle, path_temp = mkstemp(dir = folder, suffix = ".part")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.seek(self.FILE_HEADER.size) # Header goes last, once the checksum is known.
+                checksum = 0
+                for piece in [b"".join(table) + meta] + list(arrays.values()):
+                    if not isinstance(piece, bytes): # Pad up to the section offset.
+                        padding = bytes(offsets.pop(0) - file.tell())
+                        file.write(padding)
+                        checksum = zlib.crc32(padding, checksum)
+                        piece = memoryview(piece).cast("B")
+                    file.write(piece)
+                    checksum = zlib.crc32(piece, checksum)
+                file.seek(0)
+                file.write(self.FILE_HEADER.pack(self.FILE_MAGIC, self.FILE_VERSION,
+                                                 len(arrays), checksum, 0, len(meta)))
+            os.replace(path_temp, path)
+        except BaseException:
+            os.remove(path_temp)
+            raise
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def load(cls, path: str, verify: bool = False):
+        """
+        Open an index persisted by "`save`". The file is memory-mapped and every array is a
+        read-only view of it: nothing is copied nor parsed, and pages are only read from disk
+        when a lookup touches them. A "`FormatError`" is triggered for foreign or corrupt files.\n
+        Inputs:
+        - `path` (`str`): File written by "`save`".\n
+        - `verify` (`bool`): Check the CRC32 of the whole file. Reads all of it, so it is not instant.\n
+        Outputs:
+        - `index` (`ContentsIndex`): The index, with the stored metadata in "`meta`".
+        """
+        with open(path, "rb") as file:
+            try: buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+            except ValueError: raise cls.FormatError(f"\"{path}\" is empty.")
+        if len(buffer) < cls.FILE_HEADER.size:
+            raise cls.FormatError(f"\"{path}\" is too short to be an index.")
+        magic, version, n_sections, checksum, flags, n_meta = cls.FILE_HEADER.unpack_from(buffer)
+        if (magic != cls.FILE_MAGIC):
+            raise cls.FormatError(f"\"{path}\" is not an index file.")
+        if (version != cls.FILE_VERSION):
+            raise cls.FormatError(f"\"{path}\" has format version {version}, expected {cls.FILE_VERSION}.")
+        if verify and (zlib.crc32(memoryview(buffer)[cls.FILE_HEADER.size :]) != checksum):
+            raise cls.FormatError(f"\"{path}\" is corrupt: checksum mismatch.")
+
+        arrays, position = {}, cls.FILE_HEADER.size
+        for i in range(n_sections):
+            name, dtype, offset, length = cls.FILE_SECTION.unpack_from(buffer, position)
+            position += cls.FILE_SECTION.size
+            dtype = np.dtype(dtype.rstrip(b"\0").decode())
+            if (offset + length * dtype.itemsize > len(buffer)):
+                raise cls.FormatError(f"\"{path}\" is truncated.")
+            name = name.rstrip(b"\0").decode()
+            arrays[name] = np.frombuffer(buffer, dtype = dtype, count = length, offset = offset)
+        meta = json.loads(bytes(buffer[position : position + n_meta]) or b"{}")
+
+        paths = StringTable(arrays["paths_data"], arrays["paths_offsets"])
+        packs = StringTable(arrays["packs_data"], arrays["packs_offsets"])
+        index = cls(paths, packs, arrays["row_paths"], arrays["file_offsets"],
+                    arrays["file_packs"], arrays.get("row_hashes"), arrays.get("row_sources"))
+        index._pack_offsets, index._pack_rows = arrays["pack_offsets"], arrays["pack_rows"]
+        index._path_offsets, index._path_rows = arrays["path_offsets"], arrays["path_rows"]
+        index.meta = meta
+        return index
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _invert(self):
+        """[PRIVATE] Build the "package -> rows" side with a single stable sort of package IDs."""
+        if self._pack_offsets is not None: return
+        order = np.argsort(self.file_packs, kind = "stable")
+        # Row of each (row, package) entry, in the same order as "file_packs".
+        entry_rows = np.repeat(np.arange(len(self), dtype = np.int32), np.diff(self.file_offsets))
+        pack_offsets = np.zeros(len(self.packs) + 1, dtype = np.int64)
+        np.cumsum(self.counts(), out = pack_offsets[1 :])
+        self._pack_rows, self._pack_offsets = entry_rows[order], pack_offsets
+
+    @property
+    def pack_offsets(self):
+        """Offsets of the "package -> rows" side (see class description)."""
+        self._invert()
+        return self._pack_offsets
+    @property
+    def pack_rows(self):
+        """Rows of the "package -> rows" side (see class description)."""
+        self._invert()
+        return self._pack_rows
+
+    def _invert_paths(self):
+        """[PRIVATE] Build the "filename -> rows" side (filenames may repeat among rows)."""
+        if self._path_offsets is not None: return
+        path_offsets = np.zeros(len(self.paths) + 1, dtype = np.int64)
+        np.cumsum(np.bincount(self.row_paths, minlength = len(self.paths)), out = path_offsets[1 :])
+        self._path_rows = np.argsort(self.row_paths, kind = "stable").astype(np.int32)
+        self._path_offsets = path_offsets
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def counts(self, source: int = None):
+        """File count of each package, by package ID. Of a single input of a merged index if "`source`" is given."""
+        if source is None:
+            return np.bincount(self.file_packs, minlength = len(self.packs))
+        # Rows of each input are contiguous: so are their packages.
+        rows = np.flatnonzero(self.row_sources == source)
+        if not len(rows): return np.zeros(len(self.packs), dtype = np.int64)
+        entries = self.file_packs[self.file_offsets[rows[0]] : self.file_offsets[rows[-1] + 1]]
+        return np.bincount(entries, minlength = len(self.packs))
+
+    def ranking(self, top: int, source: int = None):
+        """Names and file counts of the "`top`" packages with the most files (see "`select_top`")."""
+        counts = self.counts(source)
+        if source is not None: # Packages of other sources only have a count of 0.
+            top = min(top, np.count_nonzero(counts))
+        ids = select_top(counts, top)
+        return [self.packs[p] for p in ids], counts[ids]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def files_of(self, pack: str):
+        """Filenames included in the given package (empty if unknown)."""
+        p = self.packs.find(pack)
+        if (p < 0): return []
+        rows = self.pack_rows[self.pack_offsets[p] : self.pack_offsets[p + 1]]
+        return [self.paths[i] for i in self.row_paths[rows]]
+
+    def packs_of(self, path: str):
+        """Packages which include the given filename (empty if unknown)."""
+        i = self.paths.find(path)
+        if (i < 0): return []
+        self._invert_paths()
+        rows = self._path_rows[self._path_offsets[i] : self._path_offsets[i + 1]]
+        return [self.packs[p] for p in self.file_packs[self._entries(rows)]]
+
+    def _entries(self, rows: np.ndarray):
+        """[PRIVATE] Positions in "`file_packs`" of the given rows' packages."""
+        starts = self.file_offsets[rows]
+        return ranges(starts, self.file_offsets[rows + 1] - starts)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def file_packs_series(self):
+        """Materialise the "filename -> packages" table as a Pandas' Series."""
+        from pandas import Series, Index
+        files = self.paths.to_array()[self.row_paths]
+        packs = self.packs.to_array()[self.file_packs]
+        packs = [packs[a : b].tolist() for a, b in self._bounds(self.file_offsets)]
+        files = Index(files, name = "filename", dtype = object)
+        return Series(data = packs, index = files, name = "packages", dtype = object)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def pack_files_series(self):
+        """Materialise the "package -> filenames" table as a Pandas' Series."""
+        from pandas import Series, Index
+        files = self.paths.to_array()[self.row_paths[self.pack_rows]]
+        files = [files[a : b].tolist() for a, b in self._bounds(self.pack_offsets)]
+        # Package IDs follow alphabetical order, like the groups of a "groupby".
+        packs = Index(self.packs.to_array(), name = "packages", dtype = object)
+        return Series(data = files, index = packs, name = "filename", dtype = object)
+
+    @staticmethod
+    def _bounds(offsets: np.ndarray):
+        """[PRIVATE] Pairs of (start, end) from CSR offsets."""
+        offsets = offsets.tolist()
+        return zip(offsets[: -1], offsets[1 :])
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @property
+    def nbytes(self):
+        """Memory held by the index, in bytes (inverted side included, if built)."""
+        arrays = [self.row_paths, self.file_offsets, self.file_packs, self.row_sources, self._pack_offsets,
+                  self._pack_rows, self._path_offsets, self._path_rows]
+        return self.paths.nbytes + self.packs.nbytes + sum(a.nbytes for a in arrays if a is not None)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#██████████████████████████████████████████████████████████████████████████████████████████████████   Package counts   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class PackageCounts:
+    """
+    File count per package, and nothing else. Enough for a ranking, and much cheaper than a
+    "`ContentsIndex`": filenames are never kept, and lines are not even fully split.
+    Inputs:
+     - "`packs`" (`StringTable`): Package names.
+     - "`counts`" (`ndarray[int64]`): File count of each package, by package ID.\n
+    Methods:
+     - "`from_lines`" (class method) to count straight from the lines of a contents-index file.
+     - "`ranking`" (method, `tuple`) to get the packages with the most files.
+    """
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, packs: StringTable, counts: np.ndarray):
+
+        self.packs = packs
+        self._counts = counts
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def from_lines(cls, lines):
+        """
+        Count files per package from the lines of a contents-index file.\n
+        Inputs:
+        - `lines` (`Iterable[str]`): The lines of the file, without line breaks.\n
+        Outputs:
+        - `counts` (`PackageCounts`): The counts.
+        """
+        # Lines of the same package(s) are counted together first, and only then split by comma.
+        fields = Counter(split_line(line)[1] for line in skip_header(lines))
+        fields.pop(None, None) # Blank lines.
+        totals = Counter()
+        for field, count in fields.items():
+            for pack in field.split(","): totals[pack] += count
+        names = sorted(totals.keys())
+        counts = np.fromiter((totals[name] for name in names), np.int64, len(names))
+        return cls(StringTable.from_strings(names), counts)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def counts(self):
+        """File count of each package, by package ID."""
+        return self._counts
+
+    def ranking(self, top: int):
+        """Names and file counts of the "`top`" packages with the most files (see "`select_top`")."""
+        ids = select_top(self._counts, top)
+        return [self.packs[p] for p in ids], self._counts[ids]
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def select_top(counts: np.ndarray, top: int):
+    """
+    IDs of the "`top`" largest counts, largest first, without sorting all of them. Ties are broken
+    by ID (i.e.: alphabetically), so that the ranking does not depend on the selection algorithm.\n
+    Inputs:
+    - `counts` (`ndarray`): Count of each ID.\n
+    - `top` (`int`): Amount of IDs to select.\n
+    Outputs:
+    - `ids` (`ndarray[int64]`): Selected IDs, in descending order of count.
+    """
+    top = max(0, min(top, len(counts)))
+    if (top == 0): return np.zeros(0, dtype = np.int64)
+    # Partial selection: everything at least as large as the "top"-th largest count. Ties
+    # around the threshold are all kept, so that the alphabetical tie-break is exact.
+    threshold = np.partition(counts, len(counts) - top)[len(counts) - top]
+    ids = np.flatnonzero(counts >= threshold)
+    # Only the selected ones get sorted: by count descending, then by ID.
+    ids = ids[np.lexsort((ids, -counts[ids]))]
+    return ids[: top]
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def ranges(starts: np.ndarray, lengths: np.ndarray):
+    """
+    Concatenation of "`arange(start, start + length)`" for every pair, without a Python loop.
+    Handy to gather variable-length slices, like the ones of a CSR layout.\n
+    Inputs:
+    - `starts` (`ndarray`): First position of each range.\n
+    - `lengths` (`ndarray`): Length of each range.\n
+    Outputs:
+    - `positions` (`ndarray[int64]`): All positions, range after range.
+    """
+    lengths = np.asarray(lengths, dtype = np.int64)
+    total = int(lengths.sum())
+    if (total == 0): return np.zeros(0, dtype = np.int64)
+    # Each position is one more than the previous one, except at the start of each range.
+    steps = np.ones(total, dtype = np.int64)
+    nonempty = lengths > 0
+    starts = np.asarray(starts, dtype = np.int64)[nonempty]
+    heads = np.concatenate(([0], np.cumsum(lengths[nonempty])[: -1]))
+    steps[heads] = starts - np.concatenate(([0], starts[: -1] + lengths[nonempty][: -1] - 1))
+    return np.cumsum(steps)
+
+def slices(data: np.ndarray, starts: np.ndarray, lengths: np.ndarray):
+    """
+    Concatenation of "`data[start : start + length]`" for every pair, when ranges are sorted and do not
+    overlap (e.g.: a field of each line of a buffer). Cheaper than gathering with "`ranges`" on large
+    buffers: a boolean mask is built with a single "`repeat`", instead of a position per byte.\n
+    Inputs:
+    - `data` (`ndarray`): The array to cut.\n
+    - `starts` (`ndarray`): First position of each range, ascending.\n
+    - `lengths` (`ndarray`): Length of each range, none reaching the next one.\n
+    Outputs:
+    - `values` (`ndarray`): All the slices, one after the other.
+    """
+    bounds = np.empty(2 * len(starts) + 2, dtype = np.int64)
+    bounds[0], bounds[-1] = 0, len(data)
+    bounds[1 : -1 : 2], bounds[2 : -1 : 2] = starts, np.asarray(starts) + lengths
+    keep = np.zeros(len(bounds) - 1, dtype = bool)
+    keep[1 :: 2] = True
+    return data[np.repeat(keep, np.diff(bounds))]
+
+def split_line(line: str):
+    """
+    Filename and packages field of a line of a contents-index file, split as the vectorized parser does
+    (see "`parse_chunks`"): trailing whitespace is ignored, the field follows the last run of spaces (or
+    tabs), and the filename is kept as it is, inner spaces included. "`(None, None)`" for blank lines.
+    """
+    line = line.rstrip(" \t\r\n")
+    if not line: return None, None
+    start = max(line.rfind(" "), line.rfind("\t")) + 1
+    return line[: start].rstrip(" \t\r"), line[start :]
+
+def skip_header(lines):
+    """
+    Lines of a contents-index file without its optional header: the free text at its start, up to a
+    "FILE  LOCATION" line ending within the first "`PARSE_HEADER_BYTES`" (as the vectorized parser does).
+    Only those first lines are held until the header is found or ruled out: the rest is streamed.\n
+    Inputs:
+    - `lines` (`Iterable[str]`): The lines of the file, without line breaks.\n
+    Outputs:
+    - `lines` (`Iterator[str]`): The same lines, from the one following the header (if any) on.
+    """
+    lines, head, size = iter(lines), [], 0
+    for line in lines:
+        head.append(line)
+        if (size := size + len(line.encode("utf-8")) + 1) > PARSE_HEADER_BYTES: break
+        if re.fullmatch(REGEX_CONTENTS_HEADER, line):
+            head = []
+            break
+    yield from head
+    yield from lines
@@ -0,0 +1,248 @@
+import os, sys, json, time, platform
+from contextlib import contextmanager
+from threading import Thread, Event, Lock, local
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████████████████   Stage report   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class StageReport:
+    """
+    Duration, bytes, lines and peak memory of each stage of a run (Release file, download, decompression,
+    parsing, ranking, export...). Pass one to "`DebianDownloader`" (or "`DebianContentIndex`") as "`report`",
+    and read it afterwards:
+     - "`stage`" (method, context manager) to time a block of code as a stage. Stages can be nested: the
+        time of the inner ones is not counted in the outer one, so the times of all stages add up.
+     - "`meter`" (method, `Iterator`) to time a stream as a stage: only the time spent producing each item
+        is counted, along with the bytes of the items. Meant for download and decompression, whose work is
+        interleaved with the parsing that consumes them.
+     - "`stages`" (property, `list[dict]`) with "`stage`", "`seconds`", "`bytes`", "`lines`", "`calls`" (blocks
+        run, not counting streams) and "`peak_rss_mb`" of each stage, in the order they first ran.
+     - "`to_dict`" / "`save`" (methods) to get (or write) the whole report as JSON.\n
+    Peak memory is sampled by a background thread (see "`MemorySampler`"), and attributed to every stage
+    running at that moment. Call "`close`" (or use the report as a context manager) to stop it.
+    """
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    FIELDS = ("seconds", "bytes", "lines", "calls", "peak_rss_mb")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, memory: bool = True):
+
+        self._stats = {}            # Stage name: its totals (see "FIELDS").
+        self._lock = Lock()         # Streams may be metered from several threads.
+        self._local = local()       # Stack of running stages, per thread.
+        self._active = ()           # Running stages of the last thread which entered or left one.
+        self._start, self._end = time.perf_counter(), None
+        self._sampler = MemorySampler(self._sample) if memory else None
+        if memory: self._sampler.__enter__()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Stop the memory sampler, and the clock of the whole run."""
+        if self._end is None:
+            self._end = time.perf_counter()
+            if self._sampler: self._sampler.__exit__()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a block of code as a stage. Yields the totals of the stage ("`dict`"), so that the block can
+        add its own counters to them (e.g.: "`entry["lines"] += n`").
+        """
+        entry = self._entry(name)
+        frame = self._push(name)
+        if self._sampler: self._sample(self._sampler.rss()) # Blocks may be shorter than the sampling interval.
+        try: yield entry
+        finally:
+            if self._sampler: self._sample(self._sampler.rss())
+            self._pop(frame, calls = 1)
+
+    def meter(self, name: str, items, lines: bool = False):
+        """
+        Time the production of each item of a stream as a stage, and add up their bytes ("`len`"), and their
+        line breaks if "`lines`" (for streams of decompressed "`bytes`").
+        """
+        self._entry(name) # Stages are listed in the order their streams are set up.
+        return self._metered(name, iter(items), lines)
+
+    def _metered(self, name: str, items, lines: bool):
+        """[PRIVATE] Pass items through, timing the production of each one (see "`meter`")."""
+        try:
+            while True:
+                frame, item = self._push(name), None
+                try: item = next(items, None)
+                finally: self._pop(frame, size = 0 if (item is None) else len(item))
+                if item is None: return
+                if lines: self._stats[name]["lines"] += item.count(b"\n")
+                yield item
+        finally: # Consumer went away: the stream is closed as well.
+            if hasattr(items, "close"): items.close()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _entry(self, name: str):
+        """[PRIVATE] Totals of a stage, created on first use."""
+        with self._lock:
+            if name not in self._stats:
+                self._stats[name] = dict.fromkeys(self.FIELDS, 0)
+                self._stats[name]["seconds"], self._stats[name]["peak_rss_mb"] = 0.0, 0.0
+            return self._stats[name]
+
+    def _push(self, name: str):
+        """[PRIVATE] Start a stage on this thread. A frame holds its name, start time and time of inner stages."""
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(frame := [name, time.perf_counter(), 0.0])
+        self._active = tuple(frame[0] for frame in stack)
+        return frame
+
+    def _pop(self, frame: list, calls: int = 0, size: int = 0):
+        """[PRIVATE] End a stage on this thread: its own time goes to its totals, and all of it to its parent's."""
+        elapsed = time.perf_counter() - frame[1]
+        stack = self._local.stack
+        stack.pop()
+        if stack: stack[-1][2] += elapsed
+        self._active = tuple(frame[0] for frame in stack)
+        with self._lock:
+            entry = self._stats[frame[0]]
+            entry["seconds"] += elapsed - frame[2]
+            entry["calls"] += calls
+            entry["bytes"] += size
+
+    def _sample(self, rss: float):
+        """[PRIVATE] Attribute a memory sample to every running stage."""
+        with self._lock:
+            for name in self._active:
+                entry = self._stats[name]
+                entry["peak_rss_mb"] = max(entry["peak_rss_mb"], rss)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @property
+    def stages(self):
+        """Totals of each stage, in the order they first ran."""
+        with self._lock:
+            return [{"stage": name, **entry, "seconds": round(entry["seconds"], 4),
+                     "peak_rss_mb": round(entry["peak_rss_mb"], 1)} for name, entry in self._stats.items()]
+
+    @property
+    def seconds(self):
+        """Wall time of the whole run, from the creation of the report until it is closed (or now)."""
+        return (self._end or time.perf_counter()) - self._start
+
+    def to_dict(self):
+        """The whole report: the stages, the total wall time, and where it ran."""
+        meta = {"python": platform.python_version(), "platform": platform.platform(), "pid": os.getpid()}
+        peak = None if (self._sampler is None) else round(self._sampler.peak, 1)
+        return {"meta": meta, "seconds": round(self.seconds, 4), "peak_rss_mb": peak, "stages": self.stages}
+
+    def save(self, path: str):
+        """Write the report (see "`to_dict`") into a JSON file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+        with open(path, "w", encoding = "utf-8") as file:
+            json.dump(self.to_dict(), file, indent = 2)
+
+    def __str__(self):
+        lines = [str.join(" ", ("Stage".ljust(12), "Seconds".rjust(9), "Share".rjust(6), "MiB".rjust(9),
+                                "Lines".rjust(12), "MiB/s".rjust(8), "Peak MiB".rjust(9)))]
+        total = max(self.seconds, 1e-9)
+        for entry in self.stages:
+            size, seconds = entry["bytes"] / 2 ** 20, entry["seconds"]
+            speed = f"{size / seconds :8.1f}" if (size and seconds) else "".rjust(8)
+            lines.append(str.join(" ", (entry["stage"].ljust(12), f"{seconds :9.3f}", f"{seconds / total :6.1%}",
+                                        f"{size :9.1f}", f"{entry['lines'] :12,}", speed,
+                                        f"{entry['peak_rss_mb'] :9.1f}")))
+        lines.append(f"Total: {self.seconds :.3f} seconds.")
+        return str.join("\n", lines)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#██████████████████████████████████████████████████████████████████████████████████████████████████   Memory sampler   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class MemorySampler:
+    """
+    Peak resident memory (RSS) of this process while a block of code runs. Use as a context manager:
+    a thread samples "/proc/self/statm" every few milliseconds. Where it does not exist, the peak of the
+    whole process so far ("`resource.getrusage`") is used instead.\n
+    Inputs:
+     - "`callback`" (`Callable`): Called with each sample (in MiB), from the sampling thread.\n
+    Attributes:
+     - "`start`" (`float`): RSS in MiB when entering the block.
+     - "`peak`" (`float`): Highest RSS in MiB seen within the block.
+    """
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, callback = None, interval: float = MEMORY_SAMPLE_INTERVAL):
+
+        self._callback, self._interval = callback, interval
+        self._stop, self._thread = Event(), Thread(target = self._sample, daemon = True)
+        self.start = self.peak = 0.0
+
+    def __enter__(self):
+        self.start = self.peak = self.rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self._record(self.rss())
+
+    def _sample(self):
+        """[PRIVATE] Keep the highest RSS until told to stop."""
+        while not self._stop.wait(self._interval):
+            self._record(self.rss())
+
+    def _record(self, rss: float):
+        """[PRIVATE] Keep a sample."""
+        self.peak = max(self.peak, rss)
+        if self._callback: self._callback(rss)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @staticmethod
+    def rss():
+        """Current RSS of this process in MiB (or its peak so far, without "/proc")."""
+        try:
+            with open("/proc/self/statm", "rb") as file:
+                return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+        except (OSError, ValueError, AttributeError):
+            import resource # Kilobytes on Linux, bytes on macOS.
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak / (2 ** 20 if (sys.platform == "darwin") else 2 ** 10)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#██████████████████████████████████████████████████████████████████████████████████████████████████   Profiler dumps   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+@contextmanager
+def profiled(path: str):
+    """
+    Profile a block of code into a file: a "`pyinstrument`" HTML page if "`path`" ends with ".html" (needs
+    the "`pyinstrument`" package), or else "`cProfile`" statistics (readable with "`pstats`" or "`snakeviz`").\n
+    Inputs:
+    - `path` (`str`): Path of the dump.\n
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+    if path.endswith(".html"):
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try: yield profiler
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding = "utf-8") as file: file.write(profiler.output_html())
+        return
+    from cProfile import Profile
+    profiler = Profile()
+    profiler.enable()
+    try: yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
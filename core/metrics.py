@@ -0,0 +1,154 @@
+import os, sys, json
+import numpy as np
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, StringTable, select_top, slices
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Index metrics   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class IndexMetrics:
+    """
+    Statistics of a contents-index file, all computed at once from its index with vectorized operations
+    on the IDs (see "`from_index`"), and small enough to be stored and reloaded instead of parsing again.
+    Each one is a table of labels and counts, chosen with "`by`":
+     - "`package`": files of each package (same as "`get_ranking`").
+     - "`section`": files of the packages of each section (the part before the last "/" of their name).
+     - "`directory`": files under each top-level directory (e.g.: "usr", "lib").
+     - "`size`": packages by size class (amount of files: "1", "2-3", "4-7"...).
+     - "`shared`": files by amount of packages they belong to ("1", "2"...).\n
+    The first three are ranked (see "`ranking`"), and the histograms are kept in the order of their classes.\n
+    Inputs:
+    - `tables` (`dict[str, tuple[list[str], ndarray]]`): Labels and counts, for each one of "`BY`".\n
+    - `meta` (`dict`): JSON-serializable metadata (e.g.: version of the file, see "`load_metrics`").
+    """
+    BY = METRICS_BY
+    HISTOGRAMS = ("size", "shared")
+    NO_SECTION = "(none)"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, tables: dict, meta: dict = None):
+
+        self.tables = tables
+        self.meta = dict(meta or {})
+
+    @classmethod
+    def from_index(cls, index: ContentsIndex, meta: dict = None):
+        """Compute every table from the index (no inversion nor decoding of filenames needed)."""
+        tables = {}
+        # Packages: an entry of "file_packs" is a file of a package.
+        pack_counts = index.counts()
+        packs = index.packs.to_array()
+        tables["package"] = (packs.tolist(), pack_counts)
+        # Sections: every package is mapped to its section, and its count added to it.
+        sections = np.array([name.rpartition("/")[0] or cls.NO_SECTION for name in packs], dtype = object)
+        names, pack_sections = np.unique(sections, return_inverse = True) if len(packs) else (sections, sections)
+        section_counts = np.bincount(pack_sections, weights = pack_counts, minlength = len(names)).astype(np.int64)
+        tables["section"] = (names.tolist(), section_counts)
+        # Top-level directories: cut at the first "/" of each distinct filename, straight from the buffer.
+        data, offsets = index.paths.arrays
+        dirs, path_dirs = cls._top_directories(np.asarray(data), np.asarray(offsets))
+        dir_counts = np.bincount(path_dirs[index.row_paths], minlength = len(dirs)).astype(np.int64)
+        tables["directory"] = (dirs.to_array().tolist(), dir_counts)
+        # Size classes: "k" holds the packages with "2 ** k" to "2 ** (k + 1) - 1" files.
+        classes = np.frexp(pack_counts[pack_counts > 0].astype(np.float64))[1] - 1
+        sizes = np.bincount(classes, minlength = 1 if len(classes) else 0).astype(np.int64)
+        labels = [str(2 ** k) if (k == 0) else f"{2 ** k}-{2 ** (k + 1) - 1}" for k in range(len(sizes))]
+        tables["size"] = (labels, sizes)
+        # Files shared by several packages: amount of packages of each row.
+        shared = np.bincount(np.diff(index.file_offsets)).astype(np.int64)
+        keep = np.flatnonzero(shared[1 :]) + 1
+        tables["shared"] = ([str(n) for n in keep.tolist()], shared[keep])
+        meta = {"lines": len(index), "paths": len(index.paths), "packages": len(index.packs),
+                "entries": len(index.file_packs), **(meta or {})}
+        return cls(tables, meta)
+
+    @staticmethod
+    def _top_directories(data: np.ndarray, offsets: np.ndarray):
+        """[PRIVATE] Table of the top-level directories (or names, without "/") and the one of each string."""
+        starts, ends = offsets[: -1], offsets[1 :]
+        slashes = np.flatnonzero(data == ord("/"))
+        if len(slashes): # First "/" at or after the start of each string, if before its end.
+            first = slashes[np.minimum(np.searchsorted(slashes, starts), len(slashes) - 1)]
+            ends = np.where((first >= starts) & (first < ends), first, ends)
+        lengths = ends - starts
+        cut = np.zeros(len(lengths) + 1, dtype = np.int64)
+        np.cumsum(lengths, out = cut[1 :])
+        return StringTable.from_buffer(slices(data, starts, lengths), cut)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def ranking(self, by: str = "package", top: int = 10):
+        """
+        Labels and counts of a table: the "`top`" largest ones (ties broken alphabetically, see
+        "`select_top`"), or every class of a histogram ("`size`", "`shared`") in their own order.
+        """
+        if by not in self.BY:
+            raise ValueError(f"\"{by}\" is not a metric. Please use one of these: {', '.join(self.BY)}")
+        labels, counts = self.tables[by]
+        ids = np.arange(len(counts)) if (by in self.HISTOGRAMS) else select_top(counts, top)
+        return [labels[i] for i in ids], counts[ids]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def to_dict(self):
+        """All tables and metadata, as JSON-serializable objects."""
+        tables = {by: {"labels": list(labels), "counts": counts.tolist()}
+                  for by, (labels, counts) in self.tables.items()}
+        return {"meta": self.meta, "tables": tables}
+
+    def save(self, path: str):
+        """Write the metrics into a JSON file (written aside and then renamed, as indexes are)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+        with open(path + ".tmp", "w", encoding = "utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii = False, separators = (",", ":"))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Read metrics written by "`save`"."""
+        with open(path, "r", encoding = "utf-8") as file: saved = json.load(file)
+        tables = {by: (table["labels"], np.array(table["counts"], dtype = np.int64))
+                  for by, table in saved["tables"].items()}
+        return cls(tables, saved["meta"])
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def load_metrics(arch: str = None, path: str = METRICS_PATH, udeb: bool = False, parse_workers: int = None,
+                 **kwargs):
+    """
+    Metrics of an architecture, without parsing its contents-index file again when it did not change:
+    they are stored along with the version of the file (its SHA256 hash in the "`Release`" file), and
+    only computed (and stored again) when the mirror holds another version. Only the "`Release`" file
+    is fetched otherwise. Without hash (no "`Release`" file), they are always computed.\n
+    Inputs:
+    - `arch` (`str`): The architecture. Defaults to the one of this machine.\n
+    - `path` (`str`): Where the metrics are stored ("`{arch}`" is replaced). "`None`" to not store them.\n
+    - `udeb` (`bool`): Whether to use the installer packages ("`Contents-udeb-{arch}.gz`") instead.\n
+    - `parse_workers` (`int`): Processes parsing the file, when it has to be parsed (see "`DebianContentIndex`").\n
+    - Any other keyword argument ("`mirror`", "`suite`", "`cache`", "`report`"...) is passed to
+        "`DebianContentIndex`".\n
+    Outputs:
+    - `metrics` (`IndexMetrics`): The metrics, with the version of the file in "`meta`".
+    """
+    from core.base import DebianDownloader
+    from core.content import DebianContentIndex
+    arch = arch or ARCH_LOCAL_MACHINE
+    obj = DebianDownloader(**kwargs) # Release file only: no parsing yet.
+    available = DebianContentIndex.get_archs(obj.directory, udeb = udeb)
+    if arch not in available: # Same error as for the index.
+        error = f"\"{arch}\" is invalid. Please use one of these:\n  ==> "
+        raise DebianContentIndex.ArchitectureNotFound(error + str.join(", ", available))
+    filename = (DebianContentIndex.FILENAME_UDEB if udeb else DebianContentIndex.FILENAME_ARCH).format(arch = arch)
+    name, size, digest = obj.version(filename)
+    key = {"arch": arch, "filename": name, "size": size, "sha256": digest,
+           "mirror": obj.URL_BASE.format(filename = "")}
+    path = path and path.format(arch = "udeb-" * udeb + arch)
+    if path and digest and os.path.isfile(path):
+        try: saved = IndexMetrics.load(path)
+        except (OSError, ValueError, KeyError): saved = None
+        if saved and all(saved.meta.get(k) == v for k, v in key.items()): return saved
+    metrics = DebianContentIndex(arch = arch, udeb = udeb, release = obj.release, parse_workers = parse_workers,
+                                 **kwargs).metrics
+    metrics.meta.update(key)
+    if path and digest: metrics.save(path)
+    return metrics
@@ -0,0 +1,169 @@
+import os, sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from tempfile import TemporaryDirectory
+
+sys.path.append("./")
+from utils.constants import *
+from core.base import DebianDownloader
+from core.content import DebianContentIndex
+from core.index import ContentsIndex, PackageCounts, select_top
+from core.parser import parse_chunks, count_chunks
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████   Multi-architecture runs   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+def count_archs(archs: list = None, download_workers: int = DOWNLOAD_WORKERS, parse_workers: int = None,
+                downloader: type = DebianDownloader, udeb: bool = False, **kwargs):
+    """
+    Count files per package for several architectures at once. The directory page is fetched only once.
+    Contents-index files are downloaded concurrently by a bounded pool of threads, and each one is handed
+    to a pool of processes to be parsed as soon as it is complete, so downloads and parsing overlap.\n
+    Inputs:
+    - `archs` (`list[str]`): Architectures to count. All available ones when not given ("`all`" is
+        the one of the arch-independent files, "`Contents-all.gz`").
+        An "`ArchitectureNotFound`" error will be triggered for the ones not available.\n
+    - `download_workers` (`int`): Amount of simultaneous downloads.\n
+    - `parse_workers` (`int`): Amount of parsing processes. Defaults to the amount of CPUs.\n
+    - `downloader` (`type`): The "`DebianDownloader`" class (or subclass) to use.\n
+    - `udeb` (`bool`): Whether to count the installer packages ("`Contents-udeb-{arch}.gz`") instead.\n
+    - Any other keyword argument ("`suite`", "`component`", "`cache`"...) is passed to the downloader.\n
+    Outputs:
+    - `table` (`DataFrame`): File count with one row per package (sorted) and one column per architecture.
+        Packages not present in a given architecture have a count of 0.
+    """
+    obj = downloader(**kwargs) # Fetches the Release file (or directory): once for all archs.
+    directory = obj.directory
+    available = DebianContentIndex.get_archs(directory, udeb = udeb)
+    if archs is None:
+        archs = available
+    missing = [arch for arch in archs if arch not in available]
+    if missing: # Same error as for single architectures.
+        error = f"\"{str.join(', ', missing)}\" invalid. Please use one of these:\n  ==> "
+        raise DebianContentIndex.ArchitectureNotFound(error + str.join(", ", available))
+
+    counts = {}
+    with TemporaryDirectory() as path_temp, \
+         ThreadPoolExecutor(max_workers = download_workers) as threads, \
+         ProcessPoolExecutor(max_workers = parse_workers) as processes:
+        # Fetch compressed files to disk: only paths (not contents) travel to the processes.
+        fetching = {}
+        # Largest files first (sizes are known up front), so that the last ones to finish are short.
+        for arch in sorted(archs, key = lambda arch: -directory.get(_filename(arch, udeb), 0)):
+            filename = _filename(arch, udeb)
+            path = os.path.join(path_temp, filename)
+            fetching[threads.submit(obj.fetch, filename, path)] = arch
+        # Parse each file as soon as it is complete.
+        parsing = {processes.submit(_count_file, future.result()): fetching[future]
+                   for future in as_completed(fetching)}
+        for future in as_completed(parsing):
+            counts[parsing[future]] = future.result()
+
+    # Combine everything into a single "package x arch" table.
+    from pandas import Series, DataFrame
+    columns = {arch: Series(counts[arch].counts(), index = counts[arch].packs.to_array()) for arch in archs}
+    table = DataFrame(columns).fillna(0).astype("int64").sort_index()
+    return table.rename_axis("packages")
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def index_sources(sources: list, download_workers: int = DOWNLOAD_WORKERS,
+                  parse_workers: int = None, downloader: type = DebianDownloader, **kwargs):
+    """
+    Build a single index out of several contents-index files, from any suites and components of the
+    mirror (e.g.: "stable/main/amd64" plus "testing/contrib/amd64" plus "stable/main/udeb-amd64").
+    Release files (one per suite) and contents-index files are fetched concurrently, and each file
+    is parsed by a pool of processes as soon as it is complete. Filenames and packages are interned
+    once for all of them (see "`ContentsIndex.merge`"), and every row keeps the source it comes from.\n
+    Inputs:
+    - `sources` (`list[str]`): Sources as "`suite/component/arch`" (see "`parse_source`"). An
+        "`ArchitectureNotFound`" error will be triggered for the ones not available.\n
+    - `download_workers` (`int`): Amount of simultaneous downloads.\n
+    - `parse_workers` (`int`): Amount of parsing processes. Defaults to the amount of CPUs.\n
+    - `downloader` (`type`): The "`DebianDownloader`" class (or subclass) to use.\n
+    - Any other keyword argument ("`mirror`", "`cache`", "`offline`"...) is passed to the downloader.\n
+    Outputs:
+    - `index` (`ContentsIndex`): The merged index. Its "`meta["sources"]`" holds the given sources, whose
+        position is the value of "`row_sources`" (and the "`source`" argument of "`counts`" / "`ranking`").
+    """
+    sources = [parse_source(spec) for spec in sources]
+    dists = list(dict.fromkeys((suite, component) for suite, component, arch, udeb in sources))
+    # Release files are fetched once per suite: other components of the same suite reuse them.
+    firsts = {} # First "(suite, component)" of each suite.
+    for suite, component in dists: firsts.setdefault(suite, (suite, component))
+    make = lambda dist, release = None: downloader(suite = dist[0], component = dist[1], release = release, **kwargs)
+    with ThreadPoolExecutor(max_workers = download_workers) as threads:
+        objs = dict(zip(firsts.values(), threads.map(make, firsts.values())))
+        others = [dist for dist in dists if dist not in objs]
+        objs.update(zip(others, threads.map(lambda dist: make(dist, objs[firsts[dist[0]]].release), others)))
+    for suite, component, arch, udeb in sources:
+        available = DebianContentIndex.get_archs(objs[suite, component].directory, udeb = udeb)
+        if arch not in available: # Same error as for single architectures.
+            error = f"\"{arch}\" invalid in \"{suite}/{component}\". Please use one of these:\n  ==> "
+            raise DebianContentIndex.ArchitectureNotFound(error + str.join(", ", available))
+
+    indexes = {}
+    with TemporaryDirectory() as path_temp, \
+         ThreadPoolExecutor(max_workers = download_workers) as threads, \
+         ProcessPoolExecutor(max_workers = parse_workers) as processes:
+        fetching = {}
+        directories = {dist: obj.directory for dist, obj in objs.items()}
+        size = lambda i: -directories[sources[i][: 2]].get(_filename(*sources[i][2 :]), 0)
+        for i in sorted(range(len(sources)), key = size): # Largest files first, as above.
+            suite, component, arch, udeb = sources[i]
+            filename = _filename(arch, udeb)
+            path = os.path.join(path_temp, f"{i}-{filename}") # Same filename in several suites.
+            fetching[threads.submit(objs[suite, component].fetch, filename, path)] = i
+        parsing = {processes.submit(_index_file, future.result()): fetching[future]
+                   for future in as_completed(fetching)}
+        for future in as_completed(parsing):
+            indexes[parsing[future]] = future.result()
+
+    labels = [f"{suite}/{component}/" + "udeb-" * udeb + arch for suite, component, arch, udeb in sources]
+    return ContentsIndex.merge([indexes[i] for i in range(len(sources))], labels)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def parse_source(spec: str):
+    """
+    Split a source given as "`suite/component/arch`". Leading parts may be left out: "`amd64`" and
+    "`contrib/amd64`" take the default suite (and component). An architecture like "`udeb-amd64`" stands
+    for the contents of installer packages ("`Contents-udeb-amd64.gz`").\n
+    Inputs:
+    - `spec` (`str`): The source.\n
+    Outputs:
+    - `source` (`tuple[str, str, str, bool]`): Suite, component, architecture, and whether it is "udeb".
+    """
+    parts = spec.strip("/").split("/")
+    if not (1 <= len(parts) <= 3) or not all(parts):
+        raise ValueError(f"\"{spec}\" is not a source. Please use \"suite/component/arch\".")
+    suite, component, arch = [DEBIAN_SUITE, DEBIAN_COMPONENT][: 3 - len(parts)] + parts
+    udeb = arch.startswith("udeb-")
+    return suite, component, arch.removeprefix("udeb-"), udeb
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def get_ranking(table: "DataFrame", arch: str, top: int = 10):
+    """
+    Get the "top N" packages with the most files for one architecture of a "`count_archs`" table.
+    Same result (and tie-breaking) as "`DebianContentIndex.get_ranking`".\n
+    Inputs:
+    - `table` (`DataFrame`): The table returned by "`count_archs`".\n
+    - `arch` (`str`): One of its columns.\n
+    - `top` (`int`): The number of packages to return.\n
+    Outputs:
+    - `counter` (`Series`): The number of files for each package.
+    """
+    counts = table[arch].loc[table[arch] > 0] # Packages of other archs only.
+    ids = select_top(counts.values, top)
+    return counts.iloc[ids].rename("file_count")
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def _filename(arch: str, udeb: bool):
+    """[PRIVATE] Name of the contents-index file of an architecture."""
+    return (DebianContentIndex.FILENAME_UDEB if udeb else DebianContentIndex.FILENAME_ARCH).format(arch = arch)
+
+def _count_file(path: str):
+    """[PRIVATE] Parsing job for the process pool: count files per package of a fetched file."""
+    return count_chunks(DebianDownloader.read_chunks(path))
+
+def _index_file(path: str):
+    """[PRIVATE] Parsing job for the process pool: index a fetched file."""
+    return parse_chunks(DebianDownloader.read_chunks(path))
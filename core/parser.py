@@ -0,0 +1,281 @@
+import os, sys, re
+import numpy as np
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, PackageCounts, StringTable, ranges, slices
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████   Vectorized parser   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+# Old contents-index files start with free text, ended by a line naming both columns.
+REGEX_HEADER = re.compile(("^" + REGEX_CONTENTS_HEADER + "$").encode("utf-8"), re.MULTILINE)
+
+def parse_chunks(chunks, batch_size: int = PARSE_BATCH_BYTES, arrow: bool = None):
+    """
+    Parse a contents-index file into the compact index straight from its decompressed bytes, without
+    a Python string per line: line breaks, the last run of whitespace of each line (filename on its
+    left, packages on its right) and every slice are found with vectorized operations over the buffer.
+    Same index as "`ContentsIndex.from_rows`" over "`DebianContentIndex.parse_lines`" (see "`split_line`"):
+    trailing whitespace of a line is ignored, spaces inside filenames are kept as they are, and the
+    optional header (free text ending in a "FILE  LOCATION" line, see "`skip_header`") is skipped. Only
+    "\\n" (and "\\r\\n") breaks lines here, while the lines given to the line parser are already split.\n
+    Inputs:
+    - `chunks` (`Iterable[bytes]`): Consecutive pieces of the decompressed file (e.g.: "`download_chunks`").\n
+    - `batch_size` (`int`): Bytes parsed at once. Bounds the memory of the temporary arrays.\n
+    - `arrow` (`bool`): Whether to intern filenames with "`pyarrow`" (see "`StringTable.from_buffer`").\n
+    Outputs:
+    - `index` (`ContentsIndex`): The built index.
+    """
+    path_data, path_lengths, row_fields, fields = [], [], [], {}
+    for buffer, starts, lengths, ids in scan_batches(chunks, fields, batch_size, arrow):
+        path_data.append(slices(buffer, starts, lengths))
+        path_lengths.append(lengths)
+        row_fields.append(ids)
+    # Filenames are interned all at once, and sorted.
+    offsets = np.zeros(sum(map(len, path_lengths)) + 1, dtype = np.int64)
+    np.cumsum(np.concatenate(path_lengths or [np.zeros(0, np.int64)]), out = offsets[1 :])
+    data = np.concatenate(path_data or [np.zeros(0, np.uint8)])
+    paths, row_paths = StringTable.from_buffer(data, offsets, arrow = arrow)
+    return _assemble(paths, row_paths, list(fields), np.concatenate(row_fields or [np.zeros(0, np.int32)]))
+
+def parse_buffer(data: bytes, batch_size: int = PARSE_BATCH_BYTES, arrow: bool = None):
+    """Same as "`parse_chunks`", for the whole decompressed content at once."""
+    return parse_chunks([data], batch_size = batch_size, arrow = arrow)
+
+def count_chunks(chunks, batch_size: int = PARSE_BATCH_BYTES):
+    """
+    File count per package, with lines split as "`parse_chunks`" does, but without interning filenames:
+    only the amount of rows of each distinct packages field is kept.\n
+    Outputs:
+    - `counts` (`PackageCounts`): The counts, same as "`ContentsIndex.counts`" of the parsed index.
+    """
+    fields, field_counts = {}, np.zeros(0, dtype = np.int64)
+    for _, _, _, ids in scan_batches(chunks, fields, batch_size):
+        batch_counts = np.bincount(ids, minlength = len(fields))
+        batch_counts[: len(field_counts)] += field_counts
+        field_counts = batch_counts
+    return _pack_counts(zip(fields, field_counts.tolist()))
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def scan_batches(chunks, fields: dict, batch_size: int = PARSE_BATCH_BYTES, arrow: bool = None):
+    """
+    Split batch after batch into rows, as "`parse_chunks`" does, but leave them to the caller (e.g.: to
+    spill them to disk, see "core/external.py"). Packages fields (the text at the right of each line)
+    repeat a lot: they are interned in "`fields`", which maps each distinct one to its field ID.\n
+    Inputs:
+    - `chunks` (`Iterable[bytes]`): Consecutive pieces of the decompressed file.\n
+    - `fields` (`dict[bytes, int]`): Fields seen so far (filled in place, usually empty at first).\n
+    - `batch_size` (`int`), `arrow` (`bool`): As in "`parse_chunks`".\n
+    Outputs:
+    - `rows` (`Iterator[tuple]`): For each batch, its buffer ("`ndarray[uint8]`"), the start and length
+        of each filename in it, and the field ID of each row.
+    """
+    for n, batch in enumerate(_batches(chunks, batch_size)):
+        buffer, path_starts, path_lengths, table, ids = _scan_buffer(np.frombuffer(batch, np.uint8), n == 0, arrow)
+        remap = _remap_fields(table, fields) # Number the distinct fields of this batch for the whole file.
+        yield buffer, path_starts, path_lengths, remap[ids]
+
+def _scan_buffer(buffer: np.ndarray, first: bool, arrow: bool = None):
+    """
+    [PRIVATE] Split a batch into rows, skipping the header if it is the "`first`" one. Outputs: the
+    buffer (without header), start and length of each filename, the table of the distinct packages
+    fields of the batch, and the ID of the field of each row in that table.
+    """
+    if first: # Header can only be at the start of the file.
+        header = REGEX_HEADER.search(buffer[: PARSE_HEADER_BYTES].tobytes())
+        buffer = buffer[header.end() :] if header else buffer
+    path_starts, path_lengths, field_starts, field_lengths = _split_rows(buffer)
+    offsets = np.zeros(len(field_lengths) + 1, dtype = np.int64)
+    np.cumsum(field_lengths, out = offsets[1 :])
+    table, ids = StringTable.from_buffer(slices(buffer, field_starts, field_lengths), offsets, arrow = arrow)
+    return buffer, path_starts, path_lengths, table, ids
+
+def _remap_fields(table: StringTable, fields: dict):
+    """[PRIVATE] Field ID (in "`fields`", filled in place) of each string of a batch's table of fields."""
+    data, bounds = table.arrays
+    data, bounds = data.tobytes(), bounds.tolist()
+    remap = [fields.setdefault(data[a : b], len(fields)) for a, b in zip(bounds[: -1], bounds[1 :])]
+    return np.array(remap, dtype = np.int32)
+
+def _assemble(paths: StringTable, row_paths: np.ndarray, fields: list, row_fields: np.ndarray):
+    """[PRIVATE] Build the index from interned filenames and the packages field (by field ID) of each row."""
+    # Packages fields are few: comma-split each distinct one, and expand them row by row.
+    names = [field.decode("utf-8").split(",") for field in fields]
+    packs, pack_ids = StringTable.build([pack for field in names for pack in field])
+    field_offsets = np.zeros(len(names) + 1, dtype = np.int64)
+    np.cumsum(np.fromiter(map(len, names), np.int64, len(names)), out = field_offsets[1 :])
+    row_counts = np.diff(field_offsets)[row_fields]
+    file_offsets = np.zeros(len(row_fields) + 1, dtype = np.int64)
+    np.cumsum(row_counts, out = file_offsets[1 :])
+    file_packs = pack_ids[ranges(field_offsets[row_fields], row_counts)]
+    return ContentsIndex(paths, packs, row_paths, file_offsets, file_packs)
+
+def _batches(chunks, batch_size: int):
+    """[PRIVATE] Regroup chunks into batches of about "`batch_size`" bytes, made of whole lines."""
+    pending, size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        if (size := size + len(chunk)) < batch_size: continue
+        buffer, start = b"".join(pending), 0
+        while (len(buffer) - start >= batch_size):
+            cut = buffer.rfind(b"\n", start, start + batch_size) + 1
+            if (cut == 0): # A single line longer than a batch: take it whole.
+                cut = buffer.find(b"\n", start + batch_size) + 1
+                if (cut == 0): break
+            yield memoryview(buffer)[start : cut]
+            start = cut
+        pending = [buffer[start :]]
+        size = len(pending[0])
+    if size: yield b"".join(pending)
+
+def _split_rows(buffer: np.ndarray):
+    """
+    [PRIVATE] Find the filename and the packages field of every non-blank line of a buffer. Only the
+    boundaries of runs of blanks are located in the buffer: every other search is a binary one among them.\n
+    Inputs:
+    - `buffer` (`ndarray[uint8]`): Whole lines of a contents-index file.\n
+    Outputs:
+    - `rows` (`tuple[ndarray[int64], ...]`): Start and length of each filename, then of each packages field.
+    """
+    empty = tuple(np.zeros(0, dtype = np.int64) for _ in range(4))
+    if not len(buffer): return empty
+    space = (buffer == 32) | (buffer == 9)
+    blank = space | (buffer == 13) | (buffer == 10)
+    # Last byte of each run of non-blanks, and last byte of each run of spaces followed by a non-blank.
+    solid = np.flatnonzero(~blank[: -1] & blank[1 :])
+    solid = solid if blank[-1] else np.append(solid, len(buffer) - 1)
+    gaps = np.flatnonzero(space[: -1] & ~blank[1 :])
+    del space, blank
+    if not len(solid): return empty
+    breaks = np.flatnonzero(buffer == 10)
+    ends = breaks if (buffer[-1] == 10) else np.append(breaks, len(buffer))
+    starts = np.concatenate(([0], ends[: -1] + 1))
+    def before(marks: np.ndarray, limits: np.ndarray): # Last mark before each limit, or -1.
+        i = np.searchsorted(marks, limits) - 1
+        return np.where(i >= 0, marks[np.maximum(i, 0)], -1) if len(marks) else np.full(len(limits), -1)
+    # Lines are cut at their last non-blank byte. Blank lines make no row.
+    last = before(solid, ends)
+    keep = last >= starts
+    starts, last = starts[keep], last[keep]
+    # Filename ends at the last non-blank byte before the last run of spaces. No spaces: no filename.
+    sep = before(gaps, last)
+    split = sep >= starts
+    path_ends = np.where(split, np.maximum(before(solid, sep) + 1, starts), starts)
+    field_starts = np.where(split, sep + 1, starts)
+    return starts, path_ends - starts, field_starts, last + 1 - field_starts
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████   Parallel parser   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+def parse_parallel(chunks, workers: int = None, batch_size: int = PARSE_BATCH_BYTES, arrow: bool = None):
+    """
+    Same index as "`parse_chunks`", with batches parsed by a pool of worker processes. The calling
+    thread only decompresses (iterating over "`chunks`") and cuts batches of whole lines, each one
+    copied into a shared-memory block: workers read it from there, and write the distinct filenames
+    of the batch back into it, so no string is ever pickled (only arrays of IDs and offsets). Then the
+    tables of the batches are merged in order (see "`StringTable.concat`"), which is cheap for sorted
+    input (as real files are): the largest part of the work, the interning of filenames, is spread.
+
+    Inputs:
+    - `chunks` (`Iterable[bytes]`): Consecutive pieces of the decompressed file (e.g.: "`download_chunks`").
+
+    - `workers` (`int`): Amount of worker processes. Default: one per CPU.
+
+    - `batch_size` (`int`), `arrow` (`bool`): As in "`parse_chunks`".
+
+    Outputs:
+    - `index` (`ContentsIndex`): The built index, equal to the one of "`parse_chunks`".
+    """
+    tables, row_paths, row_fields, fields = [], [], [], {}
+    for data, (offsets, ids, field_data, field_offsets, field_ids) in _dispatch(chunks, _parse_part, workers,
+                                                                                 batch_size, arrow):
+        tables.append(StringTable(data, offsets))
+        row_paths.append(ids)
+        remap = _remap_fields(StringTable(np.frombuffer(field_data, np.uint8), field_offsets), fields)
+        row_fields.append(remap[field_ids])
+    paths, remaps = StringTable.concat(tables, arrow = arrow)
+    row_paths = np.concatenate([remap[ids] for remap, ids in zip(remaps, row_paths)] or [np.zeros(0, np.int32)])
+    return _assemble(paths, row_paths, list(fields), np.concatenate(row_fields or [np.zeros(0, np.int32)]))
+
+def count_parallel(chunks, workers: int = None, batch_size: int = PARSE_BATCH_BYTES):
+    """
+    File count per package, with batches counted by a pool of worker processes (as in "`parse_parallel`"):
+    each one only returns its distinct packages fields and the amount of rows of each.
+
+    Outputs:
+    - `counts` (`PackageCounts`): The counts, same as "`ContentsIndex.counts`" of the parsed index.
+    """
+    fields = Counter()
+    for _, (field_data, field_offsets, field_counts) in _dispatch(chunks, _count_part, workers, batch_size):
+        bounds = field_offsets.tolist()
+        for a, b, count in zip(bounds[: -1], bounds[1 :], field_counts.tolist()): fields[field_data[a : b]] += count
+    return _pack_counts(fields.items())
+
+def _pack_counts(fields):
+    """[PRIVATE] Counts of the packages, from the amount of rows of each packages field ("`(bytes, int)`" pairs)."""
+    totals = Counter()
+    for field, count in fields:
+        for pack in field.decode("utf-8").split(","): totals[pack] += count
+    names = sorted(totals.keys())
+    counts = np.fromiter((totals[name] for name in names), np.int64, len(names))
+    return PackageCounts(StringTable.from_strings(names), counts)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def _dispatch(chunks, job, workers: int = None, batch_size: int = PARSE_BATCH_BYTES, arrow: bool = None):
+    """
+    [PRIVATE] Run "`job`" on every batch in a pool of worker processes, through shared memory, with at
+    most "`PARSE_QUEUE_PER_WORKER`" batches in flight per worker. Yields, in order of the batches, the
+    bytes the job wrote back at the start of its block (copied out before the block is freed) and the
+    rest of its result.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    pending = deque() # Shared-memory block and future of each batch in flight.
+    def collect():
+        block, future = pending.popleft()
+        try:
+            written, result = future.result()
+            return np.array(block.buf[: written], dtype = np.uint8), result
+        finally: block.close(); block.unlink()
+    with ProcessPoolExecutor(workers) as pool:
+        try:
+            for n, batch in enumerate(_batches(chunks, batch_size)):
+                block = shared_memory.SharedMemory(create = True, size = max(1, len(batch)))
+                block.buf[: len(batch)] = batch
+                pending.append((block, pool.submit(_run_shared, job, block.name, len(batch), n == 0, arrow)))
+                while (len(pending) >= workers * PARSE_QUEUE_PER_WORKER): yield collect()
+            while pending: yield collect()
+        finally: # Stopped early, or failed: free the remaining blocks.
+            for block, future in pending:
+                future.cancel()
+                block.close(); block.unlink()
+
+def _run_shared(job, name: str, size: int, first: bool, arrow: bool):
+    """[PRIVATE] Worker side of "`_dispatch`": attach to the block of a batch, and run the job on it."""
+    block = shared_memory.SharedMemory(name = name)
+    try: return job(np.ndarray(size, dtype = np.uint8, buffer = block.buf), first, arrow)
+    finally: block.close()
+
+def _parse_part(batch: np.ndarray, first: bool, arrow: bool):
+    """
+    [PRIVATE] Parse a batch: its filenames interned in a table whose buffer is written back at the start
+    of the block (it is never larger than the batch), the ID of each row in it, and its packages fields.
+    """
+    buffer, starts, lengths, fields, field_ids = _scan_buffer(batch, first, arrow)
+    offsets = np.zeros(len(lengths) + 1, dtype = np.int64)
+    np.cumsum(lengths, out = offsets[1 :])
+    paths, ids = StringTable.from_buffer(slices(buffer, starts, lengths), offsets, arrow = arrow)
+    (data, offsets), (field_data, field_offsets) = paths.arrays, fields.arrays
+    batch[: len(data)] = data # Filenames were copied out of the batch: it is not needed anymore.
+    return len(data), (offsets, ids, field_data.tobytes(), field_offsets, field_ids)
+
+def _count_part(buffer: np.ndarray, first: bool, arrow: bool):
+    """[PRIVATE] Count a batch: its distinct packages fields, and the amount of rows of each one."""
+    _, _, _, fields, field_ids = _scan_buffer(buffer, first, arrow)
+    field_data, field_offsets = fields.arrays
+    return 0, (field_data.tobytes(), field_offsets, np.bincount(field_ids, minlength = len(fields)))
@@ -0,0 +1,89 @@
+import sys
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████████████████   Release file   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class DebianRelease:
+    """
+    Parsed "`Release`" (or "`InRelease`") file of a suite: the list of every index file the suite publishes,
+    with its size and SHA256 hash. Enough to know which contents-index files exist (and how large they are)
+    without scraping directory pages, and to verify each download.
+    Inputs:
+     - "`fields`" (`dict[str, str]`): Single-line fields of the file ("`Suite`", "`Date`", "`Components`"...).
+     - "`files`" (`dict[str, tuple[int, str]]`): Size and SHA256 hash of each file, by its path relative to
+        the suite's folder (e.g.: "main/Contents-amd64.gz").\n
+    Methods:
+     - "`from_text`" (class method) to parse the file. The PGP signature of "`InRelease`" is not checked.
+     - "`directory`" (method, `dict`) to get the files of a component with their sizes.
+     - "`locate`" (method, `tuple`) to get the cheapest compressed variant of a file.
+    For more info visit:
+     - Format of the file: "https://wiki.debian.org/DebianRepository/Format#A.22Release.22_files"
+    """
+    class FormatError(Exception): pass
+
+    COMPRESSIONS = RELEASE_COMPRESSIONS
+    PGP_HEADER = "-----BEGIN PGP SIGNED MESSAGE-----"
+    PGP_SIGNATURE = "-----BEGIN PGP SIGNATURE-----"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, fields: dict, files: dict):
+
+        self.fields = fields
+        self.files = files
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def from_text(cls, text: str):
+        """
+        Parse the content of a "`Release`" file, or of a clear-signed "`InRelease`" one.\n
+        Inputs:
+        - `text` (`str`): The content of the file.\n
+        Outputs:
+        - `release` (`DebianRelease`): The parsed file. A "`FormatError`" is triggered if it has no SHA256 table.
+        """
+        lines = text.splitlines()
+        if lines and (lines[0] == cls.PGP_HEADER): # Clear-signed: armor headers end at the first blank line.
+            start = lines.index("") + 1 if "" in lines else len(lines)
+            end = lines.index(cls.PGP_SIGNATURE) if cls.PGP_SIGNATURE in lines else len(lines)
+            lines = [line[2 :] if line.startswith("- ") else line for line in lines[start : end]]
+        fields, files, table = {}, {}, None
+        for line in lines:
+            if line.startswith(" "): # Continuation: a row of the table of the last field.
+                if (table != "SHA256"): continue
+                digest, size, path = line.split(maxsplit = 2)
+                files[path] = (int(size), digest)
+            elif ":" in line:
+                table, _, value = line.partition(":")
+                if value.strip(): fields[table] = value.strip()
+        if not files:
+            raise cls.FormatError("Release file has no \"SHA256\" table.")
+        return cls(fields, files)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def directory(self, component: str):
+        """Files right in the folder of a component (not in subfolders), with their sizes."""
+        prefix = component.strip("/") + "/"
+        return {path[len(prefix) :]: size for path, (size, _) in self.files.items()
+                if path.startswith(prefix) and ("/" not in path[len(prefix) :])}
+
+    def locate(self, component: str, filename: str):
+        """
+        Find the file to download for the given one: among its compressed variants (see "`COMPRESSIONS`"),
+        the smallest one. Files without a compression extension are looked up as they are.\n
+        Inputs:
+        - `component` (`str`): Component of the file (e.g.: "main").\n
+        - `filename` (`str`): Name of the file, with any compression extension (e.g.: "Contents-amd64.gz").\n
+        Outputs:
+        - `variant` (`tuple[str, int, str]`): Name, size and SHA256 hash of the file to download. "`None`"
+            when no variant is listed.
+        """
+        prefix = component.strip("/") + "/"
+        stem = next((filename[: -len(ext)] for ext in self.COMPRESSIONS if filename.endswith(ext)), None)
+        names = [filename] if (stem is None) else [stem + ext for ext in self.COMPRESSIONS]
+        found = [(name, *self.files[prefix + name]) for name in names if (prefix + name) in self.files]
+        # Smallest download first. Ties go to the first compression, the fastest to decompress.
+        return min(found, key = lambda variant: variant[1], default = None)
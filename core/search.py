@@ -0,0 +1,191 @@
+import sys, re
+import numpy as np
+
+sys.path.append("./")
+from utils.constants import *
+from core.index import ContentsIndex, StringTable, ranges
+
+try: from re import _parser as sre_parse # Python 3.11 onwards.
+except ImportError: import sre_parse
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████████   Path search   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class PathSearch:
+    """
+    Queries of "which packages ship this file", like "`apt-file search`", over a "`ContentsIndex`".
+    Every kind of query has its own structure, so that none of them scans all filenames:
+     - "exact": binary search on the sorted filename table (no extra memory at all).
+     - "prefix": filenames sharing a prefix are contiguous in that same table: two binary searches.
+     - "basename": table of distinct basenames, with the filenames of each one in CSR layout.
+     - "substring" / "regex": trigram index over the raw bytes of the filenames. The trigrams of the
+        query (or of the literal parts of the pattern) narrow down candidates, which are then checked.\n
+    The basename and trigram structures are built on first use, with vectorized NumPy operations.
+    Inputs:
+     - "`index`" (`ContentsIndex`): The index to search on.\n
+    Methods:
+     - "`search`" (method, `Series`) to run a query and get the matching filenames with their packages.
+     - "`exact`" / "`prefix`" / "`basename`" / "`substring`" / "`regex`" (methods, `ndarray`) to get
+        the IDs of the matching filenames only.
+    """
+    MODES = SEARCH_MODES
+    # Candidates few enough to be checked one by one, rather than intersected with more trigrams.
+    FEW_CANDIDATES = 1 << 12
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, index: ContentsIndex):
+
+        self._index = index
+        self._basenames = self._basename_offsets = self._basename_paths = None
+        self._grams = None # Sorted "trigram << 32 | filename ID" keys.
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def search(self, query: str, mode: str = "exact", limit: int = None):
+        """
+        Find the filenames matching a query, and the packages which ship them.\n
+        Inputs:
+        - `query` (`str`): Filename, prefix, basename, substring or regular expression, depending on "`mode`".\n
+        - `mode` (`str`): One of "`MODES`".\n
+        - `limit` (`int`): Maximum amount of filenames to return (sorted alphabetically). All when not given.\n
+        Outputs:
+        - `table` (`Series`): Packages of each matching filename, like "`DebianContentIndex.table_file_packs`".
+        """
+        from pandas import Series, Index
+        if mode not in self.MODES:
+            raise ValueError(f"\"{mode}\" is not a search mode. Please use one of these: {', '.join(self.MODES)}")
+        ids = getattr(self, mode)(query)[: limit]
+        files = Index([self._index.paths[i] for i in ids], name = "filename", dtype = object)
+        return Series(data = self.packs_of_ids(ids), index = files, name = "packages", dtype = object)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def packs_of_ids(self, ids: np.ndarray):
+        """Packages of each given filename ID (a filename may appear in several rows)."""
+        index = self._index
+        index._invert_paths()
+        starts = index._path_offsets[ids]
+        lengths = index._path_offsets[np.asarray(ids, dtype = np.int64) + 1] - starts
+        rows = index._path_rows[ranges(starts, lengths)]
+        row_starts = index.file_offsets[rows]
+        row_lengths = index.file_offsets[rows + 1] - row_starts
+        packs = index.file_packs[ranges(row_starts, row_lengths)].tolist()
+        # Split back by filename: amount of packages of each filename is the sum over its rows.
+        bounds = np.zeros(len(ids) + 1, dtype = np.int64)
+        np.cumsum(np.add.reduceat(row_lengths, np.cumsum(lengths) - lengths) if len(rows) else
+                  np.zeros(len(ids), dtype = np.int64), out = bounds[1 :])
+        bounds = bounds.tolist()
+        return [[index.packs[p] for p in packs[a : b]] for a, b in zip(bounds[: -1], bounds[1 :])]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def exact(self, path: str):
+        """ID of the given filename, if indexed (as an array, like the other queries)."""
+        i = self._index.paths.find(path)
+        return np.arange(i, i + 1 if (i >= 0) else i, dtype = np.int64)
+
+    def prefix(self, prefix: str):
+        """IDs of the filenames starting with the given prefix (e.g.: a directory)."""
+        return np.arange(*self._index.paths.prefix_range(prefix), dtype = np.int64)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def basename(self, name: str):
+        """IDs of the filenames whose last component is the given name."""
+        self._build_basenames()
+        b = self._basenames.find(name)
+        if (b < 0): return np.zeros(0, dtype = np.int64)
+        return self._basename_paths[self._basename_offsets[b] : self._basename_offsets[b + 1]]
+
+    def _build_basenames(self):
+        """[PRIVATE] Intern the basenames, with the filenames of each one in CSR layout."""
+        if self._basenames is not None: return
+        names = [path.rpartition("/")[2] for path in self._index.paths.to_array()]
+        self._basenames, ids = StringTable.build(names)
+        offsets = np.zeros(len(self._basenames) + 1, dtype = np.int64)
+        np.cumsum(np.bincount(ids, minlength = len(self._basenames)), out = offsets[1 :])
+        # Stable sort: filenames of each basename stay sorted.
+        self._basename_paths = np.argsort(ids, kind = "stable").astype(np.int64)
+        self._basename_offsets = offsets
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def substring(self, text: str):
+        """IDs of the filenames containing the given text."""
+        candidates = self._candidates([text.encode("utf-8")])
+        return self._verify(candidates, lambda path: text in path)
+
+    def regex(self, pattern: str):
+        """IDs of the filenames matching the given regular expression anywhere (like "`re.search`")."""
+        compiled = re.compile(pattern)
+        candidates = self._candidates(self._literals(compiled))
+        return self._verify(candidates, lambda path: compiled.search(path) is not None)
+
+    def _verify(self, candidates: np.ndarray, check):
+        """[PRIVATE] Keep the candidate IDs whose filename passes the check."""
+        data, offsets = self._index.paths.arrays
+        bounds = zip(offsets[candidates].tolist(), offsets[candidates + 1].tolist())
+        keep = [check(data[a : b].tobytes().decode("utf-8")) for a, b in bounds]
+        return candidates[np.array(keep, dtype = bool)] if keep else candidates
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _candidates(self, literals: list):
+        """[PRIVATE] IDs of the filenames holding all trigrams of all given byte strings."""
+        grams = {gram for literal in literals for gram in self._trigrams(literal)}
+        if not grams: # Too short to narrow anything down: every filename is a candidate.
+            return np.arange(len(self._index.paths), dtype = np.int64)
+        self._build_grams()
+        candidates = None
+        # Rarest trigrams first: the intersection shrinks as fast as possible.
+        spans = sorted((np.searchsorted(self._grams, np.array([g << 32, (g + 1) << 32], dtype = np.uint64)) for g in grams),
+                       key = lambda span: span[1] - span[0])
+        for lo, hi in spans:
+            ids = (self._grams[lo : hi] & 0xFFFFFFFF).astype(np.int64)
+            candidates = ids if (candidates is None) else np.intersect1d(candidates, ids, assume_unique = True)
+            if (len(candidates) <= self.FEW_CANDIDATES): break
+        return candidates
+
+    @staticmethod
+    def _trigrams(literal: bytes):
+        """[PRIVATE] Trigrams of a byte string, as 24-bit integers."""
+        return [(literal[i] << 16) | (literal[i + 1] << 8) | literal[i + 2] for i in range(len(literal) - 2)]
+
+    def _build_grams(self):
+        """[PRIVATE] Build the trigram index: every distinct (trigram, filename ID) pair, sorted."""
+        if self._grams is not None: return
+        data, offsets = self._index.paths.arrays
+        data = data.astype(np.uint64)
+        lengths = np.diff(offsets)
+        n_paths, keys, first = len(lengths), [], 0
+        # Filenames go by batches, so that temporary arrays stay bounded.
+        while first < n_paths:
+            last = int(np.searchsorted(offsets, offsets[first] + SEARCH_GRAM_BATCH, side = "right"))
+            last = min(max(last - 1, first + 1), n_paths)
+            n_grams = np.maximum(lengths[first : last] - 2, 0)
+            # Start of every trigram (those which do not cross a filename boundary), and its filename.
+            starts = ranges(offsets[first : last], n_grams)
+            ids = np.repeat(np.arange(first, last, dtype = np.uint64), n_grams)
+            grams = (data[starts] << 16) | (data[starts + 1] << 8) | data[starts + 2]
+            keys.append(np.unique((grams << 32) | ids))
+            first = last
+        # Batches hold different filenames, so their pairs are already distinct.
+        self._grams = np.sort(np.concatenate(keys)) if keys else np.zeros(0, dtype = np.uint64)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @staticmethod
+    def _literals(compiled: re.Pattern):
+        """
+        [PRIVATE] Literal strings (UTF-8 encoded) which any match of the pattern must contain: runs of
+        plain characters at the top level of the pattern. Anything else (groups, repetitions,
+        alternatives...) just ends a run. Case-insensitive patterns give none.
+        """
+        if compiled.flags & re.IGNORECASE: return []
+        literals, run = [], ""
+        for op, value in sre_parse.parse(compiled.pattern, compiled.flags):
+            if (op is sre_parse.LITERAL): run += chr(value)
+            else: literals, run = literals + [run], ""
+        return [literal.encode("utf-8") for literal in literals + [run]]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @property
+    def nbytes(self):
+        """Memory held by the structures built so far, in bytes."""
+        arrays = [self._basename_offsets, self._basename_paths, self._grams]
+        basenames = 0 if (self._basenames is None) else self._basenames.nbytes
+        return basenames + sum(a.nbytes for a in arrays if a is not None)
@@ -0,0 +1,279 @@
+import sys, re, json, time, asyncio
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.append("./")
+from utils.constants import *
+from core.base import DebianDownloader
+from core.content import DebianContentIndex
+from core.index import select_top
+from core.instrument import StageReport
+from core.search import PathSearch
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████████████   Resident service   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class IndexServer:
+    """
+    Resident service which keeps the index of each configured architecture in memory, and answers queries
+    over a local HTTP/JSON API (built on "`asyncio`", no framework needed). Use as an asynchronous context
+    manager, or "`await run()`" to serve until cancelled:
+     - "`GET /health`": whether each architecture is ready.
+     - "`GET /archs`": version, size and build report (see "`StageReport`") of each index.
+     - "`GET /ranking?arch=amd64&top=10`": packages with the most files.
+     - "`GET /files?arch=amd64&package=devel/piglit`": filenames of a package.
+     - "`GET /packages?arch=amd64&path=usr/bin/ls&mode=exact&limit=10`": packages of the matching filenames
+        (modes as in "`PathSearch`").
+     - "`POST /refresh?arch=amd64`": check the mirror now (all architectures when not given).\n
+    "`arch`" defaults to the first configured architecture. Indexes are built in worker threads, so queries
+    keep being answered meanwhile (with "503" for architectures not built yet). Every "`refresh`" seconds, the
+    "`Release`" file is fetched again: an index is only rebuilt when the size or hash of its contents-index file
+    changed, and then swapped in at once. Requests already running keep the index they started with.\n
+    Inputs:
+     - "`archs`" (`list[str]`): Architectures to serve.
+     - "`host`" / "`port`" (`str` / `int`): Address to listen on. Port "0" picks a free one (see "`port`").
+     - "`refresh`" (`float`): Seconds between checks of the mirror. "`None`" (or 0) disables them.
+     - Any other keyword argument ("`mirror`", "`suite`", "`cache`"...) is passed to "`DebianContentIndex`".
+    """
+    class NotReady(Exception): pass
+    class BadRequest(Exception): pass
+    class NotFound(Exception): pass
+    class MethodNotAllowed(Exception): pass
+
+    # Search modes which may need to build a large structure first: run outside of the event loop.
+    MODES_SLOW = ("substring", "regex")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, archs: list, host: str = SERVE_HOST, port: int = SERVE_PORT,
+                       refresh: float = SERVE_REFRESH_SECONDS, **kwargs):
+
+        if not archs: raise ValueError("At least one architecture is needed.")
+        self._archs, self._host, self._port, self._refresh = list(archs), host, port, refresh
+        self._options = kwargs
+        self._snapshots = {}    # Architecture: its current index and everything derived from it.
+        self._errors = {}       # Architecture: last error of its builds or checks.
+        self._locks = {}        # Architecture: lock of its builds, created within the event loop.
+        self._server, self._tasks = None, set() # Background tasks, each one kept until done.
+        self._pending = {}      # Architecture: task of its last background refresh.
+        self._routes = {("GET", "/health"): self.get_health, ("GET", "/archs"): self.get_archs,
+                        ("GET", "/ranking"): self.get_ranking, ("GET", "/files"): self.get_files,
+                        ("GET", "/packages"): self.get_packages}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    async def start(self):
+        """Start listening, and building the indexes in the background."""
+        self._locks = {arch: asyncio.Lock() for arch in self._archs}
+        self._server = await asyncio.start_server(self._serve, self._host, self._port)
+        for arch in self._archs: self._refresh_later(arch)
+        if self._refresh: self._spawn(self._refresh_loop())
+
+    async def run(self):
+        """Serve until cancelled (starting first, if not done yet)."""
+        if self._server is None: await self.start()
+        try: await self._server.serve_forever()
+        finally: await self.close()
+
+    async def close(self):
+        """Stop listening and refreshing. Builds already running in worker threads are left to finish."""
+        for task in list(self._tasks): task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    @property
+    def port(self):
+        """Port actually listened on."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def ready(self):
+        """Wait until every architecture got its first index (or failed to)."""
+        while any((arch not in self._snapshots) and (arch not in self._errors) for arch in self._archs):
+            await asyncio.sleep(0.01)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    async def refresh(self, arch: str, force: bool = False):
+        """
+        Build the index of an architecture if there is none yet, or if its contents-index file changed on the
+        mirror (or anyway, if "`force`"), and swap it in. Errors are kept for "`/health`", and the previous
+        index keeps being served.\n
+        Outputs:
+        - `built` (`bool`): Whether a new index was swapped in.
+        """
+        async with self._locks[arch]: # A single build at a time per architecture.
+            try:
+                current = self._snapshots.get(arch)
+                if (current is not None) and not force:
+                    version = await asyncio.to_thread(self._check, current["filename"])
+                    if (version == current["version"]): return False
+                snapshot = await asyncio.to_thread(self._build, arch)
+            except Exception as error:
+                self._errors[arch] = f"{type(error).__name__}: {error}"
+                print(f"Index of \"{arch}\" not refreshed. {self._errors[arch]}", file = sys.stderr)
+                return False
+            self._snapshots[arch] = snapshot # Swapped at once: readers get either the old or the new one.
+            self._errors.pop(arch, None)
+            return True
+
+    def _spawn(self, coroutine):
+        """[PRIVATE] Run a coroutine in the background. Its task is only kept until it is done."""
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _refresh_later(self, arch: str):
+        """[PRIVATE] Refresh an architecture in the background, unless a refresh of it is pending already."""
+        task = self._pending.get(arch)
+        if (task is None) or task.done(): self._pending[arch] = task = self._spawn(self.refresh(arch))
+        return task
+
+    async def _refresh_loop(self):
+        """[PRIVATE] Check the mirror every "`refresh`" seconds."""
+        while True:
+            await asyncio.sleep(self._refresh)
+            await asyncio.gather(*(self.refresh(arch) for arch in self._archs))
+
+    def _check(self, filename: str):
+        """[PRIVATE] Current version of a file on the mirror (fetches the "`Release`" file only)."""
+        options = {key: value for key, value in self._options.items() if (key != "udeb")}
+        return DebianDownloader(**options).version(filename)
+
+    def _build(self, arch: str):
+        """
+        [PRIVATE] Build the index of an architecture, and everything queries need from it: search structures
+        and file counts are built here (in a worker thread) rather than on the first query.
+        """
+        with StageReport() as report:
+            obj = DebianContentIndex(arch = arch, report = report, **self._options)
+            with report.stage("warm_up"):
+                index = obj.index
+                search = PathSearch(index)
+                index.pack_offsets          # "package -> rows" side.
+                index._invert_paths()       # "filename -> rows" side.
+                search.basename("")         # Basename table.
+                counts = index.counts()
+        return {"obj": obj, "index": index, "search": search, "counts": counts, "filename": obj.filename,
+                "version": obj.version(obj.filename), "built": time.time(), "report": report.to_dict()}
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _snapshot(self, query: dict):
+        """[PRIVATE] Current index of the requested architecture (first one by default)."""
+        arch = self._param(query, "arch", self._archs[0])
+        if arch not in self._archs:
+            raise self.NotFound(f"\"{arch}\" is not served. Served: {', '.join(self._archs)}")
+        if (snapshot := self._snapshots.get(arch)) is None:
+            raise self.NotReady(self._errors.get(arch, f"Index of \"{arch}\" is being built."))
+        return arch, snapshot
+
+    @classmethod
+    def _param(cls, query: dict, name: str, default = None, kind: type = str):
+        """[PRIVATE] Single value of a query parameter, converted to the given type."""
+        values = query.get(name)
+        if not values:
+            if default is ...: raise cls.BadRequest(f"Missing parameter: \"{name}\".")
+            return default
+        try: return kind(values[-1])
+        except ValueError: raise cls.BadRequest(f"Invalid parameter: \"{name}\".")
+
+    def get_health(self, query: dict):
+        """"`/health`": whether each architecture is ready, and its last error if any."""
+        return {"ready": {arch: (arch in self._snapshots) for arch in self._archs}, "errors": self._errors}
+
+    def get_archs(self, query: dict):
+        """"`/archs`": version, size and build report of each index."""
+        return {arch: {"filename": snapshot["filename"], "version": snapshot["version"], "built": snapshot["built"],
+                       "lines": len(snapshot["index"]), "files": len(snapshot["index"].paths),
+                       "packages": len(snapshot["index"].packs), "report": snapshot["report"]}
+                for arch, snapshot in self._snapshots.items()}
+
+    def get_ranking(self, query: dict):
+        """"`/ranking`": packages with the most files (file counts are computed once per index)."""
+        arch, snapshot = self._snapshot(query)
+        top = self._param(query, "top", 10, int)
+        if (top < 1): raise self.BadRequest("\"top\" must be a positive integer.")
+        ids = select_top(snapshot["counts"], top)
+        packs = snapshot["index"].packs
+        return {"arch": arch, "ranking": [{"package": packs[p], "files": int(snapshot["counts"][p])} for p in ids]}
+
+    def get_files(self, query: dict):
+        """"`/files`": filenames of a package."""
+        arch, snapshot = self._snapshot(query)
+        package = self._param(query, "package", ...)
+        if (snapshot["index"].packs.find(package) < 0): raise self.NotFound(f"Unknown package: \"{package}\".")
+        return {"arch": arch, "package": package, "files": snapshot["index"].files_of(package)}
+
+    def get_packages(self, query: dict):
+        """"`/packages`": packages of the filenames matching a query (see "`PathSearch`")."""
+        arch, snapshot = self._snapshot(query)
+        path, mode = self._param(query, "path", ...), self._param(query, "mode", "exact")
+        limit = self._param(query, "limit", None, int)
+        if mode not in PathSearch.MODES:
+            raise self.BadRequest(f"\"{mode}\" is not a search mode. Use one of: {', '.join(PathSearch.MODES)}")
+        search, paths = snapshot["search"], snapshot["index"].paths
+        try: ids = getattr(search, mode)(path)[: limit]
+        except re.error as error: raise self.BadRequest(f"Invalid regular expression: {error}")
+        return {"arch": arch, "results": [{"path": paths[i], "packages": packs}
+                                          for i, packs in zip(ids.tolist(), search.packs_of_ids(ids))]}
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    async def handle(self, method: str, target: str):
+        """
+        Answer a single request.\n
+        Inputs:
+        - `method` (`str`): HTTP method ("GET" or "POST").\n
+        - `target` (`str`): Path and query string (e.g.: "/ranking?top=5").\n
+        Outputs:
+        - `status` (`HTTPStatus`): Status of the response.\n
+        - `body` (`dict`): Content of the response, to be sent as JSON.
+        """
+        url = urlsplit(target)
+        query = parse_qs(url.query, keep_blank_values = True)
+        try:
+            if (method, url.path) == ("POST", "/refresh"):
+                archs = [self._param(query, "arch", None)] if ("arch" in query) else self._archs
+                if any(arch not in self._archs for arch in archs):
+                    raise self.NotFound(f"\"{archs[0]}\" is not served. Served: {', '.join(self._archs)}")
+                for arch in archs: self._refresh_later(arch)
+                return HTTPStatus.ACCEPTED, {"refreshing": archs}
+            if (route := self._routes.get((method, url.path))) is None:
+                known = any(path == url.path for _, path in self._routes) or (url.path == "/refresh")
+                raise (self.MethodNotAllowed if known else self.NotFound)(f"No route for {method} {url.path}.")
+            if self._param(query, "mode", None) in self.MODES_SLOW: # Trigram index is built on first use.
+                return HTTPStatus.OK, await asyncio.to_thread(route, query)
+            return HTTPStatus.OK, route(query)
+        except self.BadRequest as error: return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except self.NotFound as error: return HTTPStatus.NOT_FOUND, {"error": str(error)}
+        except self.MethodNotAllowed as error: return HTTPStatus.METHOD_NOT_ALLOWED, {"error": str(error)}
+        except self.NotReady as error: return HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(error)}
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """[PRIVATE] Answer the requests of a connection (kept alive, as in HTTP/1.1), one after the other."""
+        try:
+            while (line := await reader.readline()):
+                method, target, version = (line.decode("latin-1").split() + ["", "", ""])[: 3]
+                headers = {}
+                while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                await reader.readexactly(int(headers.get("content-length", 0) or 0)) # Body is not used.
+                if not version.startswith("HTTP/"):
+                    status, body = HTTPStatus.BAD_REQUEST, {"error": "Malformed request line."}
+                else: status, body = await self.handle(method, target)
+                close = (headers.get("connection", "").lower() == "close") or (version == "HTTP/1.0")
+                payload = json.dumps(body).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\nConnection: {'close' if close else 'keep-alive'}"
+                             "\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if close: break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError): pass # Client went away, or garbage.
+        finally:
+            writer.close()
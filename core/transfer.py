@@ -0,0 +1,164 @@
+import os, sys, json, time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import mkstemp
+from threading import Lock, Event
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████   Ranged transfer   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class RangedTransfer:
+    """
+    Download of a single large file through several concurrent HTTP "`Range`" requests, into a local file.
+    The progress of each part is kept in a small JSON file next to it, so that an interrupted transfer
+    resumes from the bytes already on disk (as long as the file did not change on the mirror meanwhile).
+    Inputs:
+     - "`session`" (`requests.Session`): Session to send the requests with (pooled connections).
+     - "`url`" (`str`): The URL of the file.
+     - "`path`" (`str`): Local file where the parts are written. Its progress goes to "`path + .json`".
+     - "`size`" (`int`): Size of the file in bytes.
+     - "`validator`" (`str`): "`ETag`" (or "`Last-Modified`") of the file. Sent as "`If-Range`", and
+        compared with the one of a previous attempt before resuming it.
+     - "`workers`" (`int`): Amount of parts, downloaded concurrently.
+     - "`retries`" (`int`): Times a part is resumed after its connection broke.
+     - "`backoff`" (`float`): Seconds to wait before the first resumption. Doubled every time.\n
+    Methods:
+     - "`chunks`" (method, `Iterator[bytes]`) to run the transfer, and get the content in order.
+    """
+    class RangeNotHonored(Exception): pass
+
+    SUFFIX_PROGRESS = ".json"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, session, url: str, path: str, size: int, validator: str, workers: int = RANGE_WORKERS,
+                       retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF, timeout: float = HTTP_TIMEOUT):
+
+        self._session, self._url, self._path = session, url, path
+        self._size, self._validator = size, validator
+        self._workers, self._retries, self._backoff, self._timeout = workers, retries, backoff, timeout
+        self._lock, self._stop = Lock(), Event()
+        # Each part is "[start, end, bytes done]".
+        self._parts = self._load_progress()
+        self.resumed = self._parts is not None
+        if not self.resumed:
+            bounds = [size * i // workers for i in range(workers + 1)]
+            self._parts = [[a, b, 0] for a, b in zip(bounds[: -1], bounds[1 :]) if (b > a)]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _load_progress(self):
+        """[PRIVATE] Parts of a previous attempt at the same file, if there is one to resume."""
+        try:
+            with open(self._path + self.SUFFIX_PROGRESS, "r") as file:
+                progress = json.load(file)
+            if (os.path.getsize(self._path) != self._size): return None
+        except (OSError, ValueError):
+            return None
+        same = (progress.get("url"), progress.get("size"), progress.get("validator")) == \
+               (self._url, self._size, self._validator)
+        return progress["parts"] if same else None
+
+    def _save_progress(self):
+        """[PRIVATE] Write the progress of every part, atomically (callers hold the lock)."""
+        folder = os.path.dirname(os.path.abspath(self._path))
+        handle, path_temp = mkstemp(dir = folder, suffix = ".tmp")
+        with os.fdopen(handle, "w") as file:
+            json.dump({"url": self._url, "size": self._size, "validator": self._validator,
+                       "parts": self._parts}, file)
+        os.replace(path_temp, self._path + self.SUFFIX_PROGRESS)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def chunks(self, first = None, chunk_size: int = CHUNK_SIZE):
+        """
+        Run the transfer. Parts are downloaded concurrently, but the content is yielded in order:
+        each part as soon as the previous ones are done. The first part may be streamed straight
+        from an already open response, so that the caller gets the beginning of the file right away.\n
+        Inputs:
+        - `first` (`requests.Response`): Open (streaming) response of the whole file, if any. Only
+            the first part is read from it.\n
+        - `chunk_size` (`int`): Size in bytes of each chunk read from the network and yielded.\n
+        Outputs:
+        - `chunks` (`Iterator[bytes]`): Consecutive pieces of the file.
+        """
+        if not self.resumed: # Room for all parts, so that each one is written in place.
+            with open(self._path, "wb") as file: file.truncate(self._size)
+            with self._lock: self._save_progress()
+        threads = ThreadPoolExecutor(max_workers = max(len(self._parts) - 1, 1))
+        try:
+            futures = {i: threads.submit(self._fetch_part, i, chunk_size) for i in range(1, len(self._parts))}
+            streamed = 0 # Bytes of the first part already yielded from "first".
+            if (first is not None) and self._parts and not self._parts[0][2]:
+                streamed = yield from self._stream_first(first, chunk_size)
+            elif first is not None: first.close()
+            for i, (start, end, _) in enumerate(self._parts):
+                if (i == 0): self._fetch_part(0, chunk_size) # Whatever "first" did not bring.
+                else: futures[i].result()
+                yield from self._read(start + streamed * (i == 0), end, chunk_size)
+        finally:
+            self._stop.set() # Abandoned or failed: remaining parts stop, and keep their progress.
+            threads.shutdown(wait = True)
+        os.remove(self._path + self.SUFFIX_PROGRESS)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _stream_first(self, response, chunk_size: int):
+        """[PRIVATE] Write and yield the first part from the response of the whole file."""
+        import requests
+        start, end, _ = self._parts[0]
+        streamed = 0
+        try:
+            with open(self._path, "r+b") as file:
+                for chunk in response.iter_content(chunk_size = chunk_size):
+                    chunk = chunk[: end - start - streamed]
+                    file.seek(start + streamed)
+                    file.write(chunk)
+                    file.flush() # On disk before it is recorded as done.
+                    streamed += len(chunk)
+                    with self._lock:
+                        self._parts[0][2] = streamed
+                        self._save_progress()
+                    yield chunk
+                    if (streamed == end - start): break
+        except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+            pass # The rest of the part is requested again.
+        finally:
+            response.close()
+        return streamed
+
+    def _fetch_part(self, i: int, chunk_size: int):
+        """[PRIVATE] Download whatever is missing of a part, resuming it when the connection breaks."""
+        import requests
+        start, end, _ = self._parts[i]
+        for attempt in range(self._retries + 1):
+            done = self._parts[i][2]
+            if (done >= end - start) or self._stop.is_set(): return
+            headers = {"Range": f"bytes={start + done}-{end - 1}", "If-Range": self._validator}
+            try:
+                with self._session.get(self._url, headers = headers, stream = True, timeout = self._timeout) as resp, \
+                     open(self._path, "r+b") as file:
+                    resp.raise_for_status()
+                    if (resp.status_code != 206): # Mirror ignored the range, or the file changed.
+                        raise self.RangeNotHonored(f"\"{self._url}\" answered {resp.status_code} to a range.")
+                    file.seek(start + done)
+                    for chunk in resp.iter_content(chunk_size = chunk_size):
+                        if self._stop.is_set(): return
+                        file.write(chunk)
+                        file.flush() # On disk before it is recorded as done.
+                        with self._lock:
+                            self._parts[i][2] += len(chunk)
+                            self._save_progress()
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                if (attempt == self._retries): raise
+                time.sleep(self._backoff * 2 ** attempt)
+        if (self._parts[i][2] < end - start) and not self._stop.is_set():
+            raise requests.ConnectionError(f"\"{self._url}\" ended before bytes {start}-{end - 1} arrived.")
+
+    def _read(self, start: int, end: int, chunk_size: int):
+        """[PRIVATE] Read a range of the local file, chunk by chunk."""
+        with open(self._path, "rb") as file:
+            file.seek(start)
+            while (start < end):
+                chunk = file.read(min(chunk_size, end - start))
+                start += len(chunk)
+                yield chunk
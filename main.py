@@ -1,47 +1,18 @@
-import os, sys
+import os, sys, re
 sys.path.append("./")
 
+# Only light modules are imported here: "--help" and wrong arguments must answer right away.
+# The core ones (and so Pandas, NumPy and Requests) are imported once arguments are validated.
 from argparse import ArgumentParser
-from core.content import DebianContentIndex
 from utils.constants import *
 
-if (__name__ == "__main__"):
-
-    args = ArgumentParser(prog = "Debian Package Statistics",
-        epilog = "By Gaston Solari Loudet, for Canonical recruitment process",
-        description = """
-            Gets a ranking of the largest packages in the Debian distribution
-            for each one of the approved processor architectures. The ranking
-            is based on the number of files included in the package.
-        """)
-    
-    # Leftmost positional parameter: the architecture name itself - optional.
-    help = f"[str] Architecture to be analyzed. Default: \"{ARCH_LOCAL_MACHINE}\""
-    args.add_argument("arch", nargs = "?", type = str, default = None, help = help)
-
-    # Second named parameter: numbers of packages to appear on ranking - optional.
-    help = f"[int] Amount of packages to appear on the ranking. Default: 10"
-    args.add_argument("-n", "--top", type = int, default = 10, help = help)
-
-    # Third named parameter: whether to store .
-    help = f"[flag] Whether to store the \"package-filenames\" JSON in temp folder."
-    args.add_argument("-j", "--json", action = "store_true", help = help)
-
-    # Parse specified arguments in the given order.
-    args = args.parse_args()
-    arch = getattr(args, "arch")
-    top = getattr(args, "top")
-    flag = getattr(args, "json")
-
-    # Instantiate the core class and get the ranking.
-    print("Please wait a few moments...")
-    obj = DebianContentIndex(arch = arch)
-    ranking = obj.get_ranking(top = top)
-
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def print_ranking(ranking, arch: str, top: int):
+    """Print the ranking of one architecture as a table."""
     print(SEPARATOR)
     # Some early verbose.
     print(f"Ranking of the largest top {top} packages in the Debian",
-          f"distribution for the given architecture: \"{obj.arch}\"")
+          f"distribution for the given architecture: \"{arch}\"")
     print("(based on file count - amount of files in package)")
 
     # Get the longest package name and later left-justify based on it.
@@ -63,5 +34,439 @@ if (__name__ == "__main__"):
 
     print(SEPARATOR)
 
-    if flag: # If JSON flag enabled, store JSON in temp folder.
-        obj.save_package_json(f"./temp/pack-files-{obj.arch}.json")
\ No newline at end of file
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def print_metric(labels: list, counts, by: str, arch: str, top: int):
+    """Print one table of the metrics of an architecture (see "`IndexMetrics`")."""
+    titles = {"package": ("Package name", "File count"), "section": ("Section", "File count"),
+              "directory": ("Directory", "File count"), "size": ("Files in package", "Packages"),
+              "shared": ("Packages of file", "Files")}
+    print(SEPARATOR)
+    if by in ("size", "shared"): print(f"Histogram of \"{by}\" for the given architecture: \"{arch}\"")
+    else: print(f"Ranking of the largest top {top} by \"{by}\" for the given architecture: \"{arch}\"")
+    headers = titles[by]
+    width = max([len(headers[0])] + list(map(len, labels)))
+    print("", headers[0].ljust(width + 1) + headers[1],
+          ("‾" * len(headers[0])).ljust(width + 1) + "‾" * len(headers[1]), sep = "\n")
+    for label, count in zip(labels, counts):
+        print(label.ljust(width), count)
+    print(SEPARATOR)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def main_search(argv: list):
+    """"`search`" subcommand: which packages ship the given files (like "`apt-file search`")."""
+    args = ArgumentParser(prog = "Debian Package Statistics - search",
+        description = """
+            Finds which packages ship the files matching each query. The index is
+            stored after the first run, and reopened almost instantly afterwards.
+        """)
+
+    help = "[str] Filenames (or prefixes, basenames...) to look for. \"-\" reads one per line from stdin."
+    args.add_argument("query", nargs = "+", type = str, help = help)
+
+    help = "[str] Kind of query: " + str.join(", ", SEARCH_MODES) + ". Default: \"exact\""
+    args.add_argument("-m", "--mode", choices = SEARCH_MODES, default = "exact", help = help)
+
+    help = f"[str] Architecture to search on. Default: \"{ARCH_LOCAL_MACHINE}\""
+    args.add_argument("-a", "--arch", type = str, default = ARCH_LOCAL_MACHINE, help = help)
+
+    help = "[int] Maximum amount of filenames to print per query. Default: all of them"
+    args.add_argument("-l", "--limit", type = int, default = None, help = help)
+
+    help = f"[flag] Build the index again, even if stored (\"{INDEX_PATH}\")."
+    args.add_argument("--refresh", action = "store_true", help = help)
+
+    help = "[flag] Use only previously downloaded files from the cache."
+    args.add_argument("--offline", action = "store_true", help = help)
+
+    parser, args = args, args.parse_args(argv)
+    if not re.fullmatch(REGEX_ARCH_NAME, args.arch):
+        parser.error(f"\"{args.arch}\" is not an architecture name.")
+    if (args.limit is not None) and (args.limit < 1):
+        parser.error("\"--limit\" must be a positive integer.")
+
+    from core.content import DebianContentIndex
+    path = INDEX_PATH.format(arch = args.arch)
+    if os.path.isfile(path) and not args.refresh:
+        obj = DebianContentIndex.open_index(path)
+    else: # First time: build the index and keep it for the next searches.
+        obj = DebianContentIndex(arch = args.arch, offline = args.offline)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        obj.save_index(path)
+
+    queries = args.query
+    if queries == ["-"]: queries = (line.strip() for line in sys.stdin)
+    for query in queries:
+        if not query: continue
+        found = obj.search(query, mode = args.mode, limit = args.limit)
+        if not found.shape[0]: print(f"{query}: not found", file = sys.stderr)
+        for filename, packages in found.items():
+            print(str.join(", ", packages) + ":", filename)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def main_serve(argv: list):
+    """"`serve`" subcommand: keep the indexes in memory, and answer queries over a local HTTP/JSON API."""
+    args = ArgumentParser(prog = "Debian Package Statistics - serve",
+        description = """
+            Builds the index of each given architecture once, keeps it in memory and serves rankings,
+            "package -> filenames" and "filename -> packages" queries over HTTP (JSON). The mirror is
+            checked periodically, and an index is rebuilt in the background when its file changed.
+        """)
+
+    help = f"[str] Architecture(s) to serve. Default: \"{ARCH_LOCAL_MACHINE}\""
+    args.add_argument("arch", nargs = "*", type = str, default = None, help = help)
+
+    help = f"[str] Address to listen on. Default: \"{SERVE_HOST}\""
+    args.add_argument("--host", type = str, default = SERVE_HOST, help = help)
+
+    help = f"[int] Port to listen on. Default: {SERVE_PORT}"
+    args.add_argument("-p", "--port", type = int, default = SERVE_PORT, help = help)
+
+    help = f"[float] Seconds between checks of the mirror (0 disables them). Default: {SERVE_REFRESH_SECONDS}"
+    args.add_argument("-r", "--refresh", type = float, default = SERVE_REFRESH_SECONDS, help = help)
+
+    help = f"[str] Base URL of the Debian mirror. Default: \"{DEBIAN_MIRROR}\""
+    args.add_argument("--mirror", type = str, default = None, help = help)
+    help = f"[str] Suite to serve. Default: \"{DEBIAN_SUITE}\""
+    args.add_argument("--suite", type = str, default = None, help = help)
+    help = f"[str] Component to serve. Default: \"{DEBIAN_COMPONENT}\""
+    args.add_argument("--component", type = str, default = None, help = help)
+
+    help = f"[flag] Do not use nor fill the cache of downloaded files."
+    args.add_argument("--no-cache", action = "store_true", help = help)
+
+    parser, args = args, args.parse_args(argv)
+    archs = args.arch or [ARCH_LOCAL_MACHINE]
+    for name in archs:
+        if not re.fullmatch(REGEX_ARCH_NAME, name):
+            parser.error(f"\"{name}\" is not an architecture name.")
+    for name in filter(None, (args.suite, args.component)):
+        if not re.fullmatch(REGEX_DIST_NAME, name):
+            parser.error(f"\"{name}\" is not a suite nor component name.")
+    if (args.mirror is not None) and not re.match("https?://", args.mirror):
+        parser.error(f"\"{args.mirror}\" is not an HTTP(S) URL.")
+    if not (0 <= args.port < 65536):
+        parser.error("\"--port\" must be between 0 and 65535.")
+    if (args.refresh < 0):
+        parser.error("\"--refresh\" must not be negative.")
+
+    import asyncio
+    from core.server import IndexServer
+    server = IndexServer(archs, host = args.host, port = args.port, refresh = args.refresh,
+                         mirror = args.mirror and (args.mirror.rstrip("/") + "/"), suite = args.suite,
+                         component = args.component, cache = None if args.no_cache else CACHE_PATH)
+    async def serve():
+        await server.start()
+        print(f"Serving {', '.join(archs)} on http://{args.host}:{server.port}/ (indexes are being built)...")
+        await server.run()
+    try: asyncio.run(serve())
+    except KeyboardInterrupt: print("Stopped.")
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def main_compare(argv: list):
+    """"`compare`" subcommand: file count deltas and missing filenames between architectures."""
+    args = ArgumentParser(prog = "Debian Package Statistics - compare",
+        description = """
+            Compares the first architecture with each other one: packages whose file count differs, and
+            filenames present in only one of both. Also ranks the packages with the most files among
+            all of them. Every architecture is indexed once, with filenames and packages shared.
+        """)
+
+    help = "[str] Architectures to compare (at least 2). The first one is compared with the others."
+    args.add_argument("arch", nargs = "+", type = str, help = help)
+
+    help = "[int] Amount of packages to appear on the deltas and on the aggregated ranking. Default: 10"
+    args.add_argument("-n", "--top", type = int, default = 10, help = help)
+
+    help = "[int] Maximum amount of filenames to print per side (0 prints only how many). Default: 10"
+    args.add_argument("-l", "--limit", type = int, default = 10, help = help)
+
+    help = f"[str] Base URL of the Debian mirror. Default: \"{DEBIAN_MIRROR}\""
+    args.add_argument("--mirror", type = str, default = None, help = help)
+    help = f"[str] Suite to compare. Default: \"{DEBIAN_SUITE}\""
+    args.add_argument("--suite", type = str, default = None, help = help)
+    help = f"[str] Component to compare. Default: \"{DEBIAN_COMPONENT}\""
+    args.add_argument("--component", type = str, default = None, help = help)
+    help = f"[flag] Compare the installer packages (\"Contents-udeb-{{arch}}.gz\") instead."
+    args.add_argument("--udeb", action = "store_true", help = help)
+
+    help = "[flag] Use only previously downloaded files from the cache."
+    args.add_argument("--offline", action = "store_true", help = help)
+    help = f"[flag] Do not use nor fill the cache of downloaded files."
+    args.add_argument("--no-cache", action = "store_true", help = help)
+
+    parser, args = args, args.parse_args(argv)
+    if (len(set(args.arch)) < 2) or (len(set(args.arch)) < len(args.arch)):
+        parser.error("At least 2 distinct architectures are needed.")
+    for name in args.arch:
+        if not re.fullmatch(REGEX_ARCH_NAME, name):
+            parser.error(f"\"{name}\" is not an architecture name.")
+    for name in filter(None, (args.suite, args.component)):
+        if not re.fullmatch(REGEX_DIST_NAME, name):
+            parser.error(f"\"{name}\" is not a suite nor component name.")
+    if (args.mirror is not None) and not re.match("https?://", args.mirror):
+        parser.error(f"\"{args.mirror}\" is not an HTTP(S) URL.")
+    if (args.top < 1):
+        parser.error("\"--top\" must be a positive integer.")
+    if (args.limit < 0):
+        parser.error("\"--limit\" must not be negative.")
+    if args.offline and args.no_cache:
+        parser.error("\"--offline\" needs the cache. Remove \"--no-cache\".")
+
+    from core.compare import ArchComparison
+    print("Please wait a few moments...")
+    comparison = ArchComparison.fetch(args.arch, suite = args.suite, component = args.component, udeb = args.udeb,
+                                      mirror = args.mirror and (args.mirror.rstrip("/") + "/"),
+                                      cache = None if args.no_cache else CACHE_PATH, offline = args.offline)
+    first = args.arch[0]
+    for other in args.arch[1 :]:
+        print(SEPARATOR)
+        names, counts_a, counts_b = comparison.deltas(first, other, args.top)
+        print(f"Packages with a different file count between \"{first}\" and \"{other}\" (top {args.top}):")
+        width = max(map(len, names), default = 0)
+        for name, count_a, count_b in zip(names, counts_a, counts_b):
+            print(" ", name.ljust(width), f"{count_a :>8} {count_b :>8} {count_b - count_a :>+8}")
+        if not names: print("  (none)")
+        for a, b in ((first, other), (other, first)):
+            ids = comparison.only_in(a, b)
+            print(f"Filenames only in \"{a}\" (not in \"{b}\"): {len(ids)}")
+            for path in comparison.paths(ids, args.limit): print(" ", path)
+            if (len(ids) > args.limit > 0): print("  ...")
+    print(SEPARATOR)
+    names, counts = comparison.aggregate(args.top)
+    print(f"Packages with the most files among {', '.join(args.arch)} (top {args.top}):")
+    width = max(map(len, names), default = 0)
+    for name, count in zip(names, counts): print(" ", name.ljust(width), count)
+    print(SEPARATOR)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"):
+
+    # Subcommands go first. Otherwise, the first argument is an architecture.
+    if (sys.argv[1 :2] == ["search"]):
+        main_search(sys.argv[2 :])
+        sys.exit()
+    if (sys.argv[1 :2] == ["serve"]):
+        main_serve(sys.argv[2 :])
+        sys.exit()
+    if (sys.argv[1 :2] == ["compare"]):
+        main_compare(sys.argv[2 :])
+        sys.exit()
+
+    args = ArgumentParser(prog = "Debian Package Statistics",
+        epilog = "By Gaston Solari Loudet, for Canonical recruitment process",
+        description = """
+            Gets a ranking of the largest packages in the Debian distribution
+            for each one of the approved processor architectures. The ranking
+            is based on the number of files included in the package.
+        """)
+    
+    # Leftmost positional parameter: the architecture name(s) itself - optional.
+    help = f"[str] Architecture(s) to be analyzed (\"all\" stands for the arch-independent files)." \
+           f" Default: \"{ARCH_LOCAL_MACHINE}\""
+    args.add_argument("arch", nargs = "*", type = str, default = None, help = help)
+
+    # Whether to analyze every available architecture, instead of the given ones.
+    help = f"[flag] Analyze every available architecture, each one with its own ranking."
+    args.add_argument("--all-archs", action = "store_true", help = help)
+
+    # Second named parameter: numbers of packages to appear on ranking - optional.
+    help = f"[int] Amount of packages to appear on the ranking. Default: 10"
+    args.add_argument("-n", "--top", type = int, default = 10, help = help)
+
+    # What to rank: packages (default), or other metrics stored per version of the file.
+    help = f"[str] Rank by: {', '.join(METRICS_BY)} (the last two are histograms). Stored in \"{METRICS_PATH}\"" \
+           " and served from there while the file does not change."
+    args.add_argument("-b", "--by", choices = METRICS_BY, default = None, help = help)
+
+    # Third named parameter: whether to store the "package-filenames" relation, and its format.
+    formats = [fmt + ext for fmt in EXPORT_FORMATS for ext in ["", *("." + ext for ext in EXPORT_COMPRESSIONS)]]
+    help = f"[flag] Store the \"package-filenames\" JSON in temp folder (see \"--json-format\")."
+    args.add_argument("-j", "--json", action = "store_true", help = help)
+    help = f"[str] Format of the \"package-filenames\" JSON: {', '.join(formats)}. Default: json"
+    args.add_argument("--json-format", choices = formats, default = "json", help = help)
+
+    # Whether to store the index as a columnar table, for analytics tools.
+    tables = sorted(set(COLUMNAR_FORMATS.values()))
+    help = f"[flag] Store the index as a flat (path, package, section, arch) table (\"{COLUMNAR_PATH}\")."
+    args.add_argument("-c", "--columnar", action = "store_true", help = help)
+    help = f"[str] Format of the columnar table: {', '.join(tables)}. Default: parquet"
+    args.add_argument("--columnar-format", choices = tables, default = "parquet", help = help)
+
+    # Whether to store the index into a SQLite database shared by architectures, for concurrent readers.
+    help = f"[str] Store the index into a SQLite database (replacing the previous one of the architecture)." \
+           f" Default: {SQLITE_PATH}"
+    args.add_argument("--sqlite", nargs = "?", const = SQLITE_PATH, metavar = "PATH", help = help)
+
+    # Fourth named parameter: whether to avoid the network and use cached files only.
+    help = f"[flag] Use only previously downloaded files from the cache (\"{CACHE_PATH}\")."
+    args.add_argument("--offline", action = "store_true", help = help)
+
+    # Fifth named parameter: whether to skip the cache of downloaded files.
+    help = f"[flag] Do not use nor fill the cache of downloaded files."
+    args.add_argument("--no-cache", action = "store_true", help = help)
+
+    # Sixth named parameter: whether to update the index of the previous run instead of building it again.
+    help = f"[flag] Update the index of the previous run (\"{INDEX_PATH}\") and report changed packages."
+    args.add_argument("-u", "--incremental", action = "store_true", help = help)
+
+    # Whether to build the "package-filenames" relation out of core, within a memory budget.
+    help = "[int] Index within about this much memory (MiB), spilling sorted runs to temporary files and merging them."
+    args.add_argument("-m", "--memory-budget", type = int, default = None, metavar = "MIB", help = help)
+
+    # Worker processes parsing while the main one downloads and decompresses.
+    help = "[int] Parse (or count) with this many worker processes: per file, or batches of a single file."
+    args.add_argument("-w", "--workers", type = int, default = None, metavar = "N", help = help)
+
+    # Where the contents-index files come from: mirror, suite(s) and component(s).
+    help = f"[str] Base URL of the Debian mirror. Default: \"{DEBIAN_MIRROR}\""
+    args.add_argument("--mirror", type = str, default = None, help = help)
+    help = f"[str] Suite(s) to be analyzed (\"stable\", \"testing\", \"bookworm\"...). Default: \"{DEBIAN_SUITE}\""
+    args.add_argument("--suite", nargs = "+", type = str, default = None, help = help)
+    help = f"[str] Component(s) to be analyzed (\"main\", \"contrib\", \"non-free\"...). Default: \"{DEBIAN_COMPONENT}\""
+    args.add_argument("--component", nargs = "+", type = str, default = None, help = help)
+    help = f"[flag] Analyze the installer packages (\"Contents-udeb-{{arch}}.gz\") instead."
+    args.add_argument("--udeb", action = "store_true", help = help)
+
+    # Where time and memory go: report of each stage, and optional dumps of it (or of a profiler).
+    help = "[flag] Print the duration, bytes, lines and peak memory of each stage of the run."
+    args.add_argument("--profile", action = "store_true", help = help)
+    help = "[str] Also save the report of the stages as JSON into the given path (implies \"--profile\")."
+    args.add_argument("--profile-json", type = str, default = None, metavar = "PATH", help = help)
+    help = "[str] Profile the run into the given path: cProfile statistics, or pyinstrument HTML if \".html\"."
+    args.add_argument("--profile-dump", type = str, default = None, metavar = "PATH", help = help)
+
+    # Parse specified arguments in the given order.
+    parser, args = args, args.parse_args()
+    arch = getattr(args, "arch") or []
+    all_archs = getattr(args, "all_archs")
+    top = getattr(args, "top")
+    flag = getattr(args, "json") and getattr(args, "json_format")
+    columnar = getattr(args, "columnar") and getattr(args, "columnar_format")
+    database = getattr(args, "sqlite")
+    offline = getattr(args, "offline")
+    cache = None if getattr(args, "no_cache") else CACHE_PATH
+    incremental = getattr(args, "incremental")
+    budget = getattr(args, "memory_budget")
+    workers = getattr(args, "workers")
+    by = getattr(args, "by")
+    mirror = getattr(args, "mirror")
+    suites = getattr(args, "suite") or [DEBIAN_SUITE]
+    components = getattr(args, "component") or [DEBIAN_COMPONENT]
+    udeb = getattr(args, "udeb")
+    profile_json, dump = getattr(args, "profile_json"), getattr(args, "profile_dump")
+    profile = getattr(args, "profile") or bool(profile_json) or bool(dump)
+    # Every argument is checked before any download (or heavy import) takes place.
+    if offline and (cache is None):
+        parser.error("\"--offline\" needs the cache. Remove \"--no-cache\".")
+    if (top < 1):
+        parser.error("\"--top\" must be a positive integer.")
+    if (budget is not None) and (budget < 1):
+        parser.error("\"--memory-budget\" must be a positive integer.")
+    if (workers is not None) and (workers < 1):
+        parser.error("\"--workers\" must be a positive integer.")
+    for name in arch:
+        if not re.fullmatch(REGEX_ARCH_NAME, name):
+            parser.error(f"\"{name}\" is not an architecture name.")
+    for name in suites + components:
+        if not re.fullmatch(REGEX_DIST_NAME, name):
+            parser.error(f"\"{name}\" is not a suite nor component name.")
+    if (mirror is not None) and not re.match("https?://", mirror):
+        parser.error(f"\"{mirror}\" is not an HTTP(S) URL.")
+    mirror = mirror and (mirror.rstrip("/") + "/")
+    merged = (len(suites) * len(components) > 1)
+    if all_archs and arch: parser.error("\"--all-archs\" does not take architecture names.")
+    if all_archs and merged: parser.error("\"--all-archs\" works with a single suite and component.")
+    several = (len(arch) > 1) or all_archs
+    if (several or merged) and flag: parser.error("\"--json\" works with a single architecture, suite and component.")
+    if (several or merged) and columnar:
+        parser.error("\"--columnar\" works with a single architecture, suite and component.")
+    if (several or merged) and database:
+        parser.error("\"--sqlite\" works with a single architecture, suite and component.")
+    if (several or merged) and incremental:
+        parser.error("\"--incremental\" works with a single architecture, suite and component.")
+    if (several or merged) and (budget is not None):
+        parser.error("\"--memory-budget\" works with a single architecture, suite and component.")
+    if incremental and (budget is not None):
+        parser.error("\"--memory-budget\" does not work with \"--incremental\", which needs the whole index.")
+    if (workers is not None) and (incremental or (budget is not None)):
+        parser.error("\"--workers\" does not work with \"--incremental\" nor \"--memory-budget\".")
+    if (several or merged) and by:
+        parser.error("\"--by\" works with a single architecture, suite and component.")
+    if by and (flag or columnar or database or incremental or (budget is not None)):
+        parser.error("\"--by\" does not work with \"--json\", \"--columnar\", \"--sqlite\", \"--incremental\""
+                     " nor \"--memory-budget\".")
+    if (several or merged) and profile:
+        parser.error("\"--profile\" works with a single architecture, suite and component.")
+    if dump and dump.endswith(".html"):
+        from importlib.util import find_spec
+        if find_spec("pyinstrument") is None: parser.error("\".html\" profiles need the \"pyinstrument\" package.")
+    if columnar:
+        from importlib.util import find_spec
+        if find_spec("pyarrow") is None: parser.error("\"--columnar\" needs the \"pyarrow\" package.")
+    source = dict(mirror = mirror, suite = suites[0], component = components[0])
+
+    # Several suites or components: a single index for all of them, with shared string tables.
+    if merged:
+        from core.multi import index_sources
+        from pandas import Series
+        print("Please wait a few moments...")
+        kind = "udeb-" if udeb else ""
+        specs = [f"{suite}/{component}/{kind}{name}" for suite in suites for component in components
+                 for name in (arch or [ARCH_LOCAL_MACHINE])]
+        index = index_sources(specs, parse_workers = workers, mirror = mirror, cache = cache, offline = offline)
+        for i, spec in enumerate(index.meta["sources"]):
+            names, counts = index.ranking(top, source = i)
+            print_ranking(Series(counts, index = names, name = "file_count", dtype = "int64"), spec, top)
+        print(f"{len(specs)} files indexed: {len(index.paths)} distinct filenames, {len(index.packs)} packages.")
+        sys.exit()
+
+    # Several architectures: download concurrently and parse in parallel processes.
+    if several:
+        from core.multi import count_archs, get_ranking
+        print("Please wait a few moments...")
+        table = count_archs(None if all_archs else arch, parse_workers = workers, udeb = udeb, cache = cache,
+                            offline = offline, **source)
+        for column in table.columns:
+            print_ranking(get_ranking(table, column, top = top), column, top)
+        sys.exit()
+
+    # Instantiate the core class and get the ranking. Unless the JSON is
+    # requested, counting files per package is all that needs to be done.
+    from core.content import DebianContentIndex
+    from core.instrument import StageReport, profiled
+    from contextlib import nullcontext
+    print("Please wait a few moments...")
+    arch = arch[0] if arch else None
+    previous = INDEX_PATH.format(arch = arch or ARCH_LOCAL_MACHINE) if incremental else None
+    report = StageReport() if profile else None
+    with profiled(dump) if dump else nullcontext():
+        if by: # Metrics are stored, and only computed again when the file changes on the mirror.
+            from core.metrics import load_metrics
+            metrics = load_metrics(arch, path = METRICS_PATH if cache else None, udeb = udeb, cache = cache,
+                                   offline = offline, report = report, parse_workers = workers, **source)
+            print_metric(*metrics.ranking(by, top), by, metrics.meta["arch"], top)
+        else:
+            obj = DebianContentIndex(arch = arch, counts_only = not (flag or columnar or database),
+                                     cache = cache, udeb = udeb, offline = offline, previous = previous, report = report,
+                                     memory_budget = budget and (budget << 20), parse_workers = workers, **source)
+            print_ranking(obj.get_ranking(top = top), obj.arch, top)
+            if flag: # If JSON flag enabled, store JSON in temp folder.
+                obj.save_package_json(f"./temp/pack-files-{obj.arch}.{flag}", fmt = flag.partition(".")[0])
+            if columnar: # Same for the columnar table.
+                obj.save_columnar(fmt = columnar)
+            if database: # And the SQLite database.
+                obj.save_sqlite(database)
+
+    if incremental and (obj.changes is not None): # Report what changed since the previous run.
+        print(f"Packages changed since the previous run: {obj.changes.shape[0]}",
+              "(lines added: %(lines_added)d, removed: %(lines_removed)d)" % obj.changes.attrs)
+        if obj.changes.shape[0]: print(obj.changes.to_string(), SEPARATOR, sep = "\n")
+
+    if profile: # Where time and memory went, stage by stage.
+        report.close()
+        print("Stages of the run:", report, SEPARATOR, sep = "\n")
+        if profile_json:
+            report.save(profile_json)
+            print(f"Saved the report of the stages to \"{profile_json}\".")
+        if dump: print(f"Saved the profile of the run to \"{dump}\".")
\ No newline at end of file
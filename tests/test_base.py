@@ -2,6 +2,7 @@ import os, sys
 sys.path.append("./")
 from core.base import *
 from core.content import *
+from utils.mirror import *
 from unittest import TestCase, main
 
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
@@ -87,6 +88,46 @@ class TestDebianDownloader(TestCase):
         msg_fail = f"Sample content does not match the one in \"{self.path_verify}\"."
         self.assertEqual(content_sample_short, content_verify, msg = msg_fail)
 
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+
+class TestDebianDownloaderStream(TestCase):
+    """Test case for streaming downloads of "`DebianDownloader`", against a local mirror."""
+
+    sample_file = "Contents-amd64.gz"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        cls.content = sample_contents(repeat = 50)
+        # Multi-member gzip: the mirror is allowed to publish concatenated members.
+        half = len(cls.content) // 2
+        payload = gzip_contents(cls.content[: half]) + gzip_contents(cls.content[half :])
+        cls.mirror = LocalMirror({cls.sample_file: payload}).__enter__()
+        cls.obj = cls.mirror.bind(DebianDownloader)(cache = None)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mirror.__exit__()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_download_whole(self):
+        """
+        Test case for "`download`" method, which now streams underneath.
+        """
+        msg_fail = "Downloaded content does not match the published one."
+        self.assertEqual(self.obj.download(self.sample_file), self.content, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_download_lines(self):
+        """
+        Test case for "`download_lines`" method - same lines as the whole content, for any chunk size.
+        """
+        self.assertRaises(self.obj.FileNotFound, self.obj.download_lines, "Contents-invalid.gz")
+        for chunk_size in (7, 1000, CHUNK_SIZE):
+            lines = list(self.obj.download_lines(self.sample_file, chunk_size = chunk_size))
+            msg_fail = f"Streamed lines differ from the whole content (chunk size {chunk_size})."
+            self.assertEqual(lines, self.content.splitlines(), msg = msg_fail)
+
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
 #███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
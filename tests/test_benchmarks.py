@@ -0,0 +1,107 @@
+import sys
+sys.path.append("./")
+from benchmarks.synthetic import *
+from benchmarks.bench_stages import compare, parse_size
+from core.content import *
+from core.index import *
+from core.parser import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████   Benchmarks tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestSynthetic(TestCase):
+    """Test case for the synthetic contents-index files of the benchmarks."""
+
+    sample_lines = 20_000
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        cls.content = b"".join(generate_contents(cls.sample_lines, seed = 1, chunk_lines = 1000))
+        cls.lines = cls.content.decode("utf-8").splitlines()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_deterministic(self):
+        """
+        Test case for the generated content: same for the same seed (whatever the chunks), not for another.
+        """
+        msg_fail = "Same seed should give the same content."
+        self.assertEqual(b"".join(generate_contents(self.sample_lines, seed = 1)), self.content, msg = msg_fail)
+        msg_fail = "Another seed should give another content."
+        self.assertNotEqual(b"".join(generate_contents(self.sample_lines, seed = 2)), self.content, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_shape(self):
+        """
+        Test case for the shape of the content: exact size, sorted and unique filenames, spaces in some of
+        them, some filenames shipped by several packages, and skewed package sizes.
+        """
+        for lines in (1, 7, 1234):
+            msg_fail = f"Content should have exactly {lines} lines."
+            self.assertEqual(len(b"".join(generate_contents(lines)).splitlines()), lines, msg = msg_fail)
+        msg_fail = "Lines should be sorted by filename, with no filename twice."
+        self.assertEqual(self.lines, sorted(self.lines), msg = msg_fail)
+        index = parse_buffer(self.content)
+        self.assertEqual(len(index.paths), self.sample_lines, msg = msg_fail)
+        msg_fail = "Some filenames should hold spaces, and some be shipped by several packages."
+        self.assertTrue(any(" " in path for path in index.paths.to_array()), msg = msg_fail)
+        self.assertTrue(any("," in line.rsplit(" ", 1)[-1] for line in self.lines), msg = msg_fail)
+        msg_fail = "Package sizes should be skewed: the largest package far above the average."
+        counts = index.ranking(1)[1]
+        self.assertGreater(counts[0], 20 * len(index.file_packs) / len(index.packs), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_parsers_agree(self):
+        """
+        Test case for the parsers on the content: vectorized and line parsers build the same index.
+        """
+        expected = ContentsIndex.from_rows(DebianContentIndex.parse_lines(self.lines))
+        index = parse_chunks(generate_contents(self.sample_lines, seed = 1, chunk_lines = 1000), batch_size = 1 << 16)
+        msg_fail = "Vectorized parser should build the same index as the line parser."
+        for name in ("row_paths", "file_offsets", "file_packs"):
+            self.assertEqual(getattr(index, name).tolist(), getattr(expected, name).tolist(), msg = msg_fail)
+        self.assertEqual(index.packs.to_array().tolist(), expected.packs.to_array().tolist(), msg = msg_fail)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+
+class TestStages(TestCase):
+    """Test case for the helpers of the stage benchmark."""
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_parse_size(self):
+        """
+        Test case for sizes given on the command line, with or without a unit.
+        """
+        msg_fail = "Sizes should be read with their unit."
+        for text, lines in (("500", 500), ("10k", 10_000), ("50M", 50_000_000), ("1_000", 1000)):
+            self.assertEqual(parse_size(text), lines, msg = msg_fail)
+        msg_fail = "Invalid sizes should be rejected."
+        for text in ("", "1.5M", "10G", "k"):
+            with self.assertRaises(ValueError, msg = msg_fail): parse_size(text)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_compare(self):
+        """
+        Test case for the comparison against a baseline: regressions are the stages slower or heavier
+        than the tolerance allows, and stages missing from the baseline are left out.
+        """
+        def result(stage: str, seconds: float, memory: float):
+            return {"lines": 1000, "stage": stage, "seconds": seconds, "peak_rss_mb": memory}
+        baseline = [result("download", 1.0, 100), result("index", 1.0, 100), result("export", 1.0, 100)]
+        results = [result("download", 1.1, 110), result("index", 1.5, 100), result("export", 1.0, 130),
+                   result("ranking", 9.0, 900)]
+        rows = {row["stage"]: row for row in compare(results, baseline, tolerance = 0.2)}
+        msg_fail = "Only stages found in the baseline should be compared."
+        self.assertEqual(sorted(rows), ["download", "export", "index"], msg = msg_fail)
+        msg_fail = "Regressions should be stages above the tolerance, in time or memory."
+        self.assertEqual({stage: row["regression"] for stage, row in rows.items()},
+                         {"download": False, "index": True, "export": True}, msg = msg_fail)
+        self.assertEqual(rows["index"]["time_ratio"], 1.5, msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
@@ -0,0 +1,108 @@
+import os, sys
+sys.path.append("./")
+from core.base import *
+from core.cache import *
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████   Cache class tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestDebianCache(TestCase):
+    """Test case for "`DebianCache`" class, standalone and through "`DebianDownloader`"."""
+
+    sample_file = "Contents-amd64.gz"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = self.temp.name
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def store(self, cache: DebianCache, url: str, payload: bytes):
+        """Write a payload into the cache, as a download would."""
+        with cache.writer(url, {"ETag": "\"%s\"" % url}) as writer:
+            writer.write(payload)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_store_and_read(self):
+        """
+        Test case for storage, lookup and content-addressing of payloads.
+        """
+        cache = DebianCache(self.path)
+        self.assertIsNone(cache.lookup("a"), msg = "Empty cache should not find anything.")
+        self.store(cache, "a", b"payload")
+        self.store(cache, "b", b"payload")
+        # Same content under two URLs is stored once.
+        msg_fail = "Identical payloads should be stored only once."
+        self.assertEqual(len(os.listdir(os.path.join(self.path, cache.FOLDER_OBJECTS))), 1, msg = msg_fail)
+        self.assertEqual(cache.size, len(b"payload"), msg = msg_fail)
+        # A new instance finds everything from disk.
+        cache = DebianCache(self.path)
+        msg_fail = "Cached payload was not read back."
+        self.assertEqual(b"".join(cache.read("a", chunk_size = 3)), b"payload", msg = msg_fail)
+        msg_fail = "Conditional request headers are wrong."
+        self.assertEqual(cache.headers("b"), {"If-None-Match": "\"b\""}, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_failed_write(self):
+        """
+        Test case for interrupted downloads: nothing should get into the cache.
+        """
+        cache = DebianCache(self.path)
+        with self.assertRaises(RuntimeError):
+            with cache.writer("a", {}) as writer:
+                writer.write(b"half")
+                raise RuntimeError("Connection lost")
+        self.assertIsNone(cache.lookup("a"), msg = "Interrupted payload should not be cached.")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_eviction(self):
+        """
+        Test case for the size limit: least recently used entries are evicted first.
+        """
+        cache = DebianCache(self.path, max_bytes = 25)
+        self.store(cache, "a", b"a" * 10)
+        self.store(cache, "b", b"b" * 10)
+        list(cache.read("a")) # Now "b" is the least recently used.
+        self.store(cache, "c", b"c" * 10)
+        msg_fail = "Least recently used entry was not evicted."
+        self.assertIsNone(cache.lookup("b"), msg = msg_fail)
+        self.assertIsNotNone(cache.lookup("a"), msg = msg_fail)
+        self.assertLessEqual(cache.size, 25, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_revalidation(self):
+        """
+        Test case for conditional requests and offline mode of "`DebianDownloader`".
+        """
+        content = sample_contents()
+        with LocalMirror({self.sample_file: gzip_contents(content)}) as mirror:
+            Downloader = mirror.bind(DebianDownloader)
+            self.assertEqual(Downloader(cache = self.path).download(self.sample_file), content)
+            self.assertEqual(Downloader(cache = self.path).download(self.sample_file), content)
+            # Second time, the Release file should be "304 - Not modified", and the file (whose
+            # hash it lists) should be served from the cache without even asking.
+            msg_fail = "Cached files were downloaded again."
+            statuses = [(path.rpartition("/")[2], status) for path, status in mirror.requests]
+            self.assertEqual(statuses, [("InRelease", 200), (self.sample_file, 200), ("InRelease", 304)], msg = msg_fail)
+        # Mirror is gone: offline mode still works from the cache, without even "requests".
+        with patch.dict(sys.modules, {"requests": None}):
+            obj = Downloader(cache = self.path, offline = True)
+            msg_fail = "Offline mode did not serve the cached content."
+            self.assertEqual(obj.download(self.sample_file), content, msg = msg_fail)
+        # But it cannot serve what was never downloaded.
+        obj._directory["Contents-i386.gz"] = 0
+        self.assertRaises(obj.NotCached, obj.download, "Contents-i386.gz")
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
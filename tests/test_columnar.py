@@ -0,0 +1,125 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.columnar import *
+from core.parser import parse_buffer
+from tempfile import TemporaryDirectory
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████   Columnar export tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestColumnar(TestCase):
+    """Test case for the columnar export of the index (Parquet and Arrow IPC), and its load back."""
+
+    sample_file = "Contents-amd64.gz"
+    # On top of the sample: a package without section.
+    sample_content = sample_contents(repeat = 3) + "usr/bin/plain   plain\n"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        cls.index = parse_buffer(cls.sample_content.encode("utf-8"))
+        cls.rows = list(DebianContentIndex.parse_lines(cls.sample_content.splitlines()))
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = self.temp.name
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def assertSameIndex(self, index: ContentsIndex, expected: ContentsIndex, msg: str):
+        self.assertEqual(index.paths.to_array().tolist(), expected.paths.to_array().tolist(), msg = msg)
+        self.assertEqual(index.packs.to_array().tolist(), expected.packs.to_array().tolist(), msg = msg)
+        for name in ("row_paths", "file_offsets", "file_packs"):
+            self.assertEqual(getattr(index, name).tolist(), getattr(expected, name).tolist(), msg = msg)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_table(self):
+        """
+        Test case for the flat table: one row per filename and package, with its section and architecture.
+        """
+        table = to_arrow(self.index, ["amd64"])
+        expected = [(path, pack, pack.rpartition("/")[0] or None, "amd64") for path, packs in self.rows for pack in packs]
+        msg_fail = "Rows of the table differ from the ones of the line parser."
+        self.assertEqual(sorted(zip(*(table.column(name).to_pylist() for name in COLUMNS))), sorted(expected),
+                         msg = msg_fail)
+        msg_fail = "Every column should be dictionary-encoded."
+        for field in table.schema:
+            self.assertTrue(str(field.type).startswith("dictionary"), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_round_trip(self):
+        """
+        Test case for "`export_columnar`" and "`load_columnar`": same index back, in both formats, and
+        a merged index with its sources, each one in its own row groups.
+        """
+        for name in ("index.parquet", "index.feather", "index.arrow"):
+            path = os.path.join(self.path, name)
+            count = export_columnar(self.index, path, archs = ["amd64"], meta = {"suite": "stable"})
+            msg_fail = f"\"{name}\" should hold a row per filename and package."
+            self.assertEqual(count, len(self.index.file_packs), msg = msg_fail)
+            loaded = load_columnar(path)
+            self.assertSameIndex(loaded, self.index, msg = f"Index loaded from \"{name}\" differs.")
+            self.assertEqual(loaded.meta.get("suite"), "stable", msg = f"Metadata of \"{name}\" was lost.")
+        merged = ContentsIndex.merge([self.index, parse_buffer(b"usr/bin/other   utils/other\n")], ["amd64", "arm64"])
+        path = os.path.join(self.path, "merged.parquet")
+        export_columnar(merged, path)
+        import pyarrow.parquet
+        groups = pyarrow.parquet.ParquetFile(path).metadata.num_row_groups
+        self.assertEqual(groups, 2, msg = "Each architecture should be written into its own row groups.")
+        loaded = load_columnar(path)
+        msg_fail = "Merged index should get its sources back."
+        self.assertSameIndex(loaded, merged, msg = msg_fail)
+        self.assertEqual(loaded.row_sources.tolist(), merged.row_sources.tolist(), msg = msg_fail)
+        self.assertEqual(loaded.meta["sources"], ["amd64", "arm64"], msg = msg_fail)
+        self.assertRaises(ValueError, export_columnar, self.index, os.path.join(self.path, "index.csv"))
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_duplicate_lines(self):
+        """
+        Test case for repeated lines (and consecutive lines of the same filename): each one stays a line.
+        """
+        index = parse_buffer(b"usr/bin/a   x/a\nusr/bin/a   x/a\nusr/bin/a   x/b,x/c\nusr/bin/b   x/b\nusr/bin/a   x/a\n")
+        for name in ("index.parquet", "index.feather"):
+            path = os.path.join(self.path, name)
+            export_columnar(index, path, archs = ["amd64"])
+            loaded = load_columnar(path)
+            self.assertSameIndex(loaded, index, msg = f"Duplicate lines were merged in \"{name}\".")
+            msg_fail = f"File counts from \"{name}\" differ."
+            self.assertEqual(loaded.counts().tolist(), index.counts().tolist(), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_open_columnar(self):
+        """
+        Test case for "`save_columnar`" and "`open_columnar`": the index is reopened without the mirror.
+        """
+        with LocalMirror({self.sample_file: gzip_contents(self.sample_content)}) as mirror:
+            obj = DebianContentIndex("amd64", mirror = mirror.url, cache = None)
+            path = os.path.join(self.path, "index-amd64.parquet")
+            obj.save_columnar(path)
+            downloads = len(mirror.requests)
+            reopened = DebianContentIndex.open_columnar(path)
+            msg_fail = "Reopened index should give the same ranking, without any request."
+            self.assertEqual(len(mirror.requests), downloads, msg = msg_fail)
+            self.assertEqual(reopened.arch, "amd64", msg = msg_fail)
+            self.assertEqual(reopened.get_ranking(5).to_dict(), obj.get_ranking(5).to_dict(), msg = msg_fail)
+            self.assertEqual(reopened.table_pack_files.to_dict(), obj.table_pack_files.to_dict(), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_empty(self):
+        """
+        Test case for an index without any line: a valid file, read back as an empty index.
+        """
+        path = os.path.join(self.path, "empty.parquet")
+        self.assertEqual(export_columnar(parse_buffer(b""), path), 0, msg = "Empty index should have no row.")
+        self.assertEqual(len(load_columnar(path)), 0, msg = "Empty file should give an empty index.")
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
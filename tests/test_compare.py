@@ -0,0 +1,102 @@
+import sys
+sys.path.append("./")
+from core.content import *
+from core.compare import *
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████   Cross-architecture comparison tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestArchComparison(TestCase):
+    """Test case for "`ArchComparison`", against a local mirror with a few architectures."""
+
+    sample_archs = ["amd64", "arm64", "i386"]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        # Each architecture gets a different amount of repetitions, plus a filename of its own.
+        files = {f"Contents-{arch}.gz": gzip_contents(sample_contents(n + 1) + f"usr/bin/{arch}   utils/{arch}\n")
+                 for n, arch in enumerate(cls.sample_archs)}
+        cls.mirror = LocalMirror(files).__enter__()
+        cls.Index = cls.mirror.bind(DebianContentIndex)
+        cls.comparison = ArchComparison.fetch(cls.sample_archs, downloader = cls.mirror.bind(DebianDownloader),
+                                              cache = None, parse_workers = 2)
+        cls.singles = {arch: cls.Index(arch = arch, cache = None) for arch in cls.sample_archs}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mirror.__exit__()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_deltas(self):
+        """
+        Test case for the file count deltas: same as the difference of single-architecture rankings.
+        """
+        expected = {}
+        for arch in ("amd64", "arm64"):
+            names, counts = self.singles[arch].index.ranking(10 ** 6)
+            expected[arch] = dict(zip(names, counts.tolist()))
+        packages = set(expected["amd64"]) | set(expected["arm64"])
+        gaps = {name: (expected["amd64"].get(name, 0), expected["arm64"].get(name, 0)) for name in packages}
+        gaps = {name: pair for name, pair in gaps.items() if pair[0] != pair[1]}
+        names, counts_a, counts_b = self.comparison.deltas("amd64", "arm64")
+        msg_fail = "Deltas should be the packages whose file count differs, with both counts."
+        self.assertEqual(dict(zip(names, zip(counts_a.tolist(), counts_b.tolist()))), gaps, msg = msg_fail)
+        msg_fail = "Deltas should be sorted by largest difference first, then alphabetically."
+        keys = [(-abs(a - b), name) for name, a, b in zip(names, counts_a, counts_b)]
+        self.assertEqual(keys, sorted(keys), msg = msg_fail)
+        self.assertEqual(self.comparison.deltas(0, 1, top = 3)[0], names[: 3], msg = msg_fail)
+        msg_fail = "Packages of a single architecture should count 0 files in the other one."
+        self.assertEqual(gaps["utils/amd64"], (1, 0), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_only_in(self):
+        """
+        Test case for the filenames present in one architecture but not in another.
+        """
+        files = {arch: set(obj.index.paths.to_array()) for arch, obj in self.singles.items()}
+        for a in self.sample_archs:
+            for b in self.sample_archs:
+                paths = self.comparison.paths(self.comparison.only_in(a, b))
+                msg_fail = f"Filenames only in \"{a}\" (not in \"{b}\") should be a set difference, sorted."
+                self.assertEqual(paths, sorted(files[a] - files[b]), msg = msg_fail)
+        msg_fail = "Filenames should be cut to the given limit."
+        self.assertEqual(self.comparison.paths(self.comparison.only_in("i386", "amd64"), 2),
+                         sorted(files["i386"] - files["amd64"])[: 2], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_aggregate(self):
+        """
+        Test case for the ranking among all architectures: sums of the single-architecture counts.
+        """
+        totals = {}
+        for obj in self.singles.values():
+            for name, count in obj.get_ranking(10 ** 6).items(): totals[name] = totals.get(name, 0) + count
+        expected = sorted(totals.items(), key = lambda item: (-item[1], item[0]))[: 5]
+        names, counts = self.comparison.aggregate(5)
+        msg_fail = "Aggregated ranking should add up the file counts of every architecture."
+        self.assertEqual(list(zip(names, counts.tolist())), expected, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_sources(self):
+        """
+        Test case for sources given by label or position, and for unknown ones.
+        """
+        msg_fail = "Sources should be found by label or by position."
+        self.assertEqual([self.comparison.source(s) for s in ("amd64", "i386", 1)], [0, 2, 1], msg = msg_fail)
+        for source in ("mips", 3, -1):
+            self.assertRaises(ArchComparison.SourceNotFound, self.comparison.source, source)
+        msg_fail = "Indexes of single files cannot be compared."
+        self.assertRaises(ValueError, ArchComparison, self.singles["amd64"].index)
+        msg_fail = "Already built indexes should give the same comparison."
+        other = ArchComparison.from_indexes([self.singles[arch].index for arch in ("amd64", "arm64")], ["amd64", "arm64"])
+        self.assertEqual(other.deltas("amd64", "arm64")[0], self.comparison.deltas("amd64", "arm64")[0], msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
@@ -1,7 +1,9 @@
-import os, sys
+import os, sys, json
 sys.path.append("./")
 from core.base import *
 from core.content import *
+from utils.mirror import *
+from pandas import Series, Index
 from unittest import TestCase, main
 
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
@@ -160,6 +162,88 @@ class TestDebianContentIndex(TestCase):
             self.assertEqual(pack_sample, pack_verify, msg = msg_fail)        
             print(" ===========> test_save_package_json OK!")
 
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+
+class TestDebianContentIndexStream(TestCase):
+    """Test case for "`DebianContentIndex`" tables, parsed from a local mirror."""
+
+    sample_arch = "amd64"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        cls.content = sample_contents(repeat = 20)
+        files = {"Contents-amd64.gz": gzip_contents(cls.content)}
+        cls.mirror = LocalMirror(files).__enter__()
+        cls.Index = cls.mirror.bind(DebianContentIndex)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mirror.__exit__()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @staticmethod
+    def reference_file_packs(content: str):
+        """Original whole-content Pandas parser, kept as a reference for the expected tables."""
+        packages = Series(content.splitlines())
+        packages = packages.loc[packages != ""].str.split(" +")
+        files = Index(packages.str[: -1].str.join(" "), name = "filename")
+        packages = packages.str[-1].str.split(",")
+        return Series(data = packages.values, index = files, name = "packages")
+
+    @staticmethod
+    def reference_pack_files(file_packs: Series):
+        """Original explode / groupby inversion, kept as a reference for the expected tables."""
+        return file_packs.explode().reset_index().groupby("packages")["filename"].apply(list)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_stream_matches_whole(self):
+        """
+        Test case for streamed parsing: tables must be identical to the whole-content ones.
+        """
+        expected = self.reference_file_packs(self.content)
+        for stream in (True, False):
+            obj = self.Index(arch = self.sample_arch, stream = stream, cache = None)
+            msg_fail = f"\"filename -> packages\" table differs (stream = {stream})."
+            self.assertTrue(obj.table_file_packs.equals(expected), msg = msg_fail)
+            self.assertEqual(obj.table_file_packs.index.tolist(), expected.index.tolist(), msg = msg_fail)
+            msg_fail = f"\"package -> filenames\" table differs (stream = {stream})."
+            expected_pack_files = self.reference_pack_files(expected)
+            self.assertTrue(obj.table_pack_files.equals(expected_pack_files), msg = msg_fail)
+            self.assertEqual(obj.table_pack_files.index.tolist(), expected_pack_files.index.tolist())
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_ranking_counts_only(self):
+        """
+        Test case for the counting-only fast path: same ranking, full tables built on demand.
+        """
+        expected = self.reference_pack_files(self.reference_file_packs(self.content)).str.len()
+        obj_full = self.Index(arch = self.sample_arch, cache = None)
+        obj_fast = self.Index(arch = self.sample_arch, cache = None, counts_only = True)
+        self.assertIsNone(obj_fast._index, msg = "Counting-only mode should not build the index.")
+        for top in (0, 1, 5, 10 ** 6):
+            ranking = obj_fast.get_ranking(top)
+            msg_fail = f"Rankings differ between both modes (top {top})."
+            self.assertTrue(ranking.equals(obj_full.get_ranking(top)), msg = msg_fail)
+            msg_fail = f"Ranking counts differ from the reference (top {top})."
+            reference = expected.sort_values(ascending = False).head(top)
+            self.assertEqual(ranking.tolist(), reference.tolist(), msg = msg_fail)
+            self.assertEqual(ranking.to_dict(), expected[ranking.index].to_dict(), msg = msg_fail)
+        msg_fail = "Full table was not built on demand in counting-only mode."
+        self.assertTrue(obj_fast.table_pack_files.equals(obj_full.table_pack_files), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_table_builders(self):
+        """
+        Test case for the "`get_table_...`" class methods, now built on the compact index.
+        """
+        expected = self.reference_file_packs(self.content)
+        msg_fail = "\"get_table_file_packs\" differs from the reference parser."
+        self.assertTrue(self.Index.get_table_file_packs(self.content).equals(expected), msg = msg_fail)
+        msg_fail = "\"get_table_pack_files\" differs from the reference explode / groupby."
+        result = self.Index.get_table_pack_files(expected)
+        self.assertTrue(result.equals(self.reference_pack_files(expected)), msg = msg_fail)
+
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
 #███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
 #█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
@@ -0,0 +1,125 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.database import *
+from core.parser import parse_buffer
+from tempfile import TemporaryDirectory
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████   SQLite database tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestDatabase(TestCase):
+    """Test case for the SQLite store of indexes: bulk load, replacement per architecture and queries."""
+
+    sample_file = "Contents-amd64.gz"
+    sample_content = sample_contents(repeat = 3)
+    other_content = "usr/bin/other   utils/other\nusr/share/doc/shared   utils/other,libs/shared\n"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        cls.index = parse_buffer(cls.sample_content.encode("utf-8"))
+        cls.rows = list(DebianContentIndex.parse_lines(cls.sample_content.splitlines()))
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, "contents.sqlite")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_queries(self):
+        """
+        Test case for the queries of a stored index: same ranking as the index (tie-break included),
+        filenames and packages of each other, and substring searches (full-text index or scan).
+        """
+        with ContentsDatabase(self.path) as db:
+            db.replace("amd64", self.index, meta = {"suite": "stable"})
+        with ContentsDatabase(self.path, readonly = True) as db:
+            msg_fail = "Metadata of the architecture was lost."
+            self.assertEqual(db.archs["amd64"]["suite"], "stable", msg = msg_fail)
+            self.assertEqual(db.archs["amd64"]["lines"], len(self.index), msg = msg_fail)
+            for top in (1, 3, 1000):
+                names, counts = db.ranking("amd64", top)
+                expected = self.index.ranking(top)
+                msg_fail = f"Ranking of the top {top} differs from the one of the index."
+                self.assertEqual(names, list(expected[0]), msg = msg_fail)
+                self.assertEqual(counts.tolist(), expected[1].tolist(), msg = msg_fail)
+            path, packs = self.rows[0]
+            msg_fail = "Packages of a filename differ from the ones of its line."
+            self.assertEqual(db.packs_of(path, "amd64"), sorted(packs), msg = msg_fail)
+            msg_fail = "Filenames of a package differ from the ones of the index."
+            self.assertEqual(db.files_of(packs[0], "amd64"), sorted(self.index.files_of(packs[0])), msg = msg_fail)
+            for query in ("bin/", "lib", "s", "\"", "NOT-FOUND"):
+                expected = {}
+                for path, packs in self.rows:
+                    if query in path: expected.setdefault(path, set()).update(packs)
+                expected = {path: sorted(expected[path]) for path in sorted(expected)}
+                msg_fail = f"Search of \"{query}\" differs from a substring match."
+                self.assertEqual(db.search(query, "amd64"), expected, msg = msg_fail)
+            self.assertEqual(len(db.search("/", limit = 2)), 2, msg = "Search should stop at the limit.")
+            self.assertRaises(ContentsDatabase.ArchitectureNotFound, db.ranking, "arm64")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_replace(self):
+        """
+        Test case for "`replace`": each architecture is replaced on its own, names are shared, readers
+        keep their snapshot until the new index commits, and a failed replacement leaves the old one.
+        """
+        other = parse_buffer(self.other_content.encode("utf-8"))
+        with ContentsDatabase(self.path) as db, ContentsDatabase(self.path, readonly = True) as reader:
+            db.replace("amd64", self.index)
+            db.replace("arm64", self.index)
+            reader._db.execute("BEGIN") # Read transaction: a snapshot from its first read on.
+            before = reader.ranking("arm64", 1000)
+            db.replace("arm64", other)
+            msg_fail = "Reader should keep seeing the previous index until the end of its transaction."
+            self.assertEqual(reader.ranking("arm64", 1000)[0], before[0], msg = msg_fail)
+            reader._db.execute("COMMIT")
+            msg_fail = "Reader should see the new index once committed."
+            self.assertEqual(reader.ranking("arm64", 1000)[0], list(other.ranking(1000)[0]), msg = msg_fail)
+            msg_fail = "Other architectures should be left untouched."
+            self.assertEqual(reader.ranking("amd64", 1000)[0], list(self.index.ranking(1000)[0]), msg = msg_fail)
+            self.assertEqual(reader.search("doc/shared", "amd64"), {}, msg = msg_fail)
+            msg_fail = "Filenames of a replaced index should not be found anymore."
+            self.assertEqual(reader.packs_of(self.rows[0][0], "arm64"), [], msg = msg_fail)
+            self.assertEqual(list(reader.search("doc/shared")), ["usr/share/doc/shared"], msg = msg_fail)
+            # Names of the replaced index that no architecture refers to anymore are dropped too.
+            db.replace("amd64", other)
+            msg_fail = "Names that are not referred to anymore should be dropped."
+            for table, column, expected in (("paths", "path", other.paths), ("packages", "name", other.packs)):
+                names = [name for name, in reader._db.execute(f"SELECT {column} FROM {table} ORDER BY {column}")]
+                self.assertEqual(names, sorted(expected.to_array().tolist()), msg = msg_fail)
+            self.assertEqual(reader.search("bin/"), {"usr/bin/other": ["utils/other"]}, msg = msg_fail)
+            fts, = reader._db.execute("SELECT count(*) FROM paths_fts WHERE paths_fts MATCH '\"bin/\"'").fetchone()
+            self.assertEqual(fts, 1, msg = "Dropped filenames should be removed from the full-text index.")
+            db._db.execute("INSERT INTO paths_fts (paths_fts) VALUES ('integrity-check')") # Raises if out of sync.
+            # Metadata that cannot be stored: the whole replacement is rolled back.
+            self.assertRaises(TypeError, db.replace, "arm64", self.index, meta = {"bad": object()})
+            msg_fail = "Failed replacement should leave the previous index."
+            self.assertEqual(reader.ranking("arm64", 1000)[0], list(other.ranking(1000)[0]), msg = msg_fail)
+            self.assertEqual(sorted(reader.archs), ["amd64", "arm64"], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_save_sqlite(self):
+        """
+        Test case for "`save_sqlite`": the index of the downloaded file is stored under its architecture.
+        """
+        with LocalMirror({self.sample_file: gzip_contents(self.sample_content)}) as mirror:
+            obj = DebianContentIndex("amd64", mirror = mirror.url, cache = None)
+            obj.save_sqlite(self.path)
+        with ContentsDatabase(self.path, readonly = True) as db:
+            msg_fail = "Stored index should give the same ranking as the one of the file."
+            names, counts = db.ranking("amd64", 5)
+            self.assertEqual(dict(zip(names, counts.tolist())), obj.get_ranking(5).to_dict(), msg = msg_fail)
+            self.assertEqual(db.archs["amd64"]["filename"], self.sample_file, msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
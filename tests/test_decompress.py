@@ -0,0 +1,90 @@
+import os, sys, gzip, lzma
+sys.path.append("./")
+from core.base import *
+from core.decompress import *
+from tempfile import TemporaryDirectory
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████   Decompression backends tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestDecompress(TestCase):
+    """Test case for the decompression backends ("`decompress`", "`select`")."""
+
+    sample_content = sample_contents(repeat = 20).encode("utf-8")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_backends(self):
+        """
+        Test case for every installed backend: same content, whatever the chunks, with several members
+        (or streams) and one of them ending right at the end of a chunk.
+        """
+        half = len(self.sample_content) // 2
+        parts = [self.sample_content[: half], self.sample_content[half :]]
+        files = {"gz": [gzip.compress(part) for part in parts], "xz": [lzma.compress(part) for part in parts]}
+        for extension, members in files.items():
+            data = b"".join(members)
+            for backend in available(extension):
+                for size in (1, 1000, len(members[0]), len(data)):
+                    chunks = [data[i : i + size] for i in range(0, len(data), size)]
+                    msg_fail = f"\"{backend}\" gives another content (chunks of {size} bytes)."
+                    output = b"".join(decompress(chunks, "file." + extension, backend = backend))
+                    self.assertEqual(output, self.sample_content, msg = msg_fail)
+        for extension, members in files.items():
+            data = b"".join(members)
+            for backend in available(extension):
+                msg_fail = f"Truncated \".{extension}\" file should raise an error (backend: {backend})."
+                for cut in (len(data) - 1, len(members[0]) + 5, 10):
+                    chunks = [data[: cut][i : i + 1000] for i in range(0, cut, 1000)]
+                    with self.assertRaises(EOFError, msg = msg_fail):
+                        b"".join(decompress(chunks, "file." + extension, backend = backend))
+        msg_fail = "Files without a compression extension should be returned as they are."
+        self.assertEqual(list(decompress([b"a", b"b"], "Release")), [b"a", b"b"], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_select(self):
+        """
+        Test case for the choice of the backend: the fastest one installed, the standard library as the
+        fallback, and clear errors for the wrong ones.
+        """
+        for extension, preferred in CODEC_BACKENDS.items():
+            msg_fail = f"\".{extension}\" files should use the fastest backend installed."
+            self.assertEqual(select(extension), available(extension)[0], msg = msg_fail)
+            self.assertEqual(available(extension)[-1], preferred[-1], msg = "Standard library should always be there.")
+        msg_fail = "Wrong backends should be refused."
+        self.assertRaises(ValueError, select, "gz", "lzma")
+        self.assertRaises(ValueError, select, "gz", "brotli")
+        self.assertRaises(ValueError, select, "zst")
+        for backend in set(BACKENDS) - set(available()):
+            self.assertRaises(ImportError, select, BACKENDS[backend][0], backend)
+        self.assertRaises(ValueError, DebianDownloader, codec = "brotli")
+        self.assertRaises(ValueError, DebianDownloader, codec = {"xz": "zlib"})
+        msg_fail = "A backend should only apply to the files of its own compression."
+        self.assertEqual(backends("zlib"), {"gz": "zlib"}, msg = msg_fail)
+        self.assertEqual(backends({"gz": "zlib", "xz": "lzma"}), {"gz": "zlib", "xz": "lzma"}, msg = msg_fail)
+        data = lzma.compress(self.sample_content)
+        self.assertEqual(b"".join(decompress([data], "file.xz", backend = "zlib")), self.sample_content, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_downloader(self):
+        """
+        Test case for the backend of the downloader: given or not, same content from the mirror and from disk.
+        """
+        with LocalMirror({"Contents-amd64.gz": gzip_contents(self.sample_content.decode("utf-8"))}) as mirror, \
+             TemporaryDirectory() as folder:
+            for codec in [None, *available("gz")]:
+                obj = DebianDownloader(mirror = mirror.url, cache = None, codec = codec)
+                msg_fail = f"Downloaded content differs (backend: {codec})."
+                self.assertEqual(b"".join(obj.download_chunks("Contents-amd64.gz")), self.sample_content, msg = msg_fail)
+                path = obj.fetch("Contents-amd64.gz", os.path.join(folder, "Contents-amd64.gz"))
+                msg_fail = f"Content read from disk differs (backend: {codec})."
+                self.assertEqual(b"".join(DebianDownloader.read_chunks(path, codec = codec)), self.sample_content,
+                                 msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
@@ -0,0 +1,74 @@
+import os, sys, json, gzip
+sys.path.append("./")
+from core.content import *
+from core.export import *
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████████████   JSON export tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestExport(TestCase):
+    """Test case for the streaming export of the "package -> filenames" relation."""
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        lines = sample_contents(repeat = 3).splitlines()
+        cls.index = ContentsIndex.from_rows(DebianContentIndex.parse_lines(lines))
+        cls.reference = cls.index.pack_files_series().to_dict()
+
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = self.temp.name
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_iter_pack_files(self):
+        """
+        Test case for the batched iteration of packages: same as the table, whatever the batch size.
+        """
+        for batch_files in (1, 7, 10 ** 6):
+            pairs = list(iter_pack_files(self.index, batch_files = batch_files))
+            msg_fail = f"Packages differ from the table (batches of {batch_files} files)."
+            self.assertEqual(dict(pairs), self.reference, msg = msg_fail)
+            self.assertEqual([pack for pack, files in pairs], sorted(self.reference), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_formats(self):
+        """
+        Test case for JSON and NDJSON files, plain and compressed, read back by standard readers.
+        """
+        for name, opener in [("out.json", open), ("out.json.gz", gzip.open)]:
+            path = os.path.join(self.path, name)
+            export_pack_files(self.index, path, fmt = "json")
+            with opener(path, "rt", encoding = "utf-8") as file:
+                self.assertEqual(json.load(file), self.reference, msg = f"\"{name}\" differs from the table.")
+        path = os.path.join(self.path, "out.ndjson.gz")
+        count = export_pack_files(self.index, path, fmt = "ndjson")
+        with gzip.open(path, "rt", encoding = "utf-8") as file:
+            records = [json.loads(line) for line in file]
+        msg_fail = "NDJSON lines differ from the table."
+        self.assertEqual(count, len(records), msg = msg_fail)
+        self.assertEqual({r["package"]: r["files"] for r in records}, self.reference, msg = msg_fail)
+        self.assertRaises(ValueError, export_pack_files, self.index, path, fmt = "xml")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_empty(self):
+        """
+        Test case for an index without any package: still a valid JSON object.
+        """
+        path = os.path.join(self.path, "empty.json")
+        export_pack_files(ContentsIndex.from_rows([]), path)
+        with open(path) as file:
+            self.assertEqual(json.load(file), {}, msg = "Empty index should give an empty object.")
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
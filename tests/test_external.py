@@ -0,0 +1,77 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.external import *
+from core.export import iter_pack_files
+from core.parser import parse_buffer
+from tempfile import TemporaryDirectory
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████   Out-of-core index tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestExternalSort(TestCase):
+    """Test case for the out-of-core "package -> filenames" relation ("`ExternalSort`")."""
+
+    sample_file = "Contents-amd64.gz"
+    # Tricky lines on top of the sample: a package listed twice, a blank line and a line without filename.
+    sample_content = sample_contents(repeat = 20) + "usr/bin/twice   utils/twice,utils/twice\n   \nlonely\n"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_same_as_index(self):
+        """
+        Test case for several budgets (one run, many runs, one run per batch) and merge widths (several
+        merge passes or not): same packages, filenames (in the same order) and ranking as the index.
+        """
+        data = self.sample_content.encode("utf-8")
+        chunks = [data[i : i + 777] for i in range(0, len(data), 777)]
+        index = parse_buffer(data)
+        expected = list(iter_pack_files(index))
+        for budget, fanin in ((1 << 30, 64), (2000, 2), (500, 3), (1, 2)):
+            with TemporaryDirectory() as folder:
+                with ExternalSort(chunks, budget, folder = folder, fanin = fanin, batch_size = 3000) as external:
+                    msg_fail = f"Runs should be merged down to {fanin} (budget: {budget} bytes)."
+                    self.assertLessEqual(len(external.runs), fanin, msg = msg_fail)
+                    self.assertEqual(external.lines, len(index), msg = msg_fail)
+                    msg_fail = f"Packages and filenames should be the ones of the index (budget: {budget} bytes)."
+                    self.assertEqual(list(external.groups()), expected, msg = msg_fail)
+                    msg_fail = f"Ranking should be the one of the index (budget: {budget} bytes)."
+                    for top in (3, 10 ** 6):
+                        names, counts = external.ranking(top)
+                        expected_names, expected_counts = index.ranking(top)
+                        self.assertEqual(names, expected_names, msg = msg_fail)
+                        self.assertEqual(counts.tolist(), expected_counts.tolist(), msg = msg_fail)
+                msg_fail = "Temporary files should be removed once closed."
+                self.assertEqual(os.listdir(folder), [], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_content_index(self):
+        """
+        Test case for "`DebianContentIndex`" with a memory budget: same ranking and exported JSON.
+        """
+        with LocalMirror({self.sample_file: gzip_contents(self.sample_content)}) as mirror, \
+             TemporaryDirectory() as folder:
+            Index = mirror.bind(DebianContentIndex)
+            obj = Index(arch = "amd64", cache = None)
+            external = Index(arch = "amd64", cache = None, memory_budget = 1000, temp_folder = folder)
+            msg_fail = "Index should not be built with a memory budget, only the sorted runs."
+            self.assertIsNone(external._index, msg = msg_fail)
+            self.assertGreater(len(os.listdir(folder)), 0, msg = msg_fail)
+            msg_fail = "Ranking should be the same as in memory."
+            self.assertEqual(external.get_ranking(5).to_dict(), obj.get_ranking(5).to_dict(), msg = msg_fail)
+            msg_fail = "Exported JSON should be the same as in memory."
+            for fmt in ("json", "ndjson"):
+                obj.save_package_json(path_a := os.path.join(folder, f"a.{fmt}"), fmt = fmt)
+                external.save_package_json(path_b := os.path.join(folder, f"b.{fmt}"), fmt = fmt)
+                with open(path_a, "rb") as file_a, open(path_b, "rb") as file_b:
+                    self.assertEqual(file_a.read(), file_b.read(), msg = msg_fail)
+            msg_fail = "Tables should still be available, built in memory on request."
+            self.assertEqual(external.table_pack_files.to_dict(), obj.table_pack_files.to_dict(), msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
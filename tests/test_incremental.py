@@ -0,0 +1,91 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.incremental import *
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+import numpy as np
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████   Incremental index tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestIncrementalIndex(TestCase):
+    """Test case for "`build_index`" and "`update_index`"."""
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        cls.lines_old = sample_contents(repeat = 4).splitlines()
+        lines = list(cls.lines_old)
+        del lines[3 : 6]                                                    # Removed lines.
+        lines[10] = lines[10].rsplit(" ", 1)[0] + " devel/brand-new"        # Modified line, new package.
+        lines.insert(7, "aaa/first/path   admin/other,devel/piglit")        # Added line, new path.
+        lines = [line for line in lines if not line.endswith("doc/spaced")] # Package gone entirely.
+        lines += ["zzz/last   devel/piglit", "zzz/last   devel/piglit"]     # Repeated lines.
+        lines += ["usr/share/a  b.txt   devel/piglit", "usr/bin/tab\tadmin/tab", # Inner spaces, tab separator,
+                  "usr/bin/trailing   admin/tab \t", "   ", "usr/bin/tab   admin/tab"] # trailing / only blanks.
+        cls.lines_new = lines
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def assertSameIndex(self, obj: ContentsIndex, expected: ContentsIndex):
+        """Compare every array behind two indexes."""
+        msg_fail = "Updated index differs from a cold build."
+        self.assertEqual(obj.paths.to_array().tolist(), expected.paths.to_array().tolist(), msg = msg_fail)
+        self.assertEqual(obj.packs.to_array().tolist(), expected.packs.to_array().tolist(), msg = msg_fail)
+        for name in ("row_paths", "file_offsets", "file_packs", "row_hashes", "pack_offsets", "pack_rows"):
+            self.assertTrue(np.array_equal(getattr(obj, name), getattr(expected, name)), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_update_matches_cold_build(self):
+        """
+        Test case for incremental updates: same index as a cold build, and accurate change report.
+        """
+        previous = build_index(self.lines_old)
+        for batch_size in (3, 1000):
+            index, changes = update_index(previous, self.lines_new, batch_size = batch_size)
+            self.assertSameIndex(index, build_index(self.lines_new))
+        # Every reported delta should match the counts of both versions.
+        old = dict(zip(*previous.ranking(10 ** 6)))
+        new = dict(zip(*index.ranking(10 ** 6)))
+        expected = {pack for pack in old.keys() | new.keys() if old.get(pack, 0) != new.get(pack, 0)}
+        msg_fail = "Reported changed packages are wrong."
+        self.assertEqual(set(changes.index), expected, msg = msg_fail)
+        for pack, row in changes.iterrows():
+            self.assertEqual((row["before"], row["after"]), (old.get(pack, 0), new.get(pack, 0)), msg = msg_fail)
+        self.assertEqual(changes.loc["doc/spaced", "after"], 0, msg = msg_fail)
+        self.assertEqual(changes.attrs["lines_added"], 8, msg = msg_fail)
+        # No changes at all: nothing to report.
+        index, changes = update_index(index, self.lines_new)
+        self.assertEqual(changes.shape[0], 0, msg = "Unchanged file should report no changes.")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_content_index_previous(self):
+        """
+        Test case for "`DebianContentIndex`" in incremental mode, with persistence between runs.
+        """
+        to_file = lambda lines: gzip_contents(str.join("\n", lines) + "\n")
+        with TemporaryDirectory() as path, LocalMirror({"Contents-amd64.gz": to_file(self.lines_old)}) as mirror:
+            Index = mirror.bind(DebianContentIndex)
+            path_index = os.path.join(path, "index-amd64.idx")
+            obj = Index(arch = "amd64", cache = None, previous = path_index)
+            self.assertIsNone(obj.changes, msg = "First run has nothing to compare with.")
+            self.assertTrue(os.path.isfile(path_index), msg = "Index was not persisted.")
+            mirror.files["Contents-amd64.gz"] = to_file(self.lines_new)
+            obj = Index(arch = "amd64", cache = None, previous = path_index)
+            msg_fail = "Incremental run differs from a cold one."
+            cold = Index(arch = "amd64", cache = None)
+            self.assertTrue(obj.table_pack_files.equals(cold.table_pack_files), msg = msg_fail)
+            self.assertTrue(obj.get_ranking(5).equals(cold.get_ranking(5)), msg = msg_fail)
+            self.assertIn("devel/brand-new", obj.changes.index, msg = "Changed package not reported.")
+            # The persisted index can be reopened on its own, without the mirror.
+            obj = DebianContentIndex.open_index(path_index)
+            self.assertEqual(obj.arch, "amd64", msg = "Stored metadata was lost.")
+            self.assertTrue(obj.get_ranking(5).equals(cold.get_ranking(5)), msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
@@ -0,0 +1,118 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.index import *
+import numpy as np
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████   Index class tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestContentsIndex(TestCase):
+    """Test case for "`StringTable`" and "`ContentsIndex`" classes."""
+
+    sample_filename = "usr/sbin/sendmail"
+    sample_package = "devel/piglit"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        lines = sample_contents(repeat = 3).splitlines()
+        cls.obj = ContentsIndex.from_rows(DebianContentIndex.parse_lines(lines))
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_string_table(self):
+        """
+        Test case for interning: sorted, distinct, and IDs pointing back to the strings.
+        """
+        strings = ["b", "ñandú", "a", "b", "c d", ""]
+        table, ids = StringTable.build(strings)
+        msg_fail = "Table should hold the distinct strings, sorted."
+        self.assertEqual(table.to_array().tolist(), sorted(set(strings)), msg = msg_fail)
+        msg_fail = "IDs do not point back to the interned strings."
+        self.assertEqual([table[i] for i in ids], strings, msg = msg_fail)
+        msg_fail = "Lookup of strings failed."
+        self.assertEqual(table.find("ñandú"), table.to_array().tolist().index("ñandú"), msg = msg_fail)
+        self.assertEqual(table.find("zzz"), -1, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_lookups(self):
+        """
+        Test case for single lookups in both directions, against the materialised tables.
+        """
+        file_packs = self.obj.file_packs_series()
+        pack_files = self.obj.pack_files_series()
+        msg_fail = "Packages of a filename differ from the table."
+        packs = self.obj.packs_of(self.sample_filename)
+        self.assertEqual(packs, file_packs[self.sample_filename], msg = msg_fail)
+        self.assertEqual(self.obj.packs_of("not/a/file"), [], msg = msg_fail)
+        msg_fail = "Filenames of a package differ from the table."
+        files = self.obj.files_of(self.sample_package)
+        self.assertEqual(files, pack_files[self.sample_package], msg = msg_fail)
+        self.assertEqual(self.obj.files_of("not/a-package"), [], msg = msg_fail)
+        msg_fail = "File counts differ from the table."
+        self.assertEqual(self.obj.counts().tolist(), pack_files.str.len().tolist(), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_select_top(self):
+        """
+        Test case for partial top-N selection: descending counts, ties broken by ID.
+        """
+        counts = np.array([3, 9, 1, 9, 3, 0, 7])
+        msg_fail = "Top selection is not sorted by count, then by ID."
+        self.assertEqual(select_top(counts, 4).tolist(), [1, 3, 6, 0], msg = msg_fail)
+        self.assertEqual(select_top(counts, 100).tolist(), [1, 3, 6, 0, 4, 2, 5], msg = msg_fail)
+        self.assertEqual(select_top(counts, 0).tolist(), [], msg = msg_fail)
+        msg_fail = "Counting-only ranking differs from the index one."
+        lines = sample_contents(repeat = 3).splitlines()
+        names, counts = PackageCounts.from_lines(lines).ranking(5)
+        self.assertEqual((names, counts.tolist()), (self.obj.ranking(5)[0], self.obj.ranking(5)[1].tolist()), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_save_load(self):
+        """
+        Test case for the binary format: memory-mapped reopening, lookups, and damaged files.
+        """
+        with TemporaryDirectory() as path:
+            path = os.path.join(path, "index.idx")
+            self.obj.save(path, meta = {"arch": "amd64"})
+            obj = ContentsIndex.load(path, verify = True)
+            msg_fail = "Reopened index differs from the saved one."
+            self.assertEqual(obj.meta, {"arch": "amd64"}, msg = msg_fail)
+            self.assertTrue(obj.file_packs_series().equals(self.obj.file_packs_series()), msg = msg_fail)
+            self.assertTrue(obj.pack_files_series().equals(self.obj.pack_files_series()), msg = msg_fail)
+            msg_fail = "Reopened index should be a view of the file, not a copy."
+            self.assertFalse(obj.pack_rows.flags.writeable or obj.paths.arrays[0].flags.writeable, msg = msg_fail)
+            self.assertEqual(obj.files_of(self.sample_package), self.obj.files_of(self.sample_package))
+            self.assertEqual(obj.packs_of(self.sample_filename), self.obj.packs_of(self.sample_filename))
+            # A flipped byte goes unnoticed unless verified.
+            with open(path, "r+b") as file:
+                file.seek(-1, os.SEEK_END)
+                byte = file.read(1)
+                file.seek(-1, os.SEEK_END)
+                file.write(bytes([byte[0] ^ 0xFF]))
+            del obj
+            ContentsIndex.load(path)
+            self.assertRaises(ContentsIndex.FormatError, ContentsIndex.load, path, verify = True)
+            with open(path, "wb") as file: file.write(b"PK\x03\x04" * 16)
+            self.assertRaises(ContentsIndex.FormatError, ContentsIndex.load, path)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_empty(self):
+        """
+        Test case for an index without any line.
+        """
+        obj = ContentsIndex.from_rows([])
+        msg_fail = "Empty index should give empty tables."
+        self.assertEqual(len(obj), 0, msg = msg_fail)
+        self.assertEqual(obj.file_packs_series().shape[0], 0, msg = msg_fail)
+        self.assertEqual(obj.pack_files_series().shape[0], 0, msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
@@ -0,0 +1,108 @@
+import os, sys, json, time, pstats
+sys.path.append("./")
+from core.content import *
+from core.instrument import *
+from tempfile import TemporaryDirectory
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#██████████████████████████████████████████████████████████████████████████████████████████████   Stage report tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestStageReport(TestCase):
+    """Test case for the report of stages ("`StageReport`"), on its own and filled by "`DebianContentIndex`"."""
+
+    sample_file = "Contents-amd64.gz"
+    sample_content = sample_contents(repeat = 50)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_nested_stages(self):
+        """
+        Test case for nested stages and streams: each one keeps its own time only, so all of them add up
+        to the time of the outermost one.
+        """
+        def slow(n: int): # Stream of "n" chunks of 10 bytes, with 2 lines each.
+            for _ in range(n):
+                time.sleep(0.01)
+                yield b"line\nline\n"
+        with StageReport() as report:
+            with report.stage("outer") as entry:
+                time.sleep(0.02)
+                for _ in report.meter("stream", slow(3), lines = True): time.sleep(0.01)
+                with report.stage("inner"): time.sleep(0.02)
+                entry["lines"] += 7
+        stages = {entry["stage"]: entry for entry in report.stages}
+        msg_fail = "Stages should be listed in the order they first ran."
+        self.assertEqual(list(stages), ["outer", "stream", "inner"], msg = msg_fail)
+        msg_fail = "Each stage should only keep its own time."
+        self.assertGreaterEqual(stages["stream"]["seconds"], 0.03, msg = msg_fail)
+        self.assertLess(stages["stream"]["seconds"], 0.1, msg = msg_fail)
+        self.assertGreaterEqual(stages["outer"]["seconds"], 0.05, msg = msg_fail)
+        self.assertLess(stages["outer"]["seconds"], 0.12, msg = msg_fail)
+        self.assertLessEqual(sum(entry["seconds"] for entry in stages.values()), report.seconds, msg = msg_fail)
+        msg_fail = "Streams should count their bytes (and lines), and blocks their own counters."
+        self.assertEqual((stages["stream"]["bytes"], stages["stream"]["lines"]), (30, 6), msg = msg_fail)
+        self.assertEqual((stages["outer"]["lines"], stages["outer"]["calls"]), (7, 1), msg = msg_fail)
+        msg_fail = "Peak memory should be recorded for every stage."
+        self.assertTrue(all(entry["peak_rss_mb"] > 0 for entry in stages.values()), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_closed_stream(self):
+        """
+        Test case for a stream left unfinished by its consumer: the stream below is closed as well.
+        """
+        closed = []
+        def chunks():
+            try: yield from (b"a", b"b", b"c")
+            finally: closed.append(True)
+        report = StageReport(memory = False)
+        stream = report.meter("stream", chunks())
+        next(stream)
+        stream.close()
+        msg_fail = "Stream below should be closed, with the bytes read so far."
+        self.assertEqual(closed, [True], msg = msg_fail)
+        self.assertEqual(report.stages[0]["bytes"], 1, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_content_index(self):
+        """
+        Test case for a run of "`DebianContentIndex`" with a report: Release file, download, decompression,
+        parsing, ranking and export are recorded, with the bytes and lines they went through. Reports are
+        saved as JSON, and runs can be profiled into "`cProfile`" statistics.
+        """
+        payload = gzip_contents(self.sample_content)
+        lines = self.sample_content.encode("utf-8").count(b"\n")
+        with LocalMirror({self.sample_file: payload}) as mirror, TemporaryDirectory() as folder:
+            report = StageReport()
+            path_profile = os.path.join(folder, "run.prof")
+            with profiled(path_profile):
+                obj = mirror.bind(DebianContentIndex)(arch = "amd64", cache = None, report = report)
+                obj.get_ranking(3)
+                obj.save_package_json(os.path.join(folder, "packages.json"))
+            report.close()
+            stages = {entry["stage"]: entry for entry in report.stages}
+            msg_fail = "Every stage of the run should be recorded."
+            self.assertEqual(list(stages), ["release", "parse", "download", "decompress", "ranking", "export"],
+                             msg = msg_fail)
+            msg_fail = "Stages should count the bytes and lines they went through."
+            self.assertEqual(stages["download"]["bytes"], len(payload), msg = msg_fail)
+            self.assertEqual(stages["decompress"]["bytes"], len(self.sample_content.encode("utf-8")), msg = msg_fail)
+            self.assertEqual(stages["decompress"]["lines"], lines, msg = msg_fail)
+            self.assertEqual(stages["parse"]["lines"], len(obj.index), msg = msg_fail)
+            msg_fail = "Report should be saved as JSON, and printable."
+            report.save(path_json := os.path.join(folder, "report.json"))
+            with open(path_json, "r", encoding = "utf-8") as file: saved = json.load(file)
+            self.assertEqual([entry["stage"] for entry in saved["stages"]], list(stages), msg = msg_fail)
+            self.assertIn("decompress", str(report), msg = msg_fail)
+            msg_fail = "Profile of the run should be readable by \"pstats\"."
+            functions = [function[2] for function in pstats.Stats(path_profile).stats]
+            self.assertIn("parse_chunks", functions, msg = msg_fail)
+        msg_fail = "Instance should give back its report."
+        self.assertIs(obj.report, report, msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
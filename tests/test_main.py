@@ -0,0 +1,61 @@
+import os, re, sys, subprocess
+sys.path.append("./")
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████   CLI startup tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestStartup(TestCase):
+    """Test case for the startup of "`main.py`": light imports, and arguments checked before any work."""
+
+    path_main = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    heavy_modules = ("pandas", "numpy", "requests")
+    budget_ms = 100 # Import time allowed on top of the interpreter's own startup.
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def run_importtime(self, *args):
+        """Run the interpreter with "`-X importtime`", and get exit code and self time of each imported module."""
+        run = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output = True,
+                             text = True, cwd = os.path.dirname(self.path_main), timeout = 60)
+        times = re.findall(r"import time:\s+(\d+) \|\s+\d+ \| *(\S+)", run.stderr)
+        return run.returncode, {module: int(us) for us, module in times}
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_light_startup(self):
+        """
+        Test case for "`--help`" and wrong arguments: no heavy module, and within the import-time budget.
+        """
+        _, baseline = self.run_importtime("-c", "pass")
+        for args in (["--help"], ["search", "--help"], ["-n", "0"], ["not-an-arch!"], ["search", "-l", "0", "x"],
+                     ["amd64", "i386", "--profile"], ["serve", "--help"], ["serve", "-p", "99999"],
+                     ["compare", "amd64"], ["compare", "amd64", "arm64", "-n", "0"], ["-m", "0"], ["-u", "-m", "64"],
+                     ["amd64", "i386", "--by", "section"], ["--by", "color"], ["-w", "0"], ["amd64", "i386", "-c"],
+                     ["amd64", "i386", "--sqlite"], ["--all-archs", "amd64"]):
+            code, modules = self.run_importtime(self.path_main, *args)
+            msg_fail = f"\"main.py {str.join(' ', args)}\" failed unexpectedly."
+            self.assertIn(code, (0, 2), msg = msg_fail)
+            msg_fail = f"\"main.py {str.join(' ', args)}\" imported heavy modules."
+            heavy = [m for m in modules if m.split(".")[0] in self.heavy_modules]
+            self.assertEqual(heavy, [], msg = msg_fail)
+            elapsed = sum(us for module, us in modules.items() if module not in baseline) / 1000
+            msg_fail = f"\"main.py {str.join(' ', args)}\" took {elapsed:.1f} ms of imports."
+            self.assertLess(elapsed, self.budget_ms, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_flags_before_arch(self):
+        """
+        Test case for flags given before the architecture: it is not taken as their value.
+        """
+        for flag in ("-j", "-c"):
+            args = [self.path_main, flag, "amd64", "-n", "0"]
+            run = subprocess.run([sys.executable, *args], capture_output = True, text = True,
+                                 cwd = os.path.dirname(self.path_main), timeout = 60)
+            msg_fail = f"\"main.py {str.join(' ', args[1 :])}\" should only complain about \"--top\"."
+            self.assertIn("\"--top\" must be a positive integer", run.stderr, msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
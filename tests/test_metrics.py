@@ -0,0 +1,92 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.metrics import *
+from core.parser import parse_buffer
+from collections import Counter
+from tempfile import TemporaryDirectory
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Metrics tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestIndexMetrics(TestCase):
+    """Test case for the metrics of an index ("`IndexMetrics`"), and their storage per version of the file."""
+
+    sample_file = "Contents-amd64.gz"
+    # On top of the sample: a filename at the root, and a package without section.
+    sample_content = sample_contents(repeat = 3) + "rootfile   utils/root\nusr/bin/plain   plain\n"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_tables(self):
+        """
+        Test case for every table, against the same statistics computed line by line.
+        """
+        rows = list(DebianContentIndex.parse_lines(self.sample_content.splitlines()))
+        metrics = IndexMetrics.from_index(parse_buffer(self.sample_content.encode("utf-8")))
+        packages = Counter(pack for _, packs in rows for pack in packs)
+        expected = {"package": packages,
+                    "section": Counter(pack.rpartition("/")[0] or IndexMetrics.NO_SECTION
+                                       for _, packs in rows for pack in packs),
+                    "directory": Counter(path.partition("/")[0] for path, _ in rows)}
+        for by, counter in expected.items():
+            msg_fail = f"Ranking by \"{by}\" should count every file, ties sorted alphabetically."
+            top = sorted(counter.items(), key = lambda item: (-item[1], item[0]))[: 4]
+            labels, counts = metrics.ranking(by, top = 4)
+            self.assertEqual(list(zip(labels, counts.tolist())), top, msg = msg_fail)
+        msg_fail = "Size classes should count the packages with 1, 2-3, 4-7... files."
+        sizes = Counter(count.bit_length() - 1 for count in packages.values())
+        labels, counts = metrics.ranking("size")
+        self.assertEqual(labels[: 3], ["1", "2-3", "4-7"], msg = msg_fail)
+        self.assertEqual(counts.tolist(), [sizes[k] for k in range(len(labels))], msg = msg_fail)
+        msg_fail = "Shared files should be counted by amount of packages."
+        shared = Counter(len(packs) for _, packs in rows)
+        labels, counts = metrics.ranking("shared")
+        self.assertEqual(dict(zip(map(int, labels), counts.tolist())), dict(shared), msg = msg_fail)
+        msg_fail = "Unknown metrics should be refused."
+        self.assertRaises(ValueError, metrics.ranking, "color")
+        msg_fail = "Metrics should be the same once saved and loaded back."
+        with TemporaryDirectory() as folder:
+            metrics.save(path := os.path.join(folder, "metrics.json"))
+            loaded = IndexMetrics.load(path)
+        for by in IndexMetrics.BY:
+            self.assertEqual(loaded.ranking(by, 100)[0], metrics.ranking(by, 100)[0], msg = msg_fail)
+            self.assertEqual(loaded.ranking(by, 100)[1].tolist(), metrics.ranking(by, 100)[1].tolist(), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_stored(self):
+        """
+        Test case for "`load_metrics`": the file is only parsed again when its version changes.
+        """
+        with LocalMirror({self.sample_file: gzip_contents(self.sample_content)}) as mirror, \
+             TemporaryDirectory() as folder:
+            path = os.path.join(folder, "metrics-{arch}.json")
+            options = dict(path = path, mirror = mirror.url, cache = None)
+            downloads = lambda: [p for p, status in mirror.requests if p.endswith(self.sample_file)]
+            first = load_metrics("amd64", **options)
+            msg_fail = "Metrics should be computed and stored on the first run."
+            self.assertEqual(len(downloads()), 1, msg = msg_fail)
+            self.assertTrue(os.path.isfile(path.format(arch = "amd64")), msg = msg_fail)
+            again = load_metrics("amd64", **options)
+            msg_fail = "Stored metrics should be served while the file does not change."
+            self.assertEqual(len(downloads()), 1, msg = msg_fail)
+            self.assertEqual(again.ranking("section", 5)[0], first.ranking("section", 5)[0], msg = msg_fail)
+            mirror.files[self.sample_file] = gzip_contents("usr/bin/new   utils/new\n")
+            changed = load_metrics("amd64", **options)
+            msg_fail = "Metrics should be computed again when the file changes."
+            self.assertEqual(len(downloads()), 2, msg = msg_fail)
+            self.assertEqual(changed.ranking("package", 5)[0], ["utils/new"], msg = msg_fail)
+            self.assertRaises(DebianContentIndex.ArchitectureNotFound, load_metrics, "mips", **options)
+            mirror.files[self.sample_file] = gzip_contents(self.sample_content)
+            parallel = load_metrics("amd64", parse_workers = 2, **options)
+            msg_fail = "Metrics parsed by several workers should be the same ones."
+            self.assertEqual(len(downloads()), 3, msg = msg_fail)
+            self.assertEqual(parallel.ranking("section", 5)[0], first.ranking("section", 5)[0], msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
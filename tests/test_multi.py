@@ -0,0 +1,137 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.multi import *
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████   Multi-architecture tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestCountArchs(TestCase):
+    """Test case for "`count_archs`", against a local mirror with a few architectures."""
+
+    sample_archs = ["amd64", "arm64", "i386"]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        # Each architecture gets a different amount of repetitions, hence different counts.
+        files = {f"Contents-{arch}.gz": gzip_contents(sample_contents(repeat = n + 1))
+                 for n, arch in enumerate(cls.sample_archs)}
+        files["Contents-all.gz"] = gzip_contents("usr/share/doc/x  doc/x\n")
+        cls.mirror = LocalMirror(files).__enter__()
+        cls.Downloader = cls.mirror.bind(DebianDownloader)
+        cls.Index = cls.mirror.bind(DebianContentIndex)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mirror.__exit__()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_count_archs(self):
+        """
+        Test case for the combined table: same counts as single-architecture runs.
+        """
+        self.mirror.requests.clear()
+        table = count_archs(None, downloader = self.Downloader, cache = None, parse_workers = 2)
+        msg_fail = "Release file should be fetched only once."
+        self.assertEqual([path for path, status in self.mirror.requests].count("/dists/stable/InRelease"), 1, msg = msg_fail)
+        msg_fail = "Table should have one column per available architecture."
+        self.assertEqual(sorted(table.columns), sorted(self.sample_archs + ["all"]), msg = msg_fail)
+        for arch in self.sample_archs:
+            single = self.Index(arch = arch, cache = None, counts_only = True)
+            msg_fail = f"Ranking of \"{arch}\" differs from a single-architecture run."
+            for top in (3, 100):
+                expected = single.get_ranking(top)
+                ranking = get_ranking(table, arch, top)
+                self.assertEqual(ranking.to_dict(), expected.to_dict(), msg = msg_fail)
+                self.assertEqual(ranking.index.tolist(), expected.index.tolist(), msg = msg_fail)
+        table = count_archs(["all"], downloader = self.Downloader, cache = None, parse_workers = 2)
+        msg_fail = "\"all\" should be the arch-independent file, not every architecture."
+        self.assertEqual(list(table.columns), ["all"], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_invalid_arch(self):
+        """
+        Test case for unavailable architectures.
+        """
+        self.assertRaises(DebianContentIndex.ArchitectureNotFound, count_archs, ["amd64", "arm32"],
+                          downloader = self.Downloader, cache = None)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+
+class TestIndexSources(TestCase):
+    """Test case for "`index_sources`", against a local mirror with a few suites and components."""
+
+    sample_sources = ["stable/main/amd64", "testing/main/amd64", "stable/contrib/amd64", "stable/main/udeb-amd64"]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        # Suites share most of their filenames: "testing" is "stable" plus some more.
+        files = {"dists/stable/main/Contents-amd64.gz": gzip_contents(sample_contents(repeat = 2)),
+                 "dists/testing/main/Contents-amd64.gz": gzip_contents(sample_contents(repeat = 3)),
+                 "dists/stable/contrib/Contents-amd64.gz": gzip_contents("usr/bin/x  contrib/x\n"),
+                 "dists/stable/main/Contents-udeb-amd64.gz": gzip_contents("lib/udeb/y  debian-installer/y\n")}
+        cls.mirror = LocalMirror(files).__enter__()
+        cls.Downloader = cls.mirror.bind(DebianDownloader)
+        cls.Index = cls.mirror.bind(DebianContentIndex)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mirror.__exit__()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_index_sources(self):
+        """
+        Test case for the merged index: same counts as single runs, and strings held once.
+        """
+        self.mirror.requests.clear()
+        index = index_sources(self.sample_sources, downloader = self.Downloader, cache = None, parse_workers = 2)
+        msg_fail = "Release file should be fetched once per suite, whatever the amount of components."
+        paths = [path for path, status in self.mirror.requests]
+        self.assertEqual([paths.count(f"/dists/{suite}/InRelease") for suite in ("stable", "testing")], [1, 1], msg = msg_fail)
+        msg_fail = "Sources should be kept in the metadata, in the given order."
+        self.assertEqual(index.meta["sources"], self.sample_sources, msg = msg_fail)
+        singles = []
+        for source, spec in enumerate(self.sample_sources):
+            suite, component, arch, udeb = parse_source(spec)
+            single = self.Index(arch = arch, suite = suite, component = component, udeb = udeb, cache = None)
+            singles.append(single.index)
+            msg_fail = f"Ranking of \"{spec}\" differs from a single run."
+            names, counts = index.ranking(100, source = source)
+            expected = single.get_ranking(100)
+            self.assertEqual(names, expected.index.tolist(), msg = msg_fail)
+            self.assertEqual(counts.tolist(), expected.tolist(), msg = msg_fail)
+        msg_fail = "Filenames shared by several sources should be interned once."
+        self.assertEqual(len(index.paths), len(set().union(*(set(i.paths.to_array()) for i in singles))), msg = msg_fail)
+        self.assertEqual(len(index), sum(map(len, singles)), msg = msg_fail)
+        msg_fail = "Sources of each row should survive persistence."
+        with TemporaryDirectory() as path:
+            index.save(path := os.path.join(path, "index.idx"))
+            loaded = ContentsIndex.load(path, verify = True)
+            self.assertEqual(loaded.row_sources.tolist(), index.row_sources.tolist(), msg = msg_fail)
+            self.assertEqual(loaded.meta["sources"], self.sample_sources, msg = msg_fail)
+            del loaded
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_invalid_source(self):
+        """
+        Test case for malformed sources, and sources not available in their suite and component.
+        """
+        self.assertEqual(parse_source("amd64"), (DEBIAN_SUITE, DEBIAN_COMPONENT, "amd64", False))
+        self.assertEqual(parse_source("contrib/udeb-arm64"), (DEBIAN_SUITE, "contrib", "arm64", True))
+        self.assertRaises(ValueError, parse_source, "a/b/c/d")
+        self.assertRaises(DebianContentIndex.ArchitectureNotFound, index_sources, ["stable/contrib/arm64"],
+                          downloader = self.Downloader, cache = None)
+        self.assertRaises(DebianContentIndex.ArchitectureNotFound, index_sources, ["testing/main/udeb-amd64"],
+                          downloader = self.Downloader, cache = None)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
@@ -0,0 +1,208 @@
+import os, sys
+sys.path.append("./")
+from core.content import *
+from core.index import *
+from core.parser import *
+import numpy as np
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+try: import pyarrow
+except ImportError: pyarrow = None
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████   Vectorized parser tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestParser(TestCase):
+    """Test case for the vectorized parser ("`parse_chunks`"), against the line parser."""
+
+    sample_content = sample_contents(repeat = 4)
+    sample_header = str.join("\n", ["This file maps each file available in the Debian GNU/Linux system to",
+                                    "the package from which it originates.", "",
+                                    "FILE                                                    LOCATION", ""])
+    # Inner spaces, tab separators and trailing whitespace.
+    sample_tricky = ("usr/share/a  b.txt   devel/foo\nusr/bin/x   admin/bar \nusr/bin/y\tadmin/bar\t\n"
+                     "usr/share/tab\tname \t x/tabs\nusr/lib/z   devel/foo\n")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        lines = cls.sample_content.splitlines()
+        cls.expected = ContentsIndex.from_rows(DebianContentIndex.parse_lines(lines))
+
+    def assertSameIndex(self, index: ContentsIndex, expected: ContentsIndex, msg: str):
+        self.assertEqual(index.paths.to_array().tolist(), expected.paths.to_array().tolist(), msg = msg)
+        self.assertEqual(index.packs.to_array().tolist(), expected.packs.to_array().tolist(), msg = msg)
+        for name in ("row_paths", "file_offsets", "file_packs"):
+            self.assertEqual(getattr(index, name).tolist(), getattr(expected, name).tolist(), msg = msg)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_same_index(self):
+        """
+        Test case for the built index: identical to the line parser's, whatever the chunks and batches.
+        """
+        content = self.sample_content.encode("utf-8")
+        chunks = [content[i : i + 100] for i in range(0, len(content), 100)]
+        for arrow in (False, True) if pyarrow else (False,):
+            for batch_size in (1, 333, PARSE_BATCH_BYTES):
+                msg_fail = f"Index differs from the line parser's (arrow: {arrow}, batches of {batch_size} bytes)."
+                self.assertSameIndex(parse_chunks(chunks, batch_size, arrow = arrow), self.expected, msg = msg_fail)
+        msg_fail = "Index of the whole buffer differs from the line parser's."
+        self.assertSameIndex(parse_buffer(content), self.expected, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_tricky_lines(self):
+        """
+        Test case for the optional header, "\\r\\n" line breaks, blank lines and spaces in filenames.
+        """
+        content = self.sample_header + self.sample_content.replace("\n", "\r\n") + "  \n\nlast/line  x/last"
+        index = parse_buffer(content.encode("utf-8"), batch_size = 256)
+        msg_fail = "Header should be skipped, and nothing else."
+        self.assertEqual(index.paths.find("FILE"), -1, msg = msg_fail)
+        self.assertEqual(len(index), len(self.expected) + 1, msg = msg_fail)
+        msg_fail = "Line breaks and trailing whitespace should not be part of packages."
+        self.assertEqual(index.packs_of("last/line"), ["x/last"], msg = msg_fail)
+        self.assertEqual(index.packs.find("x/last\r"), -1, msg = msg_fail)
+        self.assertEqual(index.packs_of("usr/sbin/sendmail"), ["mail/exim4", "mail/postfix", "mail/sendmail-bin"],
+                         msg = msg_fail)
+        msg_fail = "Filenames with spaces should be kept whole."
+        self.assertEqual(index.packs_of("usr/share/doc/with space/file name.txt"), ["doc/spaced"], msg = msg_fail)
+        index = parse_buffer(b"a  b/c   pack/x\n")
+        self.assertEqual(index.paths.to_array().tolist(), ["a  b/c"], msg = msg_fail)
+        msg_fail = "Empty content should give an empty index."
+        self.assertEqual(len(parse_buffer(b"")), 0, msg = msg_fail)
+        self.assertEqual(len(parse_chunks([b"\n", b"\r", b"\n  \n"])), 0, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_header(self):
+        """
+        Test case for the optional header: skipped by every parser alike (vectorized, line by line,
+        counts only and incremental), and only at the start of the file.
+        """
+        from core.incremental import build_index, update_index
+        content = self.sample_header + self.sample_content
+        lines = content.splitlines()
+        msg_fail = "Line parser should skip the header, as the vectorized one does."
+        rows = DebianContentIndex.parse_lines(lines)
+        self.assertSameIndex(ContentsIndex.from_rows(rows), self.expected, msg = msg_fail)
+        self.assertSameIndex(parse_buffer(content.encode("utf-8")), self.expected, msg = msg_fail)
+        msg_fail = "Counts of the lines should not have a package from the header."
+        counts = PackageCounts.from_lines(lines)
+        self.assertEqual(counts.packs.to_array().tolist(), self.expected.packs.to_array().tolist(), msg = msg_fail)
+        self.assertEqual(counts.counts().tolist(), self.expected.counts().tolist(), msg = msg_fail)
+        msg_fail = "Incremental builds should skip the header too."
+        cold = build_index(lines)
+        self.assertSameIndex(cold, self.expected, msg = msg_fail)
+        self.assertEqual(len(cold.row_hashes), len(cold), msg = msg_fail)
+        self.assertSameIndex(update_index(cold, lines)[0], self.expected, msg = msg_fail)
+        msg_fail = "Lines should be kept whole when there is no header."
+        self.assertEqual(list(skip_header(["a  b/c", "", "d  e/f"])), ["a  b/c", "", "d  e/f"], msg = msg_fail)
+        self.assertEqual(list(skip_header(["x" * PARSE_HEADER_BYTES, "FILE  LOCATION"])),
+                         ["x" * PARSE_HEADER_BYTES, "FILE  LOCATION"], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_entry_points(self):
+        """
+        Test case for lines with inner spaces, tabs and trailing whitespace: every way of counting or
+        indexing a file (cold index, counts only, worker processes, memory budget, several architectures,
+        incremental index, line parser) splits them alike.
+        """
+        from core.multi import count_archs
+        content = self.sample_header + self.sample_content + self.sample_tricky
+        lines = content.splitlines()
+        expected = parse_buffer(content.encode("utf-8"))
+        expected = dict(zip(*expected.ranking(1000)))
+        with TemporaryDirectory() as path, LocalMirror({"Contents-amd64.gz": gzip_contents(content)}) as mirror:
+            options = dict(arch = "amd64", mirror = mirror.url, cache = None)
+            path_index = os.path.join(path, "index-amd64.idx")
+            runs = {"cold index": DebianContentIndex(**options),
+                    "counts only": DebianContentIndex(counts_only = True, **options),
+                    "worker processes": DebianContentIndex(counts_only = True, parse_workers = 2, **options),
+                    "memory budget": DebianContentIndex(memory_budget = 1 << 10, **options),
+                    "incremental index": DebianContentIndex(previous = path_index, **options),
+                    "incremental update": DebianContentIndex(previous = path_index, **options)}
+            rankings = {name: obj.get_ranking(1000).to_dict() for name, obj in runs.items()}
+            table = count_archs(["amd64"], mirror = mirror.url, cache = None, parse_workers = 2)
+            rankings["several architectures"] = table["amd64"][table["amd64"] > 0].to_dict()
+        rankings["line parser"] = dict(zip(*ContentsIndex.from_rows(DebianContentIndex.parse_lines(lines)).ranking(1000)))
+        rankings["line counts"] = dict(zip(*PackageCounts.from_lines(lines).ranking(1000)))
+        self.assertNotIn("", expected, msg = "Trailing whitespace should not make an empty package.")
+        for name, ranking in rankings.items():
+            msg_fail = f"Counts of \"{name}\" differ from the ones of the vectorized parser."
+            self.assertEqual({pack: int(count) for pack, count in ranking.items()}, expected, msg = msg_fail)
+        index = ContentsIndex.from_rows(DebianContentIndex.parse_lines(lines))
+        msg_fail = "Line parser should keep inner spaces of filenames, as the vectorized parser does."
+        self.assertEqual(index.packs_of("usr/share/a  b.txt"), ["devel/foo"], msg = msg_fail)
+        self.assertEqual(index.packs_of("usr/share/tab\tname"), ["x/tabs"], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_from_buffer(self):
+        """
+        Test case for interning of encoded strings: same table and IDs as "`StringTable.build`", whatever
+        the strategy (already sorted, fixed-width, "`pyarrow`" or Python objects).
+        """
+        strings = ["b", "ñandú", "a", "b", "c d", "", "é"]
+        # Plenty of short strings and a long one: too sparse for fixed-width arrays.
+        strings += [f"x/{n % 97}" for n in range(5000)] + ["y/" * 1000]
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.concatenate(([0], np.cumsum([len(string) for string in encoded])))
+        data = np.frombuffer(b"".join(encoded), dtype = np.uint8)
+        expected, _ = StringTable.build(strings)
+        cases = [(data, offsets, arrow) for arrow in ((False, True) if pyarrow else (False,))]
+        cases += [(data[: offsets[7]], offsets[: 8], False)]
+        for data, offsets, arrow in cases:
+            table, ids = StringTable.from_buffer(data, offsets, arrow = arrow)
+            strings = [string.encode("utf-8") for string in table.to_array()]
+            msg_fail = f"Interned table differs from the one of decoded strings (arrow: {arrow})."
+            self.assertEqual(strings, sorted(set(encoded[: len(offsets) - 1])), msg = msg_fail)
+            self.assertEqual([strings[i] for i in ids], encoded[: len(offsets) - 1], msg = msg_fail)
+        msg_fail = "Already sorted strings should be interned as they are."
+        table, ids = StringTable.from_buffer(*expected.arrays)
+        self.assertEqual(table.to_array().tolist(), expected.to_array().tolist(), msg = msg_fail)
+        self.assertEqual(ids.tolist(), list(range(len(expected))), msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_parallel(self):
+        """
+        Test case for the parallel parser ("`parse_parallel`", "`count_parallel`"): same index and counts
+        as "`parse_chunks`", for sorted and unsorted lines, with a header and batches of a few lines.
+        """
+        lines = [line for line in self.sample_content.splitlines() if line]
+        for name, ordered in (("sorted", sorted(lines)), ("unsorted", lines[::-1])):
+            content = (self.sample_header + str.join("\n", ordered) + "\n").encode("utf-8")
+            chunks = [content[i : i + 100] for i in range(0, len(content), 100)]
+            expected = parse_chunks(chunks, batch_size = 333)
+            msg_fail = f"Parallel index differs from the one of \"parse_chunks\" ({name} lines)."
+            self.assertSameIndex(parse_parallel(chunks, workers = 2, batch_size = 333), expected, msg = msg_fail)
+            msg_fail = f"Parallel counts differ from the ones of the index ({name} lines)."
+            counts = count_parallel(chunks, workers = 2, batch_size = 333)
+            self.assertEqual(counts.packs.to_array().tolist(), expected.packs.to_array().tolist(), msg = msg_fail)
+            self.assertEqual(counts.counts().tolist(), expected.counts().tolist(), msg = msg_fail)
+            (names, top), (expected_names, expected_top) = counts.ranking(5), expected.ranking(5)
+            self.assertEqual((names, top.tolist()), (expected_names, expected_top.tolist()), msg = msg_fail)
+        msg_fail = "Empty content should give an empty index."
+        self.assertEqual(len(parse_parallel([b""], workers = 1)), 0, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_concat(self):
+        """
+        Test case for the merge of the tables of consecutive batches: same as "`StringTable.union`", with
+        strings repeated across boundaries, empty tables and unsorted batches.
+        """
+        cases = [[["a", "b"], ["b", "c"], [], ["d"]], [["b", "c"], ["a", "c"]], [[], []]]
+        for strings in cases:
+            tables = [StringTable.build(part)[0] for part in strings]
+            table, remaps = StringTable.concat(tables)
+            expected, expected_remaps = StringTable.union(tables)
+            msg_fail = f"Merged table differs from the union of {strings}."
+            self.assertEqual(table.to_array().tolist(), expected.to_array().tolist(), msg = msg_fail)
+            self.assertEqual([remap.tolist() for remap in remaps], [remap.tolist() for remap in expected_remaps],
+                             msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
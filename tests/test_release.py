@@ -0,0 +1,103 @@
+import os, sys, lzma
+sys.path.append("./")
+from core.content import *
+from core.multi import *
+from core.release import *
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████   Release file tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestDebianRelease(TestCase):
+    """Test case for "`DebianRelease`" parsing, and for the discovery of files through it."""
+
+    sample_text = str.join("\n", ["-----BEGIN PGP SIGNED MESSAGE-----", "Hash: SHA512", "",
+        "Origin: Debian", "Suite: stable", "Components: main contrib",
+        "- Description: dash-escaped line", "MD5Sum:",
+        " 00000000000000000000000000000000     1000 main/Contents-amd64.gz",
+        "SHA256:",
+        " " + "a" * 64 + "     1000 main/Contents-amd64.gz",
+        " " + "b" * 64 + "      600 main/Contents-amd64.xz",
+        " " + "c" * 64 + "     9000 main/Contents-amd64",
+        " " + "d" * 64 + "      300 main/Contents-arm64.gz",
+        " " + "e" * 64 + "      300 main/Contents-arm64.xz",
+        " " + "f" * 64 + "      100 main/binary-amd64/Packages.gz",
+        " " + "0" * 64 + "       50 contrib/Contents-amd64.gz",
+        "-----BEGIN PGP SIGNATURE-----", "", "iQIzBAEBCgAdFiEE", "-----END PGP SIGNATURE-----"])
+    sample_content = sample_contents(repeat = 5)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_parse(self):
+        """
+        Test case for the clear-signed file: fields, SHA256 table, directories and cheapest variants.
+        """
+        release = DebianRelease.from_text(self.sample_text)
+        msg_fail = "Fields of the Release file were not parsed."
+        self.assertEqual(release.fields["Suite"], "stable", msg = msg_fail)
+        self.assertEqual(release.fields["Description"], "dash-escaped line", msg = msg_fail)
+        msg_fail = "SHA256 table was not parsed (or other tables were mixed in)."
+        self.assertEqual(release.files["main/Contents-amd64.gz"], (1000, "a" * 64), msg = msg_fail)
+        self.assertEqual(len(release.files), 7, msg = msg_fail)
+        msg_fail = "Directory of a component should only hold its own files, not subfolders."
+        self.assertEqual(sorted(release.directory("contrib")), ["Contents-amd64.gz"], msg = msg_fail)
+        self.assertNotIn("binary-amd64/Packages.gz", release.directory("main"), msg = msg_fail)
+        msg_fail = "Smallest compressed variant should be chosen (first compression on ties)."
+        self.assertEqual(release.locate("main", "Contents-amd64.gz"), ("Contents-amd64.xz", 600, "b" * 64), msg = msg_fail)
+        self.assertEqual(release.locate("main", "Contents-arm64.xz")[0], "Contents-arm64.gz", msg = msg_fail)
+        self.assertIsNone(release.locate("contrib", "Contents-i386.gz"), msg = msg_fail)
+        self.assertRaises(DebianRelease.FormatError, DebianRelease.from_text, "Suite: stable\n")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_discovery(self):
+        """
+        Test case for downloads driven by the Release file: no directory page, and ".xz" when smaller.
+        """
+        files = {"Contents-amd64.gz": gzip_contents(self.sample_content),
+                 "Contents-amd64.xz": lzma.compress(self.sample_content.encode("utf-8")),
+                 "Contents-arm64.xz": lzma.compress(self.sample_content.encode("utf-8"))}
+        with LocalMirror(files) as mirror:
+            Index = mirror.bind(DebianContentIndex)
+            obj = Index(arch = "amd64", cache = None)
+            msg_fail = "Architectures should be listed once, whatever their compressions."
+            self.assertEqual(sorted(obj.list_archs), ["amd64", "arm64"], msg = msg_fail)
+            msg_fail = "Directory page should not be needed when there is a Release file."
+            paths = [path for path, status in mirror.requests]
+            self.assertNotIn("/dists/stable/main/", paths, msg = msg_fail)
+            msg_fail = "Smaller \".xz\" variant was not the one downloaded."
+            self.assertIn("/dists/stable/main/Contents-amd64.xz", paths, msg = msg_fail)
+            self.assertNotIn("/dists/stable/main/Contents-amd64.gz", paths, msg = msg_fail)
+            msg_fail = "Content of the \".xz\" variant differs."
+            self.assertEqual(obj.table_file_packs.shape[0], len(self.sample_content.splitlines()) - 5, msg = msg_fail)
+            table = count_archs(["arm64"], downloader = mirror.bind(DebianDownloader), cache = None, parse_workers = 1)
+            self.assertEqual(table["arm64"].to_dict(), obj.get_ranking(10 ** 6).to_dict(), msg = msg_fail)
+        # Without Release file, the directory page is scraped as before.
+        with LocalMirror(files, release = False) as mirror:
+            obj = mirror.bind(DebianContentIndex)(arch = "amd64", cache = None)
+            msg_fail = "Mirror without Release file should fall back to the directory page."
+            self.assertIsNone(obj.release, msg = msg_fail)
+            self.assertIn("/dists/stable/main/", [path for path, status in mirror.requests], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_checksum(self):
+        """
+        Test case for downloads not matching the Release file: an error, and nothing cached.
+        """
+        with TemporaryDirectory() as path, LocalMirror({"Contents-amd64.gz": gzip_contents(self.sample_content)}) as mirror:
+            obj = mirror.bind(DebianDownloader)(cache = path)
+            # The file changes on the mirror after its Release file was read.
+            mirror.files["Contents-amd64.gz"] = gzip_contents(self.sample_content + "usr/bin/new  x/new\n")
+            self.assertRaises(obj.ChecksumMismatch, obj.download, "Contents-amd64.gz")
+            msg_fail = "Corrupt download should not be cached."
+            self.assertIsNone(obj._cache.lookup(obj.URL_BASE.format(filename = "Contents-amd64.gz")), msg = msg_fail)
+            # A new run reads the new Release file: fine.
+            obj = mirror.bind(DebianDownloader)(cache = path)
+            self.assertIn("usr/bin/new", obj.download("Contents-amd64.gz"), msg = "Updated file was not downloaded.")
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
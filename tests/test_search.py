@@ -0,0 +1,76 @@
+import os, re, sys
+sys.path.append("./")
+from core.content import *
+from core.search import *
+from utils.mirror import *
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#█████████████████████████████████████████████████████████████████████████████████████████████████   Path search tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestPathSearch(TestCase):
+    """Test case for "`PathSearch`" class, against plain scans of the "filename -> packages" table."""
+
+    queries = {
+        "exact": ["usr/sbin/sendmail", "r1/usr/sbin/sendmail", "not/a/file", ""],
+        "prefix": ["r2/", "r1/usr/s", "usr/share/doc/", "zzz", ""],
+        "basename": ["sendmail", "README", "nothing-like-this"],
+        "substring": ["bin/", "piglit", "a", "e m", "ñ", "xyz/abc"],
+        "regex": [r"^r0/.*\.py$", r"bin/(send|post)", r"(?i)SENDMAIL", r"[0-9]", r"lib.*/x$"],
+    }
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @classmethod
+    def setUpClass(cls):
+        lines = sample_contents(repeat = 3).splitlines()
+        cls.index = ContentsIndex.from_rows(DebianContentIndex.parse_lines(lines))
+        cls.obj = PathSearch(cls.index)
+        # Reference: every filename with the packages of all its rows.
+        table = cls.index.file_packs_series()
+        cls.reference = table.groupby(level = 0).sum()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def expected(self, mode: str, query: str):
+        """Result of a query, from a plain scan of all filenames."""
+        matches = {
+            "exact": lambda path: path == query,
+            "prefix": lambda path: path.startswith(query),
+            "basename": lambda path: path.rpartition("/")[2] == query,
+            "substring": lambda path: query in path,
+            "regex": lambda path: re.search(query, path) is not None,
+        }[mode]
+        return self.reference[[matches(path) for path in self.reference.index]]
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_modes(self):
+        """
+        Test case for every search mode: same filenames and packages as a scan.
+        """
+        for mode, queries in self.queries.items():
+            for query in queries:
+                result = self.obj.search(query, mode = mode)
+                expected = self.expected(mode, query)
+                msg_fail = f"Search \"{query}\" ({mode}) differs from a scan."
+                self.assertEqual(result.index.tolist(), expected.index.tolist(), msg = msg_fail)
+                self.assertEqual(result.tolist(), expected.tolist(), msg = msg_fail)
+        msg_fail = "Limit of results not applied."
+        self.assertEqual(self.obj.search("r", mode = "prefix", limit = 2).shape[0], 2, msg = msg_fail)
+        self.assertRaises(ValueError, self.obj.search, "usr", mode = "fuzzy")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_literals(self):
+        """
+        Test case for the literal parts of regular expressions, which narrow down candidates.
+        """
+        literals = lambda pattern: [l for l in PathSearch._literals(re.compile(pattern)) if l]
+        msg_fail = "Wrong literals extracted from a pattern."
+        self.assertEqual(literals(r"^usr/lib/.*\.so$"), [b"usr/lib/", b".so"], msg = msg_fail)
+        self.assertEqual(literals(r"a(bc|de)fg"), [b"a", b"fg"], msg = msg_fail)
+        self.assertEqual(literals(r"(?i)usr"), [], msg = msg_fail)
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
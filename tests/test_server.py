@@ -0,0 +1,120 @@
+import sys, json, asyncio
+from http.client import HTTPConnection
+sys.path.append("./")
+from core.content import *
+from core.server import *
+from utils.mirror import *
+from unittest import IsolatedAsyncioTestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#██████████████████████████████████████████████████████████████████████████████████████████   Resident service tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestIndexServer(IsolatedAsyncioTestCase):
+    """Test case for the resident service ("`IndexServer`") and its HTTP/JSON API, over a local mirror."""
+
+    sample_file = "Contents-amd64.gz"
+    sample_content = sample_contents(repeat = 3)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    async def asyncSetUp(self):
+        self.mirror = LocalMirror({self.sample_file: gzip_contents(self.sample_content),
+                                   "Contents-i386.gz": gzip_contents("usr/bin/only-i386   utils/tool\n")}).__enter__()
+        self.server = IndexServer(["amd64", "i386"], port = 0, refresh = None, mirror = self.mirror.url, cache = None)
+        await self.server.start()
+        await self.server.ready()
+        self.connection = HTTPConnection("127.0.0.1", self.server.port, timeout = 10)
+
+    async def asyncTearDown(self):
+        self.connection.close()
+        await self.server.close()
+        self.mirror.__exit__()
+
+    async def request(self, target: str, method: str = "GET"):
+        """Send a request over a kept-alive connection, and get the status and decoded JSON of its answer."""
+        def send():
+            self.connection.request(method, target)
+            response = self.connection.getresponse()
+            return response.status, json.loads(response.read())
+        return await asyncio.to_thread(send)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    async def test_queries(self):
+        """
+        Test case for the queries: same answers as "`DebianContentIndex`", for each served architecture.
+        """
+        obj = self.mirror.bind(DebianContentIndex)(arch = "amd64", cache = None)
+        status, body = await self.request("/health")
+        msg_fail = "Every architecture should be ready."
+        self.assertEqual((status, body["ready"]), (200, {"amd64": True, "i386": True}), msg = msg_fail)
+        status, body = await self.request("/ranking?top=3")
+        msg_fail = "Ranking should be the one of the first architecture by default."
+        expected = obj.get_ranking(3)
+        self.assertEqual(body["arch"], "amd64", msg = msg_fail)
+        self.assertEqual([(row["package"], row["files"]) for row in body["ranking"]], list(expected.items()),
+                         msg = msg_fail)
+        msg_fail = "Filenames of a package should be the ones of the index."
+        status, body = await self.request("/files?package=mail/postfix")
+        self.assertEqual(body["files"], obj.index.files_of("mail/postfix"), msg = msg_fail)
+        msg_fail = "Packages of a filename should be found in every mode."
+        status, body = await self.request("/packages?path=usr/sbin/sendmail")
+        self.assertEqual(body["results"], [{"path": "usr/sbin/sendmail",
+                                            "packages": ["mail/exim4", "mail/postfix", "mail/sendmail-bin"]}],
+                         msg = msg_fail)
+        status, body = await self.request("/packages?path=sendmail&mode=substring&limit=2")
+        self.assertEqual(len(body["results"]), 2, msg = msg_fail)
+        msg_fail = "Other architectures should be served on request."
+        status, body = await self.request("/packages?arch=i386&path=usr/bin/only-i386")
+        self.assertEqual(body["results"][0]["packages"], ["utils/tool"], msg = msg_fail)
+        status, body = await self.request("/archs")
+        self.assertEqual(sorted(body), ["amd64", "i386"], msg = msg_fail)
+        self.assertIn("parse", [entry["stage"] for entry in body["amd64"]["report"]["stages"]], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    async def test_errors(self):
+        """
+        Test case for wrong requests: unknown routes, architectures or packages, and invalid parameters.
+        """
+        cases = [("/nothing", "GET", 404), ("/ranking?arch=mips", "GET", 404), ("/files?package=no/such", "GET", 404),
+                 ("/ranking?top=0", "GET", 400), ("/ranking?top=x", "GET", 400), ("/files", "GET", 400),
+                 ("/packages?path=a&mode=fuzzy", "GET", 400), ("/packages?path=(&mode=regex", "GET", 400),
+                 ("/ranking", "POST", 405), ("/refresh?arch=mips", "POST", 404)]
+        for target, method, expected in cases:
+            status, body = await self.request(target, method)
+            msg_fail = f"\"{method} {target}\" should be answered with {expected}."
+            self.assertEqual(status, expected, msg = msg_fail)
+            self.assertIn("error", body, msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    async def test_refresh(self):
+        """
+        Test case for refreshes: the index is only rebuilt when the file changed on the mirror, and then
+        swapped in for the next requests.
+        """
+        msg_fail = "Unchanged file should not be indexed again."
+        self.assertFalse(await self.server.refresh("i386"), msg = msg_fail)
+        self.mirror.files["Contents-i386.gz"] = gzip_contents("usr/bin/new   utils/new\nusr/bin/newer   utils/new\n")
+        status, body = await self.request("/refresh?arch=i386", method = "POST")
+        msg_fail = "Refresh should be accepted, and run in the background."
+        self.assertEqual((status, body), (202, {"refreshing": ["i386"]}), msg = msg_fail)
+        status, body = await self.request("/refresh?arch=i386", method = "POST")
+        self.assertEqual((status, body), (202, {"refreshing": ["i386"]}), msg = msg_fail)
+        msg_fail = "A refresh should not be started again while the previous one is pending."
+        self.assertLessEqual(len(self.server._tasks), 1, msg = msg_fail)
+        for _ in range(500): # Wait for the new index.
+            status, body = await self.request("/ranking?arch=i386")
+            if (body["ranking"][0]["package"] == "utils/new"): break
+            await asyncio.sleep(0.01)
+        msg_fail = "Changed file should be indexed again, and swapped in."
+        self.assertEqual(body["ranking"], [{"package": "utils/new", "files": 2}], msg = msg_fail)
+        self.assertFalse(await self.server.refresh("i386"), msg = msg_fail)
+        for _ in range(500): # Finished tasks are dropped.
+            if not self.server._tasks: break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.server._tasks, set(), msg = "Finished refreshes should not be kept.")
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
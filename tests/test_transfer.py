@@ -0,0 +1,97 @@
+import os, sys, json
+sys.path.append("./")
+from core.base import *
+from core.cache import *
+from core.transfer import *
+from utils.mirror import *
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#████████████████████████████████████████████████████████████████████████████████████████████   Ranged transfer tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class TestRangedTransfer(TestCase):
+    """Test case for pooled, retried and ranged downloads of "`DebianDownloader`" (see "`RangedTransfer`")."""
+
+    sample_file = "blob.bin"
+    payload = os.urandom(200_000)
+    options = dict(range_workers = 4, range_min_size = 10_000, backoff = 0)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def setUp(self):
+        self.temp = TemporaryDirectory()
+        self.path = self.temp.name
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def download(self, Downloader: type, **kwargs):
+        """Download the sample file, raw."""
+        obj = Downloader(**{"cache": None, **self.options, **kwargs})
+        return b"".join(obj.download_chunks(self.sample_file, chunk_size = 4096))
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_ranged(self):
+        """
+        Test case for large files: fetched in concurrent ranges, over few pooled connections.
+        """
+        with LocalMirror({self.sample_file: self.payload}) as mirror:
+            Downloader = mirror.bind(DebianDownloader)
+            self.assertEqual(self.download(Downloader), self.payload, msg = "Ranged download is corrupt.")
+            statuses = [status for path, status in mirror.requests if path.endswith(self.sample_file)]
+            msg_fail = "File was not fetched in parallel ranges."
+            self.assertEqual(sorted(statuses), [200, 206, 206, 206], msg = msg_fail)
+            msg_fail = "Connections were not reused."
+            self.assertLessEqual(mirror.connections, 1 + self.options["range_workers"], msg = msg_fail)
+            # Small files (like the directory page) are fetched in a single request.
+            mirror.requests.clear()
+            self.assertEqual(self.download(Downloader, range_min_size = 10 ** 9), self.payload)
+            self.assertEqual([status for path, status in mirror.requests], [200, 200], msg = msg_fail)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_broken_connections(self):
+        """
+        Test case for connections broken in the middle of a part: resumed within the same download.
+        """
+        with LocalMirror({self.sample_file: self.payload}) as mirror:
+            Downloader = mirror.bind(DebianDownloader)
+            mirror.cut(self.sample_file, after = 1000, times = 3)
+            msg_fail = "Download with broken connections is corrupt."
+            self.assertEqual(self.download(Downloader), self.payload, msg = msg_fail)
+            # Without ranges, a broken connection is an error (and not a silently truncated file).
+            mirror.cut(self.sample_file, after = 1000)
+            with self.assertRaises(Exception):
+                self.download(Downloader, range_workers = 1)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def test_resume(self):
+        """
+        Test case for downloads interrupted for good: resumed later from the parts kept in the cache.
+        """
+        with LocalMirror({self.sample_file: self.payload}) as mirror:
+            Downloader = mirror.bind(DebianDownloader)
+            mirror.cut(self.sample_file, after = 10_000, times = 100)
+            with self.assertRaises(Exception):
+                self.download(Downloader, cache = self.path, retries = 1)
+            # Progress was kept: some bytes done, none of them to be fetched again.
+            obj = Downloader(cache = self.path, **self.options)
+            url = obj.URL_BASE.format(filename = self.sample_file)
+            path_partial = obj._cache.partial(url)
+            with open(path_partial + RangedTransfer.SUFFIX_PROGRESS) as file:
+                parts = json.load(file)["parts"]
+            done = sum(part[2] for part in parts)
+            self.assertGreater(done, 0, msg = "Progress of the interrupted download was lost.")
+            mirror._cuts.clear()
+            mirror.requests.clear()
+            self.assertEqual(self.download(Downloader, cache = self.path), self.payload, msg = "Resumed download is corrupt.")
+            msg_fail = "Partial download should be gone once complete."
+            self.assertFalse(os.path.exists(path_partial), msg = msg_fail)
+            entry = DebianCache(self.path).lookup(url)
+            self.assertEqual(entry["size"], len(self.payload), msg = "Resumed download was not cached.")
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████████████   Run all tests   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+if (__name__ == "__main__"): main()
@@ -7,4 +7,111 @@ ARCH_LOCAL_MACHINE = uname().machine.lower()
 # Just the local path of wherever this repo is held.
 THIS_PATH = os.path.split(__file__)[0]
 
-SEPARATOR = "–" * 100
\ No newline at end of file
+SEPARATOR = "–" * 100
+
+# Debian mirror, and the suite ("stable", "testing", "bookworm"...) and component ("main", "contrib",
+# "non-free"...) whose contents-index files are used when none is given.
+DEBIAN_MIRROR = "http://ftp.uk.debian.org/debian/"
+DEBIAN_SUITE = "stable"
+DEBIAN_COMPONENT = "main"
+# Files of a suite listing (and hashing) all of its index files, in order of preference. And compressions
+# the contents-index files may come in: the smallest available one is downloaded (the first one on ties).
+RELEASE_FILES = ("InRelease", "Release")
+RELEASE_COMPRESSIONS = (".gz", ".xz")
+
+# Decompression backends (see "core/decompress.py") of each compression extension, fastest first: the first
+# one installed is used, unless another one is given.
+CODEC_BACKENDS = {"gz": ("isal", "zlib-ng", "zlib"), "xz": ("lzma",)}
+
+# Size in bytes of each chunk read from the network when streaming a download.
+CHUNK_SIZE = 1 << 20
+# Amount of chunks that may be prefetched while the consumer is still parsing.
+PREFETCH_CHUNKS = 8
+
+# HTTP requests: timeout in seconds, retries of failed requests, and initial backoff (doubled each retry).
+HTTP_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+# Files at least this large are downloaded by several concurrent "Range" requests.
+RANGE_MIN_BYTES = 8 << 20
+RANGE_WORKERS = 4
+
+# Local directory for the cache of downloaded files, and its size limit in bytes.
+CACHE_PATH = "./temp/cache"
+CACHE_MAX_BYTES = 512 << 20
+
+# Concurrent downloads when indexing several architectures at once.
+DOWNLOAD_WORKERS = 4
+
+# Bytes of decompressed content parsed at once by the vectorized parser (see "core/parser.py"), and bytes
+# at the start of a file where its optional header (ending in a "FILE  LOCATION" line) is looked for.
+PARSE_BATCH_BYTES = 1 << 22
+PARSE_HEADER_BYTES = 1 << 16
+
+# Batches in flight per worker process when parsing a single file in parallel (see "parse_parallel"):
+# shared-memory blocks held at once, while the main thread decompresses the next ones.
+PARSE_QUEUE_PER_WORKER = 2
+
+# Lines hashed and matched at once when updating an index incrementally.
+UPDATE_BATCH_LINES = 1 << 16
+
+# Persisted indexes of previous runs, for incremental updates.
+INDEX_PATH = "./temp/index-{arch}.idx"
+
+# Bytes of filenames processed at once when building the trigram index for searches.
+SEARCH_GRAM_BATCH = 1 << 24
+
+# Shape of an architecture name, as in "Contents-{arch}.gz". Checked before any download.
+REGEX_ARCH_NAME = "\\w+"
+# Shape of a suite or component name, as in "dists/{suite}/{component}/" (e.g.: "bookworm-updates").
+REGEX_DIST_NAME = "[\\w.-]+"
+# Line ending the optional header of old contents-index files (free text before it is skipped too).
+REGEX_CONTENTS_HEADER = "FILE[ \\t]+LOCATION[ \\t]*\\r?"
+
+# Kinds of path search queries (see "core/search.py").
+SEARCH_MODES = ("exact", "prefix", "basename", "substring", "regex")
+
+# Export formats of the "package -> filenames" relation, and compressions by file extension.
+EXPORT_FORMATS = ("json", "ndjson")
+EXPORT_COMPRESSIONS = {"gz": "gzip", "zst": "zstd"}
+
+# Out-of-core indexing (see "core/external.py"): default bytes of entries held in memory before spilling
+# a sorted run to disk, runs merged at once, and read buffer (bytes) and entries written at once per run.
+EXTERNAL_MEMORY_BUDGET = 256 << 20
+EXTERNAL_MERGE_FANIN = 64
+EXTERNAL_READ_BUFFER = 1 << 16
+EXTERNAL_WRITE_BATCH = 1 << 16
+
+# Metrics computed at once from an index (see "core/metrics.py"), and where they are stored per architecture.
+METRICS_BY = ("package", "section", "directory", "size", "shared")
+METRICS_PATH = "./temp/metrics-{arch}.json"
+
+# Columnar export of the index (see "core/columnar.py"): formats by file extension, maximum rows per Parquet
+# row group (each architecture starts its own ones), and where a file is stored per architecture.
+COLUMNAR_FORMATS = {"parquet": "parquet", "feather": "feather", "arrow": "feather"}
+COLUMNAR_ROW_GROUP_ROWS = 1 << 20
+COLUMNAR_PATH = "./temp/index-{arch}.{fmt}"
+
+# SQLite store of indexes (see "core/database.py"): database file, rows inserted per "executemany" call, and
+# seconds to wait for another process writing to it.
+SQLITE_PATH = "./temp/contents.sqlite"
+SQLITE_BATCH_ROWS = 1 << 16
+SQLITE_TIMEOUT = 60
+
+# Filenames decoded at once when exporting the "package -> filenames" relation.
+EXPORT_BATCH_FILES = 1 << 16
+
+# Benchmarks (see "benchmarks/bench_stages.py"): sizes of synthetic contents-index files (lines), folder
+# of generated files and results, and allowed slowdown (or memory growth) against a baseline run.
+BENCH_SIZES = (10_000, 100_000, 1_000_000)
+BENCH_DATA_PATH = "./temp/bench"
+BENCH_RESULTS_PATH = "./temp/bench/results.json"
+BENCH_TOLERANCE = 0.2
+
+# Seconds between samples of the memory of the process, when reporting stages (see "core/instrument.py").
+MEMORY_SAMPLE_INTERVAL = 0.005
+
+# Resident service (see "core/server.py"): address of its HTTP API, and seconds between checks of the mirror.
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+SERVE_REFRESH_SECONDS = 3600
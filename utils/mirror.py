@@ -0,0 +1,178 @@
+import os, sys, gzip
+from hashlib import sha1, sha256
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+
+sys.path.append("./")
+from utils.constants import *
+
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+#███████████████████████████████████████████████████████████████████████████████████████████   Local stand-in mirror   ███
+#█████████████████████████████████████████████████████████████████████████████████████████████████████████████████████████
+
+class LocalMirror:
+    """
+    Minimal stand-in for the Debian mirror, served from memory through "`http.server`" on localhost.
+    Meant for offline tests and benchmarks. Use as a context manager:
+     - "`files`" (`dict[str, bytes]`): Filenames and their (already compressed, if so) payloads. Names may
+        hold a path, like the real mirror's "dists/testing/contrib/Contents-amd64.gz": every directory
+        gets its own listing page. Names without a path go to the default suite and component.
+     - "`release`" (`bool`): Whether to publish a "`Release`" and "`InRelease`" file for each suite, with the
+        size and SHA256 hash of its files (computed on each request, so always up to date).\n
+    Methods:
+     - "`url`" (property, `str`) to get the base URL of the served directory (ends with "/").
+     - "`bind`" (method, `type`) to get a subclass of a downloader class pointing to this mirror.
+     - "`release_of`" (method, `bytes`) to get the "`Release`" file of a suite.
+     - "`requests`" (attribute, `list`) with the path and status code of every request received.
+     - "`connections`" (attribute, `int`) with the amount of TCP connections accepted (keep-alive is on).
+     - "`cut`" (method, `None`) to break the connection in the middle of the next responses of a file.\n
+    Files are also served by "`Range`" (single range, honoring "`If-Range`"), like the real mirror.
+    """
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    FOLDER_DEFAULT = f"dists/{DEBIAN_SUITE}/{DEBIAN_COMPONENT}/"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __init__(self, files: dict = None, release: bool = True):
+
+        self.files = dict(files or {})
+        self.release = release
+        self.requests = []  # Log of requested paths.
+        self.connections = 0
+        self._cuts = {}     # Filename: bytes sent before breaking each next response.
+        mirror = self       # Handler class needs to reach this instance.
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep connections alive.
+            def log_message(self, *args): pass # Keep test output clean.
+            def setup(self):
+                mirror.connections += 1
+                super().setup()
+            def do_GET(self): mirror._serve(self)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.handle_error = lambda *args: None # Clients closing early are expected.
+        self._thread = Thread(target = self._server.serve_forever, daemon = True)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    @property
+    def url(self):
+        """Base URL of the served directory."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def bind(self, downloader: type):
+        """Get a subclass of the given downloader class which points to this mirror."""
+        return type(downloader.__name__, (downloader,), {"MIRROR": self.url})
+
+    def cut(self, name: str, after: int, times: int = 1):
+        """Break the connection after "`after`" bytes of body, in the next "`times`" responses of a file."""
+        self._cuts.setdefault(name, []).extend([after] * times)
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _paths(self):
+        """[PRIVATE] Full path of every file (default folder for names without one), with its key in "`files`"."""
+        return {(name if ("/" in name) else self.FOLDER_DEFAULT + name): name for name in self.files}
+
+    def release_of(self, suite: str):
+        """"`Release`" file of a suite: SHA256 table of every file under its folder."""
+        folder = f"dists/{suite}/"
+        rows = [f"Suite: {suite}", "SHA256:"]
+        for path, name in sorted(self._paths().items()):
+            if not path.startswith(folder): continue
+            data = self.files[name]
+            rows.append(f" {sha256(data).hexdigest()} {len(data):>16} {path[len(folder) :]}")
+        return (str.join("\n", rows) + "\n").encode("utf-8")
+
+    def _signed(self, release: bytes):
+        """[PRIVATE] Wrap a "`Release`" file like a clear-signed "`InRelease`" one (with a fake signature)."""
+        return b"-----BEGIN PGP SIGNED MESSAGE-----\nHash: SHA256\n\n" + release + \
+               b"-----BEGIN PGP SIGNATURE-----\n\nnot-a-signature\n-----END PGP SIGNATURE-----\n"
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _listing(self, folder: str = ""):
+        """[PRIVATE] HTML directory page, formatted like the real mirror's one. Files directly in the folder only."""
+        rows = ["<html><body><pre><a href=\"../\">../</a>\r\n"]
+        for name, data in [(path, self.files[name]) for path, name in self._paths().items()]:
+            if not name.startswith(folder) or ("/" in name[len(folder) :]): continue
+            name = name[len(folder) :]
+            rows.append(f"<a href=\"{name}\">{name}</a>  07-Oct-2023 09:12  {len(data)}\r\n")
+        return str.join("", rows + ["</pre></body></html>\r\n"]).encode("utf-8")
+
+    #▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+    def _serve(self, handler: BaseHTTPRequestHandler):
+        """[PRIVATE] Answer a single GET request, honoring "`If-None-Match`", "`Range`" and "`If-Range`"."""
+        name, paths = handler.path.lstrip("/"), self._paths()
+        folder, _, filename = name.rpartition("/")
+        if (name == "") or (name.endswith("/") and any(path.startswith(name) for path in paths)):
+            body = self._listing(name) # Directory page.
+        elif name in paths.keys():
+            name = paths[name]
+            body = self.files[name]
+        elif self.release and (filename in RELEASE_FILES) and folder.startswith("dists/") and (folder.count("/") == 1) \
+             and any(path.startswith(folder + "/") for path in paths):
+            body = self.release_of(folder[len("dists/") :])
+            if (filename == "InRelease"): body = self._signed(body)
+        else: # Anything else does not exist.
+            self.requests.append((handler.path, 404))
+            handler.send_error(404)
+            return
+        etag = "\"%s\"" % sha1(body).hexdigest()
+        if (handler.headers.get("If-None-Match") == etag):
+            self.requests.append((handler.path, 304))
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.end_headers()
+            return
+        status, size, ranged = 200, len(body), handler.headers.get("Range", "")
+        if ranged.startswith("bytes=") and (handler.headers.get("If-Range", etag) == etag):
+            start, end = ranged[len("bytes=") :].split("-")
+            start, end = int(start), min(int(end or size - 1), size - 1)
+            status, body = 206, body[start : end + 1]
+        self.requests.append((handler.path, status))
+        handler.send_response(status)
+        handler.send_header("ETag", etag)
+        handler.send_header("Accept-Ranges", "bytes")
+        handler.send_header("Content-Length", str(len(body)))
+        if (status == 206): handler.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        handler.end_headers()
+        cuts = self._cuts.get(name)
+        if cuts: # Simulate a broken connection.
+            handler.wfile.write(body[: cuts.pop(0)])
+            handler.close_connection = True
+            return
+        handler.wfile.write(body)
+
+#▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
+def sample_contents(repeat: int = 1):
+    """
+    Build a small contents-index text, based on the verifying sample in "temp" folder,
+    plus some tricky lines (spaces in filenames, multiple packages, blank lines).\n
+    Inputs:
+    - `repeat` (`int`): Times to repeat the sample, with a distinct path prefix each.\n
+    Outputs:
+    - `content` (`str`): The contents-index text.
+    """
+    path_verify = os.path.join(os.path.split(__file__)[0], "..", "temp", "test_content_verify.txt")
+    with open(path_verify, "r") as file: lines = file.read().splitlines()
+    lines += ["usr/share/doc/with space/file name.txt     doc/spaced",
+              "usr/sbin/sendmail                          mail/exim4,mail/postfix,mail/sendmail-bin",
+              "", "usr/share/piglit/tests/a.py               devel/piglit",
+              "usr/share/piglit/tests/b.py               devel/piglit,devel/piglit-extra"]
+    # Repeat with a different prefix so that filenames stay unique.
+    lines = [f"r{n}/" * bool(n) + line if line else line for n in range(repeat) for line in lines]
+    return str.join("\n", lines) + "\n"
+
+def gzip_contents(content: str):
+    """Compress contents-index text as the mirror does."""
+    return gzip.compress(content.encode("utf-8"))